@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Benchmark the balance-reading views before and after installing the
+maintained balance ledger (server/balance_ledger.sql), on a synthetic
+database with ten years of weekly sessions.
+
+Also times a session start and stop, which now fire the ledger triggers.
+
+Usage:
+    python3 bench/balance_ledger.py
+    python3 bench/balance_ledger.py --weeks 1040 --sessions 41600 --players 500
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import balance_ledger  # noqa: E402
+import synth  # noqa: E402
+
+QUERIES = {
+    "Player_Balance": "SELECT * FROM Player_Balance",
+    "Player_Selection_List": "SELECT * FROM Player_Selection_List",
+    "Session_Panel_List": "SELECT * FROM Session_Panel_List",
+    "one balance": "SELECT Balance FROM Player_Balance WHERE Player_Id = 7",
+}
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def time_queries(db_path, repeat):
+    con = sqlite3.connect(db_path)
+    try:
+        results = {name: median_ms(lambda: con.execute(query).fetchall(), repeat)
+                   for (name, query) in QUERIES.items()}
+
+        def start_and_stop():
+            with con:
+                cur = con.execute("INSERT INTO Session (Player_Id, Start_Epoch, Hourly_Rate) "
+                                  "VALUES (7, 2000000000, 5)")
+                con.execute("UPDATE Session SET Stop_Epoch = Start_Epoch + 7200 WHERE Session_Id = ?",
+                            (cur.lastrowid,))
+        results["start+stop write"] = median_ms(start_and_stop, repeat)
+    finally:
+        con.close()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark balance views with and without the ledger.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        views_db = os.path.join(tmp_dir, "views.db")
+        counts = synth.build_from_args(views_db, args)
+        ledger_db = os.path.join(tmp_dir, "ledger.db")
+        shutil.copyfile(views_db, ledger_db)
+        con = sqlite3.connect(ledger_db)
+        try:
+            balance_ledger.install(con)
+        finally:
+            con.close()
+
+        print(", ".join(f"{n} {what}" for (what, n) in counts.items()))
+        before = time_queries(views_db, args.repeat)
+        after = time_queries(ledger_db, args.repeat)
+
+        con = sqlite3.connect(ledger_db)
+        try:
+            drift = balance_ledger.verify(con)
+        finally:
+            con.close()
+
+    print(f"{'median ms':<22} {'views':>9} {'ledger':>9} {'speedup':>8}")
+    for name in before:
+        print(f"{name:<22} {before[name]:>9.2f} {after[name]:>9.2f} {before[name] / after[name]:>7.1f}x")
+    print(f"ledger drift after the timed writes: {len(drift)} players")
+
+
+if __name__ == "__main__":
+    main()
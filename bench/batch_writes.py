@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Throughput of server/batch_writes.py's batched writes against the
+one-at-a-time path the session app takes (ConnectionManager.execute:
+one statement, one commit), in rows per second, for
+    stop      stopping --rows running sessions
+    pay       applying --rows payments
+    import    adding --rows players, each with an email and a phone
+Each path runs on its own copy of one synthetic database, in WAL mode
+as the app runs it.
+
+Usage:
+    python3 bench/batch_writes.py
+    python3 bench/batch_writes.py --rows 10000 --players 2000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import batch_writes  # noqa: E402
+from dbconnection import ConnectionManager  # noqa: E402
+
+NOW_EPOCH = 1760000000
+
+
+def start_sessions(db_path, player_ids, n_rows):
+    """Leave n_rows sessions running; return their Session_Ids."""
+    manager = ConnectionManager(db_path)
+    con = manager.writer()
+    with batch_writes.transaction(con):
+        first = con.execute("SELECT IFNULL(MAX(Session_Id), 0) + 1 FROM Session").fetchone()[0]
+        con.executemany("INSERT INTO Session (Player_Id, Start_Epoch) VALUES (?, ?)",
+                        ((player_id, NOW_EPOCH - 3600) for player_id in player_ids[:n_rows]))
+    manager.close()
+    return list(range(first, first + n_rows))
+
+
+def one_at_a_time(manager, operation, rows):
+    if operation == "stop":
+        for session_id in rows:
+            manager.execute(batch_writes.STOP_SESSION_SQL, (NOW_EPOCH, session_id))
+    elif operation == "pay":
+        for payment in rows:
+            manager.execute(batch_writes.INSERT_PAYMENT_SQL, payment)
+    else:
+        # What bin/new_player did per player, as separate commits
+        for (name, email, phone) in rows:
+            manager.execute(batch_writes.INSERT_PLAYER_SQL, (name, 5))
+            (player_id,) = manager.writer().execute("SELECT MAX(Player_Id) FROM Player").fetchone()
+            manager.execute(batch_writes.INSERT_EMAIL_SQL, (email,))
+            manager.execute(batch_writes.INSERT_PHONE_SQL, (phone,))
+            manager.execute(batch_writes.LINK_EMAIL_SQL, (player_id, email))
+            manager.execute(batch_writes.LINK_PHONE_SQL, (player_id, phone))
+
+
+def batched(manager, operation, rows):
+    con = manager.writer()
+    if operation == "stop":
+        batch_writes.stop_running_sessions(con, NOW_EPOCH, rows)
+    elif operation == "pay":
+        batch_writes.apply_payments(con, rows)
+    else:
+        batch_writes.import_players(con, rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Batched against one-at-a-time write throughput.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--rows", type=int, default=2000, help="Rows written per operation (default: 2000)")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        base_db = os.path.join(tmp_dir, "base.db")
+        counts = synth.build_from_args(base_db, args)
+        player_ids = [rng.randint(1, counts["player"]) for _ in range(args.rows)]
+        session_ids = start_sessions(base_db, player_ids, args.rows)
+        rows = {"stop": session_ids,
+                "pay": [(player_id, rng.randint(5, 100), NOW_EPOCH) for player_id in player_ids],
+                "import": [(f"Imported Player {i}", f"imported{i}@example.com", f"919-555-{i:05d}")
+                           for i in range(args.rows)]}
+
+        print(f"{counts['player']} players, {counts['session']} sessions, {args.rows} rows per operation")
+        print(f"{'':>8} {'one-at-a-time rows/s':>21} {'batched rows/s':>15} {'speedup':>8}")
+        for operation in ("stop", "pay", "import"):
+            rates = {}
+            for (label, write) in (("one", one_at_a_time), ("batched", batched)):
+                db_path = os.path.join(tmp_dir, f"{operation}_{label}.db")
+                shutil.copyfile(base_db, db_path)
+                manager = ConnectionManager(db_path)
+                manager.writer()  # Open and switch to WAL outside the timing
+                started = time.perf_counter()
+                write(manager, operation, rows[operation])
+                rates[label] = args.rows / (time.perf_counter() - started)
+                manager.close()
+            print(f"{operation:>8} {rates['one']:>21,.0f} {rates['batched']:>15,.0f} "
+                  f"{rates['batched'] / rates['one']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
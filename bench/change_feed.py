@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Compare the session list's two ways of finding out about writes:
+the 1 Hz data_version poll alone, which re-runs all of
+Session_Panel_List, and the change feed (client/changefeed.py), which
+re-fetches just the player written to at once, with the same poll
+still behind it for writers that do not publish.
+
+A stand-in publisher process starts and stops sessions at random
+intervals on a synthetic database, publishing each one.  Reported per
+way: the latency from each commit to the list having the change, and
+the CPU the listener burns over --idle seconds with nothing written.
+
+Usage:
+    python3 bench/change_feed.py
+    python3 bench/change_feed.py --writes 60 --idle 30 --players 2000 --sessions 200000
+"""
+import argparse
+import os
+import queue
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+
+import synth  # noqa: E402
+from changefeed import ChangeSubscriber, publish  # noqa: E402
+from dbconnection import ConnectionManager, ChangeDetector  # noqa: E402
+from db_ticks import TICK_QUERY  # noqa: E402
+
+PLAYER_SESSIONS_QUERY = TICK_QUERY + "WHERE Player_Id = ?"
+POLL_SECONDS = 1.0
+
+
+def run_publisher(db_path, feed_dir, writes, seed, gap=2.0, silent=False):
+    """
+    The stand-in writer: start or stop a session, commit, publish (unless
+    silent, like the Dart server), and print the commit time, writes times
+    over, up to gap seconds apart.
+    """
+    rng = random.Random(seed)
+    con = sqlite3.connect(db_path, timeout=5.0)
+    players = [row[0] for row in con.execute("SELECT Player_Id FROM Player")]
+    for _ in range(writes):
+        time.sleep(rng.uniform(0.1, gap))
+        running = con.execute("SELECT Session_Id, Player_Id FROM Session "
+                              "WHERE Stop_Epoch IS NULL ORDER BY random() LIMIT 1").fetchone()
+        with con:
+            if running and rng.random() < 0.5:
+                (session_id, player_id) = running
+                con.execute("UPDATE Session SET Stop_Epoch = ? WHERE Session_Id = ?",
+                            (int(time.time()), session_id))
+                event = "session_stopped"
+            else:
+                player_id = rng.choice(players)
+                con.execute("INSERT INTO Session (Player_Id, Start_Epoch) VALUES (?, ?)",
+                            (player_id, int(time.time())))
+                event = "session_started"
+        committed = time.time()
+        if not silent:
+            publish(event, feed_dir, player_id=player_id)
+        print(committed, flush=True)
+    con.close()
+
+
+def listen(db_path, feed_dir, push, seconds, refreshed):
+    """
+    Keep a session list up to date for seconds, the way the session app
+    does, appending the time each refresh finishes to refreshed.
+    Return the CPU seconds used.
+    """
+    manager = ConnectionManager(db_path)
+    detector = ChangeDetector(manager)
+    messages = queue.Queue()
+    subscriber = ChangeSubscriber(messages.put, feed_dir) if push else None
+    if subscriber:
+        subscriber.start()
+    detector.changed()
+    session_list = manager.fetch(TICK_QUERY)
+    cpu_started = time.process_time()
+    deadline = time.monotonic() + seconds
+    next_poll = time.monotonic() + POLL_SECONDS
+    try:
+        while (now := time.monotonic()) < deadline:
+            try:
+                message = messages.get(timeout=max(min(next_poll, deadline) - now, 0))
+            except queue.Empty:
+                next_poll += POLL_SECONDS
+                if detector.changed():
+                    session_list = manager.fetch(TICK_QUERY)
+                    refreshed.append(time.time())
+                continue
+            player_id = message["player_id"]
+            player_sessions = manager.fetch(PLAYER_SESSIONS_QUERY, (player_id,))
+            session_list = [session for session in session_list if session[1] != player_id]
+            session_list.extend(player_sessions)
+            refreshed.append(time.time())
+        return time.process_time() - cpu_started
+    finally:
+        if subscriber:
+            subscriber.stop()
+        manager.close()
+
+
+def latencies_ms(committed, refreshed):
+    """For each commit, the time until the first refresh after it."""
+    latencies = []
+    for commit in committed:
+        later = [done for done in refreshed if done >= commit]
+        if later:
+            latencies.append((min(later) - commit) * 1000)
+    return sorted(latencies)
+
+
+def publish_and_listen(db_path, feed_dir, push, writes, seed, gap=2.0, silent=False):
+    """
+    Run the stand-in publisher in its own process while listening;
+    return (commit times, refresh times).
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--publish", db_path,
+               "--feed-dir", feed_dir, "--writes", str(writes), "--seed", str(seed), "--gap", str(gap)]
+    if silent:
+        command.append("--silent")
+    publisher = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    refreshed = []
+    # Listen until the publisher is done, and a poll past it
+    listen(db_path, feed_dir, push, writes * gap + 2 * POLL_SECONDS, refreshed)
+    (out, _err) = publisher.communicate()
+    return [float(line) for line in out.split()], refreshed
+
+
+def measure(db_path, feed_dir, push, args):
+    """(latencies in ms, idle CPU ms per minute) for one way of listening."""
+    idle_cpu = listen(db_path, feed_dir, push, args.idle, [])
+    (committed, refreshed) = publish_and_listen(db_path, feed_dir, push, args.writes, args.seed)
+    return latencies_ms(committed, refreshed), idle_cpu * 1000 * 60 / args.idle
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare change-feed refreshes against 1 Hz polling.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--writes", type=int, default=30, help="Writes by the stand-in publisher (default: 30)")
+    ap.add_argument("--idle", type=float, default=20.0, help="Seconds of idle listening (default: 20)")
+    ap.add_argument("--publish", metavar="DB", help=argparse.SUPPRESS)
+    ap.add_argument("--feed-dir", help=argparse.SUPPRESS)
+    ap.add_argument("--gap", type=float, default=2.0, help=argparse.SUPPRESS)
+    ap.add_argument("--silent", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.publish:
+        run_publisher(args.publish, args.feed_dir, args.writes, args.seed, args.gap, args.silent)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        counts = synth.build_from_args(db_path, args)
+        feed_dir = os.path.join(tmp_dir, "feed")
+        print(f"{counts['player']} players, {counts['session']} sessions, "
+              f"{args.writes} writes by the stand-in publisher")
+        print(f"{'':>8} {'median ms':>10} {'p95 ms':>8} {'max ms':>8} {'missed':>7} {'idle CPU ms/min':>16}")
+        for (label, push) in (("poll", False), ("push", True)):
+            (latencies, idle_cpu) = measure(db_path, feed_dir, push, args)
+            print(f"{label:>8} {statistics.median(latencies):>10.1f} "
+                  f"{latencies[int(len(latencies) * 0.95)]:>8.1f} {latencies[-1]:>8.1f} "
+                  f"{args.writes - len(latencies):>7} {idle_cpu:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
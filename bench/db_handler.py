@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Benchmark server/local_db_handler.py, the stand-in for db_handler.php,
+on a synthetic database: the email_list named query and the whole-DB
+download, each fetched
+    cold     first request after a write (runs the query / snapshots the file)
+    cached   again, unchanged (served from the data_version-keyed cache)
+    gzip     again, with Accept-Encoding: gzip
+    304      again, with If-None-Match: the ETag already held
+with the bytes on the wire for each.  Also checks the contract: a bad
+key is 403, an unknown query name is 400, and an upload is refused.
+
+Usage:
+    python3 bench/db_handler.py
+    python3 bench/db_handler.py --players 10000 --sessions 200000 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+from run import timed  # noqa: E402
+from local_db_handler import make_server, DEFAULT_API_KEY  # noqa: E402
+
+
+def get(url, params, headers=None, data=None):
+    """(status, headers, body bytes on the wire) of one request."""
+    query = urllib.parse.urlencode(params)
+    if data is None:
+        request = urllib.request.Request(f"{url}?{query}", headers=headers or {})
+    else:
+        request = urllib.request.Request(url, data=query.encode(), headers=headers or {}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return (response.status, response.headers, response.read())
+    except urllib.error.HTTPError as e:
+        return (e.code, e.headers, e.read())
+
+
+def touch(db_path):
+    """Commit a change, so the next request misses the cache."""
+    con = sqlite3.connect(db_path)
+    with con:
+        (version,) = con.execute("PRAGMA user_version").fetchone()
+        con.execute(f"PRAGMA user_version = {version + 1}")
+    con.close()
+
+
+def bench(url, db_path, params, repeat):
+    """{case: (median ms, bytes)} for one endpoint."""
+    results = {}
+
+    def cold():
+        touch(db_path)
+        return get(url, params)
+    (_status, headers, body), timing = timed(cold, repeat)
+    results["cold"] = (timing["median_ms"], len(body))
+    etag = headers["ETag"]
+    plain = body
+
+    (_status, _headers, body), timing = timed(lambda: get(url, params), repeat)
+    results["cached"] = (timing["median_ms"], len(body))
+
+    (_status, headers, body), timing = timed(lambda: get(url, params, {"Accept-Encoding": "gzip"}),
+                                             repeat)
+    assert headers["Content-Encoding"] == "gzip" and gzip.decompress(body) == plain
+    results["gzip"] = (timing["median_ms"], len(body))
+
+    (status, _headers, body), timing = timed(lambda: get(url, params, {"If-None-Match": etag}), repeat)
+    assert status == 304, status
+    results["304"] = (timing["median_ms"], len(body))
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the local db_handler.php stand-in.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        counts = synth.build_from_args(db_path, args)
+        server = make_server(db_path, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://%s:%d/db_handler.php" % server.server_address[:2]
+        try:
+            assert get(url, {"apiKey": "wrong", "action": "query", "query": "email_list"})[0] == 403
+            (status, _headers, body) = get(url, {"apiKey": DEFAULT_API_KEY, "action": "query",
+                                                 "query": "Player"})
+            assert status == 400 and json.loads(body)["allowed"] == ["email_list"]
+            assert get(url, {"apiKey": DEFAULT_API_KEY}, data=True)[0] == 405
+            (status, _headers, body) = get(url, {"apiKey": DEFAULT_API_KEY, "action": "query",
+                                                 "query": "email_list"}, data=True)
+            assert status == 200 and len(json.loads(body)) == counts["player"]
+
+            print(f"{counts['player']} players, {counts['session']} sessions, "
+                  f"{os.path.getsize(db_path) / 1e6:.1f} MB database")
+            print(f"{'':>12} {'case':>7} {'median ms':>10} {'bytes':>10}")
+            for (label, params) in (("email_list", {"apiKey": DEFAULT_API_KEY, "action": "query",
+                                                    "query": "email_list"}),
+                                    ("whole DB", {"apiKey": DEFAULT_API_KEY})):
+                for (case, (ms, size)) in bench(url, db_path, params, args.repeat).items():
+                    print(f"{label:>12} {case:>7} {ms:>10.2f} {size:>10}")
+            print(f"cache: {server.database.hits} hits, {server.database.misses} misses")
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.database.close()
+
+
+if __name__ == "__main__":
+    main()
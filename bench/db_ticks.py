@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Micro-benchmark of the session app's once-a-second database tick:
+a fresh sqlite3.connect per call (the old fetch_data_from_db)
+against the long-lived ConnectionManager.
+
+Runs on a temporary copy of the database, since the manager
+switches the file it opens to WAL journal mode.
+
+Usage:
+    python3 bench/db_ticks.py                          # server/CarolinaCardClub.db, 10k ticks
+    python3 bench/db_ticks.py --db client/assets/CarolinaCardClub.db --ticks 2000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+
+from dbconnection import ConnectionManager  # noqa: E402
+
+DEFAULT_DB = os.path.join(HERE, "..", "server", "CarolinaCardClub.db")
+
+TICK_QUERY = """
+SELECT Session_Id, Player_Id, Name, Start_Epoch, Stop_Epoch,
+       Duration_In_Seconds, Amount, Balance, Rate
+FROM Session_Panel_List
+"""
+
+
+def connect_per_tick(db_path, query):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.cursor().execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def time_ticks(tick, ticks):
+    timings = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        tick()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label, timings):
+    timings_us = sorted(t * 1e6 for t in timings)
+    p99 = timings_us[min(len(timings_us) - 1, int(len(timings_us) * 0.99))]
+    print(f"{label:>10} {statistics.mean(timings_us):>10.1f} {statistics.median(timings_us):>10.1f} "
+          f"{p99:>10.1f} {sum(timings):>9.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark per-call connect against a persistent connection.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"Database to copy and poll (default: {DEFAULT_DB})")
+    ap.add_argument("--ticks", type=int, default=10000, help="Ticks per variant (default: 10000)")
+    ap.add_argument("--query", default=TICK_QUERY, help="Query run on every tick")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        shutil.copyfile(args.db, db_path)
+
+        old = time_ticks(lambda: connect_per_tick(db_path, args.query), args.ticks)
+
+        manager = ConnectionManager(db_path)
+        try:
+            new = time_ticks(lambda: manager.fetch(args.query), args.ticks)
+        finally:
+            manager.close()
+
+    print(f"{args.ticks} ticks of the Session_Panel_List query")
+    print(f"{'':>10} {'mean us':>10} {'median us':>10} {'p99 us':>10} {'total s':>9}")
+    report("connect", old)
+    report("manager", new)
+    print(f"speedup (mean): {statistics.mean(old) / statistics.mean(new):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
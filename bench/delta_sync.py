@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Bytes on the wire for server/delta_sync.py against a whole-file copy
+(what bin/push_db and bin/pull_db move), between two local copies of a
+synthetic database, after a club night's worth of edits on the source:
+--edits sessions started and stopped with payments, a new player with
+an email and phone, a changed email address, a session's stop moved and
+a deleted payment.  Both copies have the balance ledger and the
+Email_Recipient table installed, kept by triggers, and each case checks
+that the synced tables then match row for row and that the target's
+ledger and recipient list still match a recompute:
+    night       the edits, pulled into a copy taken before them
+    again       the same sync again: nothing differs
+    conflict    a write on the target and more edits on the source in the
+                same buckets: refused, nothing written; then --force
+    push        the edits pushed, with the target on the far side
+    fresh       an empty target: every row sent
+
+Usage:
+    python3 bench/delta_sync.py
+    python3 bench/delta_sync.py --players 2000 --sessions 300000 --edits 200
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import delta_sync  # noqa: E402
+import balance_ledger  # noqa: E402
+import recipient_list  # noqa: E402
+
+NIGHT_EPOCH = 1900000000
+
+
+def club_night(db_path, rng, n_edits):
+    """A night's edits: sessions with payments, a new player, an email changed, a payment deleted."""
+    con = sqlite3.connect(db_path)
+    with con:
+        (players,) = con.execute("SELECT MAX(Player_Id) FROM Player").fetchone()
+        for i in range(n_edits):
+            player_id = rng.randint(1, players)
+            con.execute("INSERT INTO Session (Player_Id, Start_Epoch, Stop_Epoch) VALUES (?, ?, ?)",
+                        (player_id, NIGHT_EPOCH + 60 * i, NIGHT_EPOCH + 60 * i + 4 * 3600))
+            con.execute("INSERT INTO Payment (Player_Id, Amount, Epoch) VALUES (?, ?, ?)",
+                        (player_id, 20, NIGHT_EPOCH + 60 * i))
+        con.execute("INSERT INTO Player (Name, Player_Category_Id) VALUES ('New Player', 1)")
+        con.execute("INSERT INTO Email_Address (Address) VALUES (?)", (f"new{rng.random()}@example.com",))
+        con.execute("INSERT INTO Phone_Number (Number) VALUES (?)", (f"919-555-{rng.randint(0, 99999):05d}",))
+        con.execute("INSERT INTO Player_Email SELECT MAX(Player_Id), (SELECT MAX(EmailAddress_Id) "
+                    "FROM Email_Address) FROM Player")
+        con.execute("INSERT INTO Player_Phone SELECT MAX(Player_Id), (SELECT MAX(PhoneNumber_Id) "
+                    "FROM Phone_Number) FROM Player")
+        con.execute("UPDATE Email_Address SET Address = 'changed' || Address WHERE EmailAddress_Id = ?",
+                    (rng.randint(1, players),))
+        con.execute("UPDATE Session SET Stop_Epoch = Stop_Epoch + 3600 WHERE Session_Id = ?",
+                    (rng.randint(1, 100),))
+        con.execute("DELETE FROM Payment WHERE Payment_Id = (SELECT MIN(Payment_Id) FROM Payment)")
+    con.close()
+
+
+def install_maintained_tables(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        balance_ledger.install(con)
+        recipient_list.install(con)
+    finally:
+        con.close()
+
+
+def same_rows(a_path, b_path):
+    """The synced tables match, and b's trigger-kept tables still match a recompute."""
+    a = sqlite3.connect(a_path)
+    b = sqlite3.connect(b_path)
+    try:
+        for (table, key) in delta_sync.SYNC_TABLES.items():
+            query = f'SELECT * FROM "{table}" ORDER BY {", ".join(key)}'
+            assert a.execute(query).fetchall() == b.execute(query).fetchall(), table
+        drift = balance_ledger.verify(b)
+        assert not drift, f"balance ledger drifted: {drift[:3]}"
+        drift = recipient_list.verify(b)
+        assert not drift, f"Email_Recipient drifted: {drift[:3]}"
+    finally:
+        a.close()
+        b.close()
+
+
+def run(source_path, target_path, remote="source", force=False):
+    """(report, loopback, ms) of one sync, with the base kept as the CLI keeps it."""
+    source = delta_sync.Endpoint(source_path)
+    target = delta_sync.Endpoint(target_path, writable=True)
+    loopback = delta_sync.Loopback(source if remote == "source" else target)
+    sides = (loopback, target) if remote == "source" else (source, loopback)
+    base = delta_sync.load_base(target_path, source_path)
+    started = time.perf_counter()
+    try:
+        report = delta_sync.sync(*sides, base=base, force=force)
+        ms = (time.perf_counter() - started) * 1000
+        delta_sync.save_base(target_path, source_path, {
+            table: {str(bucket): leaf for (bucket, leaf) in source.leaves(table).items()}
+            for table in delta_sync.SYNC_TABLES})
+    finally:
+        source.close()
+        target.close()
+    return (report, loopback, ms)
+
+
+def show(label, report, loopback, ms):
+    changed = sum(sum(info["applied"]) for info in report["tables"].values())
+    buckets = sum(info["buckets"] for info in report["tables"].values())
+    full = report["source_bytes"]
+    wire = loopback.sent + loopback.received
+    print(f"{label:>9} {buckets:>8} {changed:>8} {loopback.round_trips:>6} {wire:>11,} "
+          f"{full:>12,} {wire / full:>7.2%} {ms:>8.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Delta sync bytes against a whole-file copy.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--edits", type=int, default=60, help="Sessions and payments added per night (default: 60)")
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        source = os.path.join(tmp_dir, "source.db")
+        target = os.path.join(tmp_dir, "target.db")
+        counts = synth.build_from_args(source, args)
+        install_maintained_tables(source)
+        shutil.copyfile(source, target)
+        print(f"{counts['player']} players, {counts['session']} sessions, {counts['payment']} payments")
+        print(f"{'case':>9} {'buckets':>8} {'rows':>8} {'trips':>6} {'wire bytes':>11} "
+              f"{'full copy':>12} {'ratio':>7} {'ms':>8}")
+
+        club_night(source, rng, args.edits)
+        show("night", *run(source, target))
+        same_rows(source, target)
+        show("again", *run(source, target))
+
+        con = sqlite3.connect(target)
+        with con:
+            con.execute("UPDATE Session SET Stop_Epoch = Stop_Epoch + 60 WHERE Session_Id = "
+                        "(SELECT MAX(Session_Id) FROM Session)")
+        con.close()
+        club_night(source, rng, args.edits)
+        try:
+            run(source, target)
+            raise AssertionError("conflict not detected")
+        except delta_sync.SyncError as e:
+            print(f"{'conflict':>9} refused: {str(e)[:80]}")
+        show("--force", *run(source, target, force=True))
+        same_rows(source, target)
+
+        club_night(source, rng, args.edits)
+        show("push", *run(source, target, remote="target"))
+        same_rows(source, target)
+
+        empty = os.path.join(tmp_dir, "empty.db")
+        synth.build(empty, players=0, sessions=0, payments=0)
+        install_maintained_tables(empty)
+        show("fresh", *run(source, empty))
+        same_rows(source, empty)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Latency of email_list_to_clipboard.py choosing its rows, hedged (remote
+and local at once, the remote winning within REMOTE_DEADLINE) against
+the old sequential path (the remote, with up to REQUEST_TIMEOUT, then
+the local DB), with the remote stand-in (server/local_db_handler.py)
+    up          answering at once
+    slow        answering after --delay seconds
+    hung        accepting connections but never answering
+    down        refusing connections
+    erroring    answering 403 (a wrong key)
+and the worst case of each.  Also times building the clipboard text,
+old string concatenation against the joined list, at --rows rows.
+
+Usage:
+    python3 bench/email_list_hedge.py
+    python3 bench/email_list_hedge.py --delay 5 --repeat 1 --rows 200000
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import local_db_handler  # noqa: E402
+import email_list_to_clipboard as email_list  # noqa: E402
+from run import timed  # noqa: E402
+
+
+class SlowHandler(local_db_handler.DbHandler):
+    def handle_request(self, params):
+        time.sleep(self.server.delay)
+        super().handle_request(params)
+
+
+def serve(db_path, delay=0.0):
+    server = local_db_handler.make_server(db_path, port=0, quiet=True)
+    server.RequestHandlerClass = SlowHandler
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return (server, "http://%s:%d/db_handler.php" % server.server_address[:2])
+
+
+def hung_url():
+    """A port that completes connections (in the backlog) but never answers."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(64)
+    return (sock, "http://%s:%d/db_handler.php" % sock.getsockname())
+
+
+def down_url():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    (host, port) = sock.getsockname()
+    sock.close()
+    return "http://%s:%d/db_handler.php" % (host, port)
+
+
+def sequential(db_path):
+    """The old choice: the remote, then (on any failure) the local copy."""
+    try:
+        return (email_list.fetch_remote_recipients(), "remote")
+    except Exception:
+        return (email_list.fetch_local_recipients(db_path), "local")
+
+
+def hedged(db_path):
+    (rows, source, _how) = email_list.choose_recipients(
+        local_fetch=lambda: email_list.fetch_local_recipients(db_path))
+    return (rows, source)
+
+
+def concatenated(rows):
+    """The old build: one += per address."""
+    email_addresses = ''
+    for row in rows:
+        if row["PhoneNumbers"] != '[]' and row["Flag"] is None:
+            for EmailAddress in json.loads(row["EmailAddresses"]):
+                email_addresses += (row["Name"] + " <" + EmailAddress + ">\n")
+    return email_addresses
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Hedged against sequential email list fetch latency.")
+    ap.add_argument("--delay", type=float, default=3.0, help="The slow remote's delay, seconds (default: 3)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--rows", type=int, default=100000, help="Rows for the build timing (default: 100000)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        synth.build(db_path)
+        (up, up_url) = serve(db_path)
+        (slow, slow_url) = serve(db_path, args.delay)
+        (hung, hung_at) = hung_url()
+        cases = (("up", up_url, email_list.API_KEY), ("slow", slow_url, email_list.API_KEY),
+                 ("hung", hung_at, email_list.API_KEY), ("down", down_url(), email_list.API_KEY),
+                 ("erroring", up_url, "wrong"))
+        print(f"REMOTE_DEADLINE {email_list.REMOTE_DEADLINE:g}s, REQUEST_TIMEOUT {email_list.REQUEST_TIMEOUT}s, "
+              f"slow remote {args.delay:g}s")
+        print(f"{'remote':>9} {'path':>11} {'source':>7} {'median ms':>10} {'max ms':>9}")
+        worst = {}
+        try:
+            for (label, url, key) in cases:
+                (email_list.URL, email_list.API_KEY) = (url, key)
+                for (path, choose) in (("sequential", sequential), ("hedged", hedged)):
+                    ((rows, source), timing) = timed(lambda: choose(db_path), args.repeat)
+                    assert rows, label
+                    worst[path] = max(worst.get(path, 0), timing["max_ms"])
+                    print(f"{label:>9} {path:>11} {source:>7} {timing['median_ms']:>10.1f} "
+                          f"{timing['max_ms']:>9.1f}")
+        finally:
+            for server in (up, slow):
+                server.shutdown()
+                server.server_close()
+                server.database.close()
+            hung.close()
+        print("worst case: " + ", ".join(f"{path} {ms / 1000:.2f}s" for (path, ms) in worst.items()))
+
+    rows = [{"Name": f"Player {i}", "EmailAddresses": json.dumps([f"player{i}@example.com"]),
+             "PhoneNumbers": '["919-555-0100"]', "Flag": None} for i in range(args.rows)]
+    (old_text, old_timing) = timed(lambda: concatenated(rows), args.repeat)
+    ((new_text, _count), new_timing) = timed(
+        lambda: email_list.build_list(email_list.recipient_pairs(rows)), args.repeat)
+    assert old_text == new_text
+    print(f"build, {args.rows} rows: concatenation {old_timing['median_ms']:.1f} ms, "
+          f"join {new_timing['median_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Peak memory and time of export_recipients as the list grows: the old
+build-then-json.dump path (every row, three lists and the joined
+bcc_line in memory) against the streaming export() pipeline, writing
+JSON, NDJSON and CSV.
+
+Peak memory is Python's own allocations (tracemalloc), so SQLite's page
+cache is not counted on either side.
+
+Usage:
+    python3 bench/export_stream.py                    # 150 to 100k addresses
+    python3 bench/export_stream.py --addresses 1000 50000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import export_recipients  # noqa: E402
+
+# synth gives about this many listed addresses per player (most have one
+# email, some two or none; players without a phone or with a flag are left out)
+ADDRESSES_PER_PLAYER = 0.9
+
+
+def old_export(db_path, out_path):
+    """export_recipients before streaming: fetchall, build the lists, json.dump."""
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = con.cursor().execute("SELECT * FROM Email_List;").fetchall()
+    finally:
+        con.close()
+    recipients = []
+    emails = []
+    bcc_parts = []
+    for (name, email_addresses, phone_numbers, _super_bowl, flag) in rows:
+        if phone_numbers == "[]" or flag is not None:
+            continue
+        for addr in json.loads(email_addresses):
+            recipients.append({"name": name, "email": addr})
+            emails.append(addr)
+            bcc_parts.append(f"{name} <{addr}>")
+    data = {"generated_at": "", "source_db": os.path.abspath(db_path), "count": len(emails),
+            "emails": emails, "recipients": recipients,
+            "bcc_line": "\n".join(bcc_parts) + ("\n" if bcc_parts else "")}
+    with open(out_path, "w") as fh:
+        json.dump(data, fh, indent=2)
+    return len(emails)
+
+
+def measure(fn):
+    """(result, peak KiB, ms) of fn()."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        (_current, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (result, peak / 1024, elapsed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Peak memory of export_recipients, streaming and not.")
+    ap.add_argument("--addresses", type=int, nargs="+", default=[150, 1000, 10000, 100000],
+                    help="Approximate listed addresses per run (default: 150 1000 10000 100000)")
+    args = ap.parse_args()
+
+    print(f"{'addresses':>9} {'path':>14} {'peak KiB':>9} {'ms':>8}")
+    for target in args.addresses:
+        with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+            db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+            players = max(int(target / ADDRESSES_PER_PLAYER), 1)
+            synth.build(db_path, players=players, weeks=10, sessions=players, payments=players // 2,
+                        running=0)
+            out = os.path.join(tmp_dir, "out")
+            (count, peak, ms) = measure(lambda: old_export(db_path, out + ".old.json"))
+            print(f"{count:>9} {'old json.dump':>14} {peak:>9.0f} {ms:>8.1f}")
+            for fmt in export_recipients.FORMATS:
+                ((count, _written), peak, ms) = measure(
+                    lambda: export_recipients.export(db_path, f"{out}.{fmt}", fmt))
+                print(f"{count:>9} {'stream ' + fmt:>14} {peak:>9.0f} {ms:>8.1f}")
+            ((count, written), peak, ms) = measure(
+                lambda: export_recipients.export(db_path, f"{out}.json", "json", skip_unchanged=True))
+            assert not written
+            print(f"{count:>9} {'unchanged json':>14} {peak:>9.0f} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
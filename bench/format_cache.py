@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Profile formatting the session list's rows once a tick: the uncached
+session_row the session app used to have (fromtimestamp + strftime
+twice and locale.currency twice per row, every row, every tick)
+against client/sessionformat.py's memoized one.
+
+Without a display: only the formatting is timed, not the treeview.
+Where the en_US.UTF-8 locale is not installed, locale.localeconv is
+given en_US's conventions, so locale.currency does the same work.
+
+Usage:
+    python3 bench/format_cache.py                    # 500 rows, 600 ticks
+    python3 bench/format_cache.py --rows 5000 --ticks 120 --profile
+"""
+import argparse
+import cProfile
+import datetime
+import locale
+import math
+import os
+import pstats
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+
+import sessionformat  # noqa: E402
+
+START_EPOCH = 1760000000
+
+EN_US_CONVENTIONS = {
+    "int_curr_symbol": "USD ", "currency_symbol": "$", "mon_decimal_point": ".",
+    "mon_thousands_sep": ",", "mon_grouping": [3, 3, 0], "positive_sign": "", "negative_sign": "-",
+    "int_frac_digits": 2, "frac_digits": 2, "p_cs_precedes": 1, "p_sep_by_space": 0,
+    "n_cs_precedes": 1, "n_sep_by_space": 0, "p_sign_posn": 1, "n_sign_posn": 1,
+    "decimal_point": ".", "thousands_sep": ",", "grouping": [3, 3, 0],
+}
+
+
+def use_en_us():
+    """Set the session app's locale, or stand its conventions in for it; say which."""
+    try:
+        locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
+        return "en_US.UTF-8"
+    except locale.Error:
+        locale.localeconv = lambda: dict(EN_US_CONVENTIONS)
+        return "en_US conventions via localeconv (en_US.UTF-8 not installed)"
+
+
+def uncached_local_time(epoch):
+    return datetime.datetime.fromtimestamp(epoch).strftime('%-m/%d %H:%M')
+
+
+def uncached_session_row(session, now_epoch):
+    """
+    session.py's session_row before the formatting cache, with a running
+    session's amount rounded half up, as sessionengine.session_amount does.
+    """
+    (session_id, _player_id, player_name,
+     session_start_epoch, session_stop_epoch,
+     duration, amount, balance, rate) = session
+    if session_stop_epoch is not None:
+        tags=("courier",)
+        effective_session_stop_epoch = session_stop_epoch
+    else:
+        tags=("courier", "green_item")
+        effective_session_stop_epoch = now_epoch
+    if duration is None:
+        duration = max(effective_session_stop_epoch - session_start_epoch, 0)
+    if amount is None:
+        amount = math.floor(duration * (rate or 0) / 3600 + 0.5)
+    values=(player_name,
+            uncached_local_time(session_start_epoch),
+            uncached_local_time(effective_session_stop_epoch),
+            f"{duration//3600}h{((duration%3600)//60):02d}m".rjust(8),
+            locale.currency(amount, grouping=True).rjust(8),
+            locale.currency(balance, grouping=True).rjust(8))
+    return (session_id, values, tags)
+
+
+def synthetic_sessions(n_sessions, running_fraction=0.1):
+    """Session_Panel_List-shaped rows, the first running_fraction of them running."""
+    n_running = int(n_sessions * running_fraction)
+    rows = []
+    for i in range(n_sessions):
+        start = START_EPOCH - 3600 * (i // 20) - 60 * (i % 20)
+        if i < n_running:
+            rows.append((i + 1, i % 250 + 1, f"Player {i % 250 + 1}", start, None,
+                         None, None, -20 - i % 7, 5))
+        else:
+            stop = start + 3 * 3600
+            rows.append((i + 1, i % 250 + 1, f"Player {i % 250 + 1}", start, stop,
+                         stop - start, 15, -20 - i % 7, 5))
+    return rows
+
+
+def time_ticks(format_row, rows, ticks):
+    """Milliseconds to format every row, for each of ticks one-second ticks."""
+    timings = []
+    for tick in range(ticks):
+        now_epoch = START_EPOCH + tick
+        started = time.perf_counter()
+        [format_row(row, now_epoch) for row in rows]
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Profile the session list's row formatting, cached and not.")
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--ticks", type=int, default=600, help="Ticks to time (default: 600, ten minutes)")
+    ap.add_argument("--profile", action="store_true", help="Also print the top cProfile entries")
+    args = ap.parse_args()
+
+    print(f"locale: {use_en_us()}")
+    rows = synthetic_sessions(args.rows)
+    for row in rows[:50]:
+        assert uncached_session_row(row, START_EPOCH) == sessionformat.session_row(row, START_EPOCH), row
+    sessionformat.clear()
+
+    print(f"{args.rows} rows, {args.ticks} ticks")
+    print(f"{'':>9} {'median ms':>10} {'p95 ms':>8} {'max ms':>8}")
+    for (label, format_row) in (("uncached", uncached_session_row),
+                                ("cached", sessionformat.session_row)):
+        timings = time_ticks(format_row, rows, args.ticks)
+        print(f"{label:>9} {statistics.median(timings):>10.3f} "
+              f"{timings[int(len(timings) * 0.95)]:>8.3f} {timings[-1]:>8.3f}")
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.runcall(time_ticks, format_row, rows, min(args.ticks, 60))
+            pstats.Stats(profiler).sort_stats("tottime").print_stats(8)
+    for (name, info) in sessionformat.cache_info().items():
+        print(f"{name:>22}: {info.hits} hits, {info.misses} misses, {info.currsize} held")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Benchmark every view before and after installing the covering indexes
+in server/indexes.sql, on a synthetic database.
+
+Usage:
+    python3 bench/indexes.py
+    python3 bench/indexes.py --players 10000 --sessions 1000000 --payments 100000 \\
+        --rate-intervals 6 --repeat 3
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import index_advisor  # noqa: E402
+import synth  # noqa: E402
+from run import time_views  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the views with and without the covering indexes.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        plain_db = os.path.join(tmp_dir, "plain.db")
+        counts = synth.build_from_args(plain_db, args)
+        indexed_db = os.path.join(tmp_dir, "indexed.db")
+        shutil.copyfile(plain_db, indexed_db)
+        con = sqlite3.connect(indexed_db)
+        try:
+            index_advisor.install(con)
+        finally:
+            con.close()
+
+        print(", ".join(f"{n} {what}" for (what, n) in counts.items()))
+        before = time_views(plain_db, args.repeat)
+        after = time_views(indexed_db, args.repeat)
+
+    print(f"{'median ms':<40} {'plain':>9} {'indexed':>9} {'speedup':>8}")
+    for name in before:
+        (plain_ms, indexed_ms) = (before[name]["median_ms"], after[name]["median_ms"])
+        print(f"{name:<40} {plain_ms:>9.2f} {indexed_ms:>9.2f} "
+              f"{plain_ms / indexed_ms if indexed_ms else float('inf'):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
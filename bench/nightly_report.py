@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+server/nightly_report.py over whole synthetic histories (bench/synth.py,
+--per-night sessions a night) of more and more weeks, with the sessions
+spread over --tables PokerTables and indexes.sql installed: the time of
+the single sweep per session should stay flat as the history grows.
+
+With fewer --players than sessions a night, synth.build draws each
+night's players with replacement, so some play two sessions a night,
+overlapping or not, and the peak counts players, not sessions.
+
+It is checked against SQL: each night's sessions, hours and revenue
+against Session_Amount_List grouped by night, its payments against
+Payment grouped by night, and its peak concurrent players against a
+self-join counting, at every session's start, the distinct players in
+play (also timed, as the way to get a peak without a sweep).
+
+Usage:
+    python3 bench/nightly_report.py
+    python3 bench/nightly_report.py --weeks 52 520 --per-night 120 --players 100 --tables 12
+"""
+import argparse
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import index_advisor  # noqa: E402
+import nightly_report  # noqa: E402
+from run import timed  # noqa: E402
+
+ALL_TIME = (0, 1 << 62)
+
+
+def night_sql(epoch):
+    """The night an epoch column falls in, as night_of works it out."""
+    return f"date({epoch}, 'unixepoch', 'localtime', '-{nightly_report.NIGHT_START_HOUR} hours')"
+
+
+TOTALS_SQL = f"""
+SELECT {night_sql('Session_Start_Epoch')} AS Night, COUNT(*), SUM(Duration_In_Seconds), SUM(Amount)
+FROM Session_Amount_List GROUP BY Night
+"""
+PAYMENTS_SQL = f"SELECT {night_sql('Epoch')} AS Night, SUM(Amount) FROM Payment GROUP BY Night"
+
+# At each start, the players of the same night in play: started by then, not yet stopped
+PEAK_SQL = f"""
+SELECT Night, MAX(In_Play) FROM (
+    SELECT {night_sql('s.Start_Epoch')} AS Night,
+           (SELECT COUNT(DISTINCT o.Player_Id) FROM Session AS o
+            WHERE o.Start_Epoch <= s.Start_Epoch AND o.Start_Epoch > s.Start_Epoch - 86400
+              AND o.Stop_Epoch > s.Start_Epoch
+              AND {night_sql('o.Start_Epoch')} = {night_sql('s.Start_Epoch')}) AS In_Play
+    FROM Session AS s WHERE s.Stop_Epoch > s.Start_Epoch)
+GROUP BY Night
+"""
+
+
+def seat_sessions(con, n_tables):
+    """Put each session at one of n_tables PokerTables of 10 seats."""
+    with con:
+        con.executemany("INSERT INTO PokerTable (PokerTable_Id, Name, Capacity) VALUES (?, ?, 10)",
+                        ((i, f"Table {i}") for i in range(1, n_tables + 1)))
+        con.execute("UPDATE Session SET PokerTable_Id = Session_Id % ? + 1", (n_tables,))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the nightly report's sweep.")
+    ap.add_argument("--weeks", type=int, nargs="+", default=[52, 520, 5200])
+    ap.add_argument("--per-night", type=int, default=40, help="Sessions a night (default: 40)")
+    ap.add_argument("--players", type=int, default=30, help="Players (default: 30)")
+    ap.add_argument("--tables", type=int, default=4, help="PokerTables (default: 4)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    failed = False
+    print(f"{'nights':>7} {'sessions':>9} {'report ms':>10} {'us/session':>11} {'SQL peak ms':>12}")
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        for weeks in args.weeks:
+            db_path = os.path.join(tmp_dir, f"weeks{weeks}.db")
+            counts = synth.build(db_path, players=args.players, weeks=weeks,
+                                 sessions=weeks * args.per_night, payments=weeks * args.per_night // 2,
+                                 running=0)
+            con = sqlite3.connect(db_path)
+            seat_sessions(con, args.tables)
+            index_advisor.install(con)
+            (since, until) = ALL_TIME
+
+            def report():
+                out = io.StringIO()
+                return (nightly_report.write_csv(nightly_report.nights(con, since, until, now=0), {}, out),
+                        out.getvalue())
+            ((n_nights, _text), report_timing) = timed(report, args.repeat)
+            (sql_peaks, peak_timing) = timed(lambda: dict(con.execute(PEAK_SQL).fetchall()), args.repeat)
+            print(f"{n_nights:>7} {counts['session']:>9} {report_timing['median_ms']:>10.1f} "
+                  f"{report_timing['median_ms'] * 1000 / counts['session']:>11.2f} "
+                  f"{peak_timing['median_ms']:>12.1f}")
+
+            totals = {night: (sessions, seconds, amount)
+                      for (night, sessions, seconds, amount) in con.execute(TOTALS_SQL)}
+            payments = dict(con.execute(PAYMENTS_SQL).fetchall())
+            mine = list(nightly_report.nights(con, since, until, now=0))
+            differences = [night.night for night in mine
+                           if totals.get(night.night.isoformat()) != (night.sessions, night.seconds, night.revenue)
+                           or sql_peaks.get(night.night.isoformat()) != night.peak
+                           or payments.get(night.night.isoformat(), 0) != night.payments]
+            if len(mine) != len(totals) or differences:
+                print(f"FAILED: {len(differences)} of {len(mine)} nights differ from SQL, e.g. {differences[:3]}")
+                failed = True
+            con.close()
+
+        night = mine[-1]
+        print(f"last night, {night.night}: " + ", ".join(f"{key} {value}" for (key, value) in night.row().items()
+                                                         if key != "Night"))
+        for row in night.table_rows({i: (f"Table {i}", 10) for i in range(1, args.tables + 1)}):
+            print(f"  {row['PokerTable']}: {row['Sessions']} sessions, {row['Seat_Hours']} seat-hours, "
+                  f"peak {row['Peak_Seats']}, utilization {row['Utilization']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    code = main()
+    print(f"({time.perf_counter() - started:.0f}s)")
+    sys.exit(code)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Benchmark the type-ahead player search (client/playerindex.py):
+building the index, and narrowing it one keystroke at a time,
+against a linear scan of every player's names.
+
+Usage:
+    python3 bench/player_index.py                  # 250, 2000 and 20000 players
+    python3 bench/player_index.py --sizes 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+
+from playerindex import PlayerIndex, search_terms  # noqa: E402
+
+SYLLABLES = ["an", "ber", "car", "dan", "el", "fin", "gar", "hol", "is", "jo", "kin", "lee",
+             "mar", "ner", "o", "pat", "quin", "ro", "sam", "ter", "u", "vin", "wil", "yor", "zed"]
+
+
+def synthetic_players(n_players, seed=1):
+    """(rows, names) shaped like PlayerNameSelector's: rows in display order."""
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+
+    rows = []
+    names = {}
+    for player_id in range(1, n_players + 1):
+        name = f"{word()} {word()}"
+        nickname = word() if rng.random() < 0.1 else None
+        rows.append((player_id, nickname or name, rng.randint(-50, 50)))
+        names[player_id] = (name, nickname)
+    return (rows, names)
+
+
+def linear_matches(rows, names, prefix):
+    """What the index answers, by checking every player."""
+    prefix = prefix.casefold()
+    return [row for row in rows
+            if any(term.startswith(prefix) for term in search_terms(row[1], *names[row[0]]))]
+
+
+def keystroke_prefixes(rows, rng, n_names):
+    """Every prefix typed on the way to n_names randomly chosen names."""
+    prefixes = []
+    for (_player_id, name, _balance) in rng.sample(rows, n_names):
+        prefixes.extend(name[:i] for i in range(1, len(name) + 1))
+    return prefixes
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the type-ahead player search.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[250, 2000, 20000])
+    ap.add_argument("--names", type=int, default=20, help="Names typed per size (default: 20)")
+    args = ap.parse_args()
+
+    print(f"{'players':>8} {'build ms':>9} {'keystroke ms':>13} {'p95 ms':>7} {'max ms':>7} "
+          f"{'linear ms':>10}")
+    for n_players in args.sizes:
+        (rows, names) = synthetic_players(n_players)
+        started = time.perf_counter()
+        index = PlayerIndex(rows, names)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        prefixes = keystroke_prefixes(rows, random.Random(2), args.names)
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.matching(prefix)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        linear = []
+        for prefix in prefixes[:20]:
+            started = time.perf_counter()
+            expected = linear_matches(rows, names, prefix)
+            linear.append((time.perf_counter() - started) * 1000)
+            assert index.matching(prefix) == expected, prefix
+
+        print(f"{n_players:>8} {build_ms:>9.1f} {statistics.median(timings):>13.3f} "
+              f"{timings[int(len(timings) * 0.95)]:>7.3f} {timings[-1]:>7.3f} "
+              f"{statistics.median(linear):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
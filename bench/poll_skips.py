@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Count how many Session_Panel_List executions the session app's 1 Hz poll
+makes in a simulated hour, with and without the PRAGMA data_version check.
+
+Another connection (standing in for the Dart server and the desk) commits
+--writes-per-hour session starts at random seconds during the hour.
+
+Usage:
+    python3 bench/poll_skips.py
+    python3 bench/poll_skips.py --writes-per-hour 120
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+
+from dbconnection import ConnectionManager, ChangeDetector  # noqa: E402
+from db_ticks import DEFAULT_DB, TICK_QUERY  # noqa: E402
+
+SECONDS_PER_HOUR = 3600
+
+
+def simulate_hour(db_path, write_seconds, detect_changes):
+    """Return (view executions, wall seconds) for one simulated hour of ticks."""
+    manager = ConnectionManager(db_path)
+    detector = ChangeDetector(manager)
+    other_writer = sqlite3.connect(db_path, timeout=5.0)
+    executions = 0
+    started = time.perf_counter()
+    try:
+        for second in range(SECONDS_PER_HOUR):
+            if second in write_seconds:
+                with other_writer:
+                    other_writer.execute("INSERT INTO Session (Player_Id, Start_Epoch) VALUES (1, ?)",
+                                         (1760000000 + second,))
+            if not detect_changes or detector.changed():
+                manager.fetch(TICK_QUERY)
+                executions += 1
+    finally:
+        other_writer.close()
+        manager.close()
+    return executions, time.perf_counter() - started
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Count view executions saved by data_version polling.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"Database to copy and poll (default: {DEFAULT_DB})")
+    ap.add_argument("--writes-per-hour", type=int, default=30,
+                    help="Commits by another connection during the hour (default: 30)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    write_seconds = set(random.Random(args.seed).sample(range(SECONDS_PER_HOUR), args.writes_per_hour))
+    print(f"one hour of 1 Hz polling, {args.writes_per_hour} commits by another connection")
+    print(f"{'':>14} {'executions':>10} {'wall s':>8}")
+    results = {}
+    for detect_changes in (False, True):
+        with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+            db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+            shutil.copyfile(args.db, db_path)
+            executions, seconds = simulate_hour(db_path, write_seconds, detect_changes)
+        label = "data_version" if detect_changes else "every tick"
+        results[label] = executions
+        print(f"{label:>14} {executions:>10} {seconds:>8.2f}")
+    print(f"saved {results['every tick'] - results['data_version']} view executions per hour")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Exercise server/pull_db.py against server/local_db_handler.py, the
+http.server stand-in for db_handler.php, on a synthetic database:
+    cold        first pull into an empty destination
+    unchanged   again: 304 on the ETag, no body
+    no etag     again, with the cache's ETag forgotten: the body comes,
+                but the content hash leaves the installed copy alone
+    local edit  after a same-size write to the installed copy: the cache
+                no longer counts, and the served database is installed
+    changed     after a write: a full download, installed
+    resumed     with the connection cut --cut of the way through, --cuts
+                times: each retry asks for the rest with Range/If-Range
+    gzip        --gzip, from cold
+and, for each, the bytes transferred and Python's peak memory against
+the old fetch (resp.read() of the whole body, then one write).  Also
+checks that a bad key and a non-SQLite body are refused, leaving the
+installed copy in place.
+
+Usage:
+    python3 bench/pull_db.py
+    python3 bench/pull_db.py --players 10000 --sessions 300000 --cut 0.3 --cuts 2
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import local_db_handler  # noqa: E402
+import pull_db  # noqa: E402
+
+
+class CutOff:
+    """A wfile that passes on only the first limit bytes written to it."""
+
+    def __init__(self, wfile, limit):
+        self.wfile = wfile
+        self.remaining = limit
+
+    def write(self, data):
+        data = memoryview(data)[:self.remaining]
+        self.remaining -= len(data)
+        return self.wfile.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.wfile, name)
+
+
+class FlakyHandler(local_db_handler.DbHandler):
+    """Cuts the next server.cuts whole-file bodies short, after server.cut_bytes."""
+
+    def end_headers(self):
+        super().end_headers()
+        if self.server.cuts and "action=query" not in self.path:
+            self.server.cuts -= 1
+            self.wfile = CutOff(self.wfile, self.server.cut_bytes)
+
+
+class NotADatabaseHandler(local_db_handler.DbHandler):
+    """Answers 200 with an HTML page, as ModSecurity does."""
+
+    def handle_request(self, params):
+        self.send_body(200, b"<html><body>Not Acceptable!</body></html>" * 50, "text/html")
+
+
+def old_fetch(url, dest):
+    """fetch_remote_db before streaming: the whole body in memory, then one write."""
+    req = urllib.request.Request(f"{url}?apiKey={local_db_handler.DEFAULT_API_KEY}")
+    with urllib.request.urlopen(req, timeout=60) as resp, open(dest, "wb") as out:
+        body = resp.read()
+        out.write(body)
+    return len(body)
+
+
+def measure(fn):
+    """(result, peak KiB, ms) of fn()."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        (_current, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (result, peak / 1024, elapsed)
+
+
+def serve(db_path, handler=FlakyHandler):
+    server = local_db_handler.make_server(db_path, port=0, quiet=True)
+    server.RequestHandlerClass = handler
+    server.cuts = 0
+    server.cut_bytes = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return (server, "http://%s:%d/db_handler.php" % server.server_address[:2])
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+    server.database.close()
+
+
+def touch(db_path):
+    con = sqlite3.connect(db_path)
+    with con:
+        (version,) = con.execute("PRAGMA user_version").fetchone()
+        con.execute(f"PRAGMA user_version = {version + 1}")
+    con.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Exercise the resumable, cached database pull.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--cut", type=float, default=0.4,
+                    help="Fraction of the body sent before the connection is cut (default: 0.4)")
+    ap.add_argument("--cuts", type=int, default=1, help="Connections cut in the resume case (default: 1)")
+    args = ap.parse_args()
+    pull_db.RETRY_DELAY_SECONDS = 0.05
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "served.db")
+        counts = synth.build_from_args(db_path, args)
+        dest = os.path.join(tmp_dir, "pulled.db")
+        (server, url) = serve(db_path)
+        key = local_db_handler.DEFAULT_API_KEY
+        try:
+            size = len(server.database.whole_file().body)
+            print(f"{counts['player']} players, {counts['session']} sessions, {size / 1e6:.1f} MB database")
+            (_, peak, ms) = measure(lambda: old_fetch(url, os.path.join(tmp_dir, "old.db")))
+            # Python's peak allocations on both sides: the server's snapshot is made beforehand
+            print(f"{'case':>10} {'changed':>8} {'transferred':>12} {'resumed at':>11} {'peak KiB':>9} {'ms':>8}")
+            print(f"{'old fetch':>10} {'':>8} {size:>12,} {'':>11} {peak:>9.0f} {ms:>8.1f}")
+
+            def case(label, **kwargs):
+                (fetched, peak, ms) = measure(lambda: pull_db.fetch(url, key, dest, **kwargs))
+                print(f"{label:>10} {str(fetched.changed):>8} {fetched.transferred:>12,} "
+                      f"{fetched.resumed_from or '':>11} {peak:>9.0f} {ms:>8.1f}")
+                return fetched
+
+            fetched = case("cold")
+            with open(dest, "rb") as fh:
+                assert fh.read() == server.database.whole_file().body
+            assert not case("unchanged").changed
+            meta = pull_db.load_json(dest + ".pull.json")
+            pull_db.save_json(dest + ".pull.json", dict(meta, etag=None))
+            assert not case("no etag").changed
+            touch(dest)
+            assert case("local edit").changed
+            with open(dest, "rb") as fh:
+                assert fh.read() == server.database.whole_file().body
+            touch(db_path)
+            server.database.whole_file()  # Snapshot outside the measurement
+            assert case("changed").changed
+            touch(db_path)
+            server.database.whole_file()
+            server.cuts = args.cuts
+            server.cut_bytes = int(size * args.cut)
+            fetched = case("resumed")
+            assert fetched.changed and fetched.resumed_from and not os.path.exists(dest + ".part")
+            with open(dest, "rb") as fh:
+                assert fh.read() == server.database.whole_file().body
+            os.unlink(dest)
+            server.database.whole_file().gzip_body()
+            assert case("gzip", compress=True).changed
+
+            installed = os.path.getmtime(dest)
+            (html_server, html_url) = serve(db_path, NotADatabaseHandler)
+            try:
+                for (label, bad_url, bad_key) in (("bad key", url, "wrong"), ("HTML page", html_url, key)):
+                    try:
+                        pull_db.fetch(bad_url, bad_key, dest)
+                        raise AssertionError(f"{label} was not refused")
+                    except pull_db.DownloadError as e:
+                        print(f"{label:>10} refused: {str(e)[:70]}")
+                    assert os.path.getmtime(dest) == installed and not os.path.exists(dest + ".part")
+            finally:
+                stop(html_server)
+        finally:
+            stop(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Rate lookup by epoch through the views' range joins against the bisect
+interval index (client/rateindex.py), on synthetic databases with more
+and more Rate_Intervals (--rate-intervals per rate group):
+    single      --lookups rates for a random category at a random epoch,
+                one query each against one index lookup each
+    bulk        the rate of every payment: the Payment_Rate_List view
+                against the payments' epochs looked up in the index
+    build       fetching the rate history and building the index
+The rates found must agree.  Then an overlap and a gap are put into the
+rate history, which the index must report when built.
+
+Usage:
+    python3 bench/rate_index.py
+    python3 bench/rate_index.py --rate-intervals 2 100 1000 --lookups 5000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+
+import synth  # noqa: E402
+import rateindex  # noqa: E402
+from run import timed  # noqa: E402
+
+# The range join of Payment_Rate_List, for one category and epoch
+RATE_AT_QUERY = """
+SELECT r.Rate FROM Category_Rate_Interval cri
+JOIN Rate_Interval ri ON cri.Rate_Interval_Id = ri.Rate_Interval_Id
+JOIN Rate r ON ri.Rate_Id = r.Rate_Id
+WHERE cri.Player_Category_Id = ?1 AND ?2 >= ri.Start_Epoch
+  AND (?2 <= ri.Stop_Epoch OR ri.Stop_Epoch IS NULL OR ri.Stop_Epoch = 0)
+"""
+
+PAYMENT_RATES_QUERY = "SELECT Player_Id, Payment_Epoch, Hourly_Rate FROM Payment_Rate_List"
+PAYMENTS_QUERY = "SELECT Player_Id, Epoch FROM Payment"
+
+
+class Manager:
+    """The one method of ConnectionManager that fetch_rate_index uses."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def fetch(self, query, data=()):
+        return self.con.execute(query, data).fetchall()
+
+
+def payment_rates(index, payments):
+    """(Player_Id, Epoch, rate) of each payment whose player's category has a rate then."""
+    by_category = {}
+    for (player_id, epoch) in payments:
+        by_category.setdefault(index.player_categories.get(player_id), []).append((player_id, epoch))
+    rates = []
+    for (category_id, category_payments) in by_category.items():
+        intervals = index.intervals(category_id, [epoch for (_player_id, epoch) in category_payments])
+        rates.extend((player_id, epoch, interval.rate)
+                     for ((player_id, epoch), interval) in zip(category_payments, intervals)
+                     if interval is not None)
+    return rates
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rate lookup: range joins against the interval index.")
+    ap.add_argument("--rate-intervals", type=int, nargs="+", default=[2, 50, 500, 5000])
+    ap.add_argument("--lookups", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    failed = False
+    print(f"{'intervals':>9} {'single SQL ms':>14} {'index ms':>9} {'bulk view ms':>13} "
+          f"{'index ms':>9} {'build ms':>9}")
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        for n_intervals in args.rate_intervals:
+            db_path = os.path.join(tmp_dir, f"rates{n_intervals}.db")
+            counts = synth.build(db_path, rate_interval_count=n_intervals, seed=args.seed)
+            con = sqlite3.connect(db_path)
+            manager = Manager(con)
+            (index, build_timing) = timed(lambda: rateindex.fetch_rate_index(manager), args.repeat)
+
+            rng = random.Random(args.seed)
+            (first, last) = con.execute("SELECT MIN(Start_Epoch), MAX(Stop_Epoch) FROM Rate_Interval").fetchone()
+            categories = [category_id for (category_id,) in con.execute(
+                "SELECT Player_Category_Id FROM Player_Category")]
+            probes = [(rng.choice(categories), rng.randint(first - 86400, last + 86400))
+                      for _ in range(args.lookups)]
+            (sql_rates, sql_timing) = timed(
+                lambda: [(con.execute(RATE_AT_QUERY, probe).fetchone() or (None,))[0] for probe in probes],
+                args.repeat)
+            (index_rates, index_timing) = timed(
+                lambda: [index.rate(category_id, epoch) for (category_id, epoch) in probes], args.repeat)
+            if sql_rates != index_rates:
+                print(f"FAILED: {sum(a != b for (a, b) in zip(sql_rates, index_rates))} single lookups differ")
+                failed = True
+
+            (view_rates, view_timing) = timed(lambda: con.execute(PAYMENT_RATES_QUERY).fetchall(), args.repeat)
+            (bulk_rates, bulk_timing) = timed(
+                lambda: payment_rates(index, con.execute(PAYMENTS_QUERY).fetchall()), args.repeat)
+            if sorted(view_rates) != sorted(bulk_rates):
+                print(f"FAILED: payment rates differ ({len(view_rates)} from the view, {len(bulk_rates)} indexed)")
+                failed = True
+            print(f"{counts['rate_interval']:>9} {sql_timing['median_ms']:>14.1f} {index_timing['median_ms']:>9.1f} "
+                  f"{view_timing['median_ms']:>13.1f} {bulk_timing['median_ms']:>9.1f} "
+                  f"{build_timing['median_ms']:>9.1f}")
+            con.close()
+
+        # Stretch one of group 3's intervals into the next, and remove another
+        con = sqlite3.connect(db_path)
+        with con:
+            (overlapped, removed) = [rate_interval_id for (rate_interval_id,) in con.execute(
+                "SELECT Rate_Interval_Id FROM Rate_Interval WHERE Rate_Group_Id = 3 "
+                "ORDER BY Start_Epoch LIMIT 2 OFFSET 1")]
+            con.execute("UPDATE Rate_Interval SET Stop_Epoch = Stop_Epoch + 3600 WHERE Rate_Interval_Id = ?",
+                        (overlapped,))
+            (removed_after,) = con.execute("SELECT Rate_Interval_Id FROM Rate_Interval WHERE Rate_Group_Id = 3 "
+                                           "ORDER BY Start_Epoch LIMIT 1 OFFSET 3").fetchone()
+            con.execute("DELETE FROM Rate_Interval WHERE Rate_Interval_Id = ?", (removed_after,))
+        problems = rateindex.fetch_rate_index(Manager(con)).problems()
+        con.close()
+    print(f"after overlapping interval {overlapped} with the next and removing interval {removed_after}:")
+    for problem in problems:
+        print(f"  {problem}")
+    expected_kinds = {"overlap", "no Rate_Interval"}
+    if not all(any(kind in problem for problem in problems) for kind in expected_kinds):
+        print("FAILED: the overlap or the gap was not reported")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+The maintained Email_Recipient table (server/recipient_list.py) against
+the Email_List view it replaces for the exports, on a synthetic club of
+--players players (default 100k):
+    read        every (name, address) to mail: the view, filtered and
+                expanded in Python, against the table
+    export      export_recipients.export() to JSON, reading each
+    install     creating the table and filling it
+    edits       --edits contact changes (an address linked, a phone added
+                or removed, a player flagged or unflagged, an address
+                corrected), with and without the triggers keeping it
+and recipient_list.verify() after the edits, which must find no drift.
+
+Usage:
+    python3 bench/recipient_list.py
+    python3 bench/recipient_list.py --players 20000 --edits 5000
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import export_recipients  # noqa: E402
+import recipient_list  # noqa: E402
+from run import timed  # noqa: E402
+
+
+def contact_edits(con, rng, players, n_edits):
+    """n_edits random contact changes, each its own commit as the apps make them."""
+    for i in range(n_edits):
+        player_id = rng.randint(1, players)
+        kind = i % 5
+        with con:
+            if kind == 0:
+                con.execute("INSERT INTO Email_Address (Address) VALUES (?)", (f"edit{i}@example.com",))
+                con.execute("INSERT INTO Player_Email (Player_Id, EmailAddress_Id) "
+                            "SELECT ?, MAX(EmailAddress_Id) FROM Email_Address", (player_id,))
+            elif kind == 1:
+                con.execute("INSERT INTO Phone_Number (Number) VALUES (?)", (f"edit-{i}",))
+                con.execute("INSERT INTO Player_Phone (Player_Id, PhoneNumber_Id) "
+                            "SELECT ?, MAX(PhoneNumber_Id) FROM Phone_Number", (player_id,))
+            elif kind == 2:
+                con.execute("DELETE FROM Player_Phone WHERE Player_Id = ?", (player_id,))
+            elif kind == 3:
+                con.execute("UPDATE Player SET Flag = CASE WHEN Flag IS NULL THEN 'Bounced' END "
+                            "WHERE Player_Id = ?", (player_id,))
+            else:
+                con.execute("UPDATE Email_Address SET Address = 'fixed.' || Address WHERE EmailAddress_Id = "
+                            "(SELECT MIN(EmailAddress_Id) FROM Player_Email WHERE Player_Id = ?)", (player_id,))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the maintained recipient list against Email_List.")
+    ap.add_argument("--players", type=int, default=100000)
+    ap.add_argument("--edits", type=int, default=2000, help="Contact changes to time (default: 2000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        plain_path = os.path.join(tmp_dir, "plain.db")
+        synth.build(db_path, players=args.players, sessions=args.players // 10, payments=args.players // 20,
+                    running=0, seed=args.seed)
+        shutil.copyfile(db_path, plain_path)
+        con = sqlite3.connect(db_path)
+        started = time.perf_counter()
+        n_addresses = recipient_list.install(con)
+        install_ms = (time.perf_counter() - started) * 1000
+        assert recipient_list.verify(con) == []
+
+        print(f"{args.players} players, {n_addresses} addresses to mail")
+        print(f"{'':>8} {'Email_List ms':>14} {'Email_Recipient ms':>19} {'speedup':>8}")
+        (view_pairs, view_timing) = timed(lambda: list(recipient_list.view_recipients(con)), args.repeat)
+        (table_pairs, table_timing) = timed(lambda: list(recipient_list.read_recipients(con)), args.repeat)
+        assert view_pairs == table_pairs
+        print(f"{'read':>8} {view_timing['median_ms']:>14.1f} {table_timing['median_ms']:>19.1f} "
+              f"{view_timing['median_ms'] / table_timing['median_ms']:>7.1f}x")
+        out = os.path.join(tmp_dir, "weekly_recipients.json")
+        (_, plain_timing) = timed(lambda: export_recipients.export(plain_path, out), args.repeat)
+        (_, table_timing) = timed(lambda: export_recipients.export(db_path, out), args.repeat)
+        print(f"{'export':>8} {plain_timing['median_ms']:>14.1f} {table_timing['median_ms']:>19.1f} "
+              f"{plain_timing['median_ms'] / table_timing['median_ms']:>7.1f}x")
+        print(f"install: {install_ms:.0f} ms")
+
+        per_edit = {}
+        for (label, path) in (("without", plain_path), ("with", db_path)):
+            edit_con = sqlite3.connect(path)
+            started = time.perf_counter()
+            contact_edits(edit_con, random.Random(args.seed), args.players, args.edits)
+            per_edit[label] = (time.perf_counter() - started) * 1000 / args.edits
+            edit_con.close()
+        print(f"{args.edits} contact edits: {per_edit['without']:.3f} ms each without the triggers, "
+              f"{per_edit['with']:.3f} ms with")
+        drift = recipient_list.verify(con)
+        print(f"verify after the edits: {'no drift' if not drift else f'{len(drift)} differences'}")
+        con.close()
+        return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+server/reprice.py on a large synthetic database (bench/synth.py,
+default a million sessions), against SQL:
+    charged     what was charged: the Session_Amount_List view summed by
+                player, against reprice's Charged
+    repriced    every session priced under its category's Rate_Intervals:
+                a join of each session to the intervals it overlaps,
+                summed per session and then by player, against reprice
+                with NumPy (if installed) and row by row
+    what-if     everyone priced under --rate-group's Rate_Intervals
+The totals must agree exactly.  synth's club nights never cross a rate
+change, so --straddling sessions are added across each Rate_Interval
+boundary, charged their starting rate as the app would.  With NumPy,
+the columnar load and the vectorized pricing are also timed apart.
+
+Usage:
+    python3 bench/reprice.py
+    python3 bench/reprice.py --players 250 --sessions 20800 --rate-intervals 2 --repeat 5
+"""
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import synth  # noqa: E402
+import reprice  # noqa: E402
+from run import timed  # noqa: E402
+
+CHARGED_SQL = """
+SELECT Player_Id, COUNT(*), SUM(Amount) FROM Session_Amount_List
+WHERE Session_Stop_Epoch IS NOT NULL GROUP BY Player_Id
+"""
+
+# Each session's overlap with each of its category's intervals (stop is
+# the last second charged, 0 open-ended), in cent-seconds, rounded per session
+REPRICED_SQL = """
+WITH Priced AS (
+    SELECT s.Player_Id,
+           SUM(MAX(MIN(MAX(s.Stop_Epoch, s.Start_Epoch),
+                       CASE WHEN IFNULL(ri.Stop_Epoch, 0) = 0 THEN MAX(s.Stop_Epoch, s.Start_Epoch)
+                            ELSE ri.Stop_Epoch + 1 END)
+                   - MAX(s.Start_Epoch, ri.Start_Epoch), 0)
+               * CAST(round(r.Rate * 100) AS INTEGER)) AS Cent_Seconds
+    FROM Session AS s
+    JOIN Player AS p ON p.Player_Id = s.Player_Id
+    JOIN Category_Rate_Interval AS cri ON cri.Player_Category_Id = p.Player_Category_Id
+    JOIN Rate_Interval AS ri ON ri.Rate_Interval_Id = cri.Rate_Interval_Id
+    JOIN Rate AS r ON r.Rate_Id = ri.Rate_Id
+    WHERE s.Stop_Epoch IS NOT NULL
+    GROUP BY s.Session_Id
+)
+SELECT Player_Id, SUM((Cent_Seconds + 180000) / 360000) FROM Priced GROUP BY Player_Id
+"""
+
+STRADDLING_SQL = """
+SELECT COUNT(DISTINCT s.Session_Id) FROM Session AS s
+JOIN Player AS p ON p.Player_Id = s.Player_Id
+JOIN Category_Rate_Interval AS cri ON cri.Player_Category_Id = p.Player_Category_Id
+JOIN Rate_Interval AS ri ON ri.Rate_Interval_Id = cri.Rate_Interval_Id
+WHERE s.Stop_Epoch IS NOT NULL AND ri.Stop_Epoch != 0
+  AND s.Start_Epoch <= ri.Stop_Epoch AND s.Stop_Epoch > ri.Stop_Epoch + 1
+"""
+
+
+def add_straddling(con, n_sessions, players):
+    """n_sessions two-hour sessions, an hour each side of the Rate_Interval boundaries."""
+    boundaries = sorted({stop + 1 for (stop,) in con.execute(
+        "SELECT Stop_Epoch FROM Rate_Interval WHERE Stop_Epoch != 0")})
+    with con:
+        con.executemany(
+            "INSERT INTO Session (Player_Id, Start_Epoch, Stop_Epoch, Hourly_Rate) "
+            "SELECT ?, ?, ?, r.Rate FROM Player AS p "
+            "JOIN Category_Rate_Interval AS cri ON cri.Player_Category_Id = p.Player_Category_Id "
+            "JOIN Rate_Interval AS ri ON ri.Rate_Interval_Id = cri.Rate_Interval_Id "
+            "JOIN Rate AS r ON r.Rate_Id = ri.Rate_Id "
+            "WHERE p.Player_Id = ?1 AND ?2 BETWEEN ri.Start_Epoch AND ri.Stop_Epoch",
+            ((i % players + 1, boundary - 3600, boundary + 3600)
+             for (i, boundary) in zip(range(n_sessions), itertools.cycle(boundaries))))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark reprice.py against the SQL view.")
+    synth.add_scale_arguments(ap)
+    ap.set_defaults(players=10000, sessions=1000000, payments=100000, rate_intervals=6)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--straddling", type=int, default=1000,
+                    help="Sessions to add across the Rate_Interval boundaries (default: 1000)")
+    ap.add_argument("--rate-group", type=int, default=3, help="Rate group for the what-if (default: 3)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        counts = synth.build_from_args(db_path, args)
+        con = sqlite3.connect(db_path)
+        add_straddling(con, args.straddling, counts["player"])
+        print(f"{counts['session']} sessions, {counts['player']} players, "
+              f"{counts['rate_interval']} Rate_Intervals; "
+              f"{con.execute(STRADDLING_SQL).fetchone()[0]} sessions straddle a boundary; "
+              f"NumPy {'%s' % reprice.np.__version__ if reprice.np is not None else 'not installed'}")
+        print(f"{'':>9} {'path':>12} {'median ms':>10} {'total $':>12}")
+        failed = False
+
+        (view, view_timing) = timed(lambda: con.execute(CHARGED_SQL).fetchall(), args.repeat)
+        (sql_repriced, sql_timing) = timed(lambda: dict(con.execute(REPRICED_SQL).fetchall()), args.repeat)
+        print(f"{'charged':>9} {'SQL view':>12} {view_timing['median_ms']:>10.1f} "
+              f"{sum(amount for (_p, _n, amount) in view):>12}")
+        print(f"{'repriced':>9} {'SQL join':>12} {sql_timing['median_ms']:>10.1f} "
+              f"{sum(sql_repriced.values()):>12}")
+
+        paths = [("row by row", False)] + ([("NumPy", True)] if reprice.np is not None else [])
+        for (label, use_numpy) in paths:
+            (totals, timing) = timed(lambda: reprice.reprice(con, use_numpy=use_numpy), args.repeat)
+            print(f"{'both':>9} {label:>12} {timing['median_ms']:>10.1f} "
+                  f"{sum(t[2] for t in totals.values()):>12} {sum(t[3] for t in totals.values()):>12}")
+            mismatched = [player_id for (player_id, sessions, amount) in view
+                          if totals[player_id][:3:2] != [sessions, amount]]
+            mismatched += [player_id for (player_id, amount) in sql_repriced.items()
+                           if totals[player_id][3] != amount]
+            if mismatched:
+                print(f"FAILED: {label} disagrees with SQL for {len(mismatched)} players, e.g. {mismatched[:5]}")
+                failed = True
+
+        if reprice.np is not None:
+            schedule_for = reprice.load_schedules(con)
+            (columns, load_timing) = timed(
+                lambda: reprice.load_columns(con.execute(reprice.SESSIONS_QUERY, reprice.ALL_TIME)), args.repeat)
+            (_totals, price_timing) = timed(lambda: reprice.reprice_columns(columns, schedule_for), args.repeat)
+            print(f"{'':>9} {'NumPy load':>12} {load_timing['median_ms']:>10.1f}")
+            print(f"{'':>9} {'NumPy price':>12} {price_timing['median_ms']:>10.1f}")
+
+        what_ifs = []
+        for (label, use_numpy) in paths:
+            (totals, timing) = timed(lambda: reprice.reprice(con, rate_group=args.rate_group,
+                                                             use_numpy=use_numpy), args.repeat)
+            what_ifs.append(totals)
+            print(f"{'what-if':>9} {label:>12} {timing['median_ms']:>10.1f} "
+                  f"{sum(t[3] for t in totals.values()):>12}  (rate group {args.rate_group} for all)")
+        if any(totals != what_ifs[0] for totals in what_ifs):
+            print("FAILED: the what-if differs between NumPy and row by row")
+            failed = True
+        con.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Benchmark suite: build a synthetic database (bench/synth.py) at a given
+scale, then time a full fetch of every view in it, the session app's
+refresh_session_list (fetch plus redraw), and export_recipients.build.
+
+The results are written as JSON, so a run can be compared against an
+earlier one with --compare; that prints each timing's ratio to the
+baseline and exits 1 if any got slower than --threshold.
+
+refresh_session_list needs a display, like the session app itself;
+without one it is recorded as skipped.
+
+Usage:
+    python3 bench/run.py --out baseline.json
+    python3 bench/run.py --players 10000 --sessions 1000000 --payments 100000 \\
+        --rate-intervals 6 --out big.json
+    python3 bench/run.py --out after.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+
+import synth  # noqa: E402
+
+START_EPOCH_OFFSET = 3 * 3600  # The app's clock, three hours into the last club night
+
+
+def timed(fn, repeat):
+    """Run fn repeat times; return (its last result, {"median_ms", "min_ms", "max_ms"})."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, {"median_ms": round(statistics.median(timings), 3),
+                    "min_ms": round(min(timings), 3),
+                    "max_ms": round(max(timings), 3)}
+
+
+def view_names(con):
+    return [name for (name,) in con.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'view' ORDER BY name")]
+
+
+def time_views(db_path, repeat):
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        results = {}
+        for name in view_names(con):
+            (rows, timing) = timed(lambda: con.execute(f'SELECT * FROM "{name}"').fetchall(), repeat)
+            results[name] = dict(timing, rows=len(rows))
+    finally:
+        con.close()
+    return results
+
+
+def time_export_recipients(db_path, repeat):
+    import export_recipients
+    (payload, timing) = timed(lambda: export_recipients.build(db_path), repeat)
+    return dict(timing, rows=payload["count"])
+
+
+class FixedClock:
+    """Stand-in for DigitalClock, stopped at one epoch."""
+
+    def __init__(self, epoch):
+        self.epoch = epoch
+
+    def now_epoch(self):
+        return self.epoch
+
+
+def time_refresh_session_list(db_path, night_epoch, repeat):
+    """
+    Time one refresh of the session list after a write: the DB worker's
+    fetch of Session_Panel_List and the Tk thread's redraw of it,
+    run back to back here rather than on two threads.
+    """
+    try:
+        import session  # Creates the Tk root
+    except Exception as e:  # No display, no locale, no Tk
+        return {"skipped": f"{type(e).__name__}: {e}"}
+    from dbconnection import ConnectionManager, ChangeDetector
+
+    manager = ConnectionManager(db_path)
+    session.root.withdraw()
+    session_view = session.SessionView(session.root, FixedClock(night_epoch + START_EPOCH_OFFSET))
+    session_view.updating = False
+    session_view.db_changes = ChangeDetector(manager)
+    session_view.pack()
+
+    def refresh():
+        session_view.db_changes.invalidate()  # As if someone had just written
+        session_view.receive_session_list(session_view.fetch_session_list(manager))
+        session.root.update_idletasks()
+        return session_view.session_list
+
+    try:
+        (rows, timing) = timed(refresh, repeat)
+    finally:
+        session_view.destroy()
+        manager.close()
+    return dict(timing, rows=len(rows))
+
+
+def run(args):
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        started = time.perf_counter()
+        counts = synth.build_from_args(db_path, args)
+        build_seconds = time.perf_counter() - started
+        print(f"Built synthetic database in {build_seconds:.1f}s: "
+              + ", ".join(f"{n} {what}" for (what, n) in counts.items()), file=sys.stderr)
+
+        night_epoch = synth.FIRST_NIGHT_EPOCH + (args.weeks - 1) * synth.WEEK_SECONDS
+        timings = {f"view:{name}": timing for (name, timing) in time_views(db_path, args.repeat).items()}
+        timings["refresh_session_list"] = time_refresh_session_list(db_path, night_epoch, args.repeat)
+        timings["export_recipients.build"] = time_export_recipients(db_path, args.repeat)
+
+    return {
+        "generated_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "scale": {"players": args.players, "weeks": args.weeks, "sessions": args.sessions,
+                  "payments": args.payments, "rate_intervals": args.rate_intervals,
+                  "seed": args.seed},
+        "counts": counts,
+        "repeat": args.repeat,
+        "timings": timings,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print each timing against the baseline's; return the names of the
+    ones whose median grew by more than the threshold ratio.
+    """
+    if baseline.get("scale") != results["scale"]:
+        print("WARNING: baseline was run at a different scale", file=sys.stderr)
+    slower = []
+    print(f"{'':<44} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}")
+    for (name, timing) in results["timings"].items():
+        before = baseline["timings"].get(name, {})
+        if "median_ms" not in timing or "median_ms" not in before:
+            continue
+        ratio = timing["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        flag = "  SLOWER" if ratio > threshold else ""
+        print(f"{name:<44} {before['median_ms']:>12.2f} {timing['median_ms']:>10.2f} "
+              f"{ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time every view and the app's hot paths "
+                                             "on a synthetic database.")
+    synth.add_scale_arguments(ap)
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per timing (default: 5)")
+    ap.add_argument("--out", help="Write the JSON results here (default: stdout)")
+    ap.add_argument("--compare", metavar="BASELINE", help="Earlier results to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25,
+                    help="Slowdown ratio counted as a regression (default: 1.25)")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as fh:
+                baseline = json.load(fh)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"ERROR: cannot read baseline {args.compare}: {e}", file=sys.stderr)
+            return 1
+
+    results = run(args)
+    text = json.dumps(results, indent=2) + "\n"
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text)
+        print(f"Wrote {args.out}", file=sys.stderr)
+    elif baseline is None:
+        sys.stdout.write(text)
+
+    if baseline is not None:
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print(f"{len(slower)} timings slower than {args.threshold}x the baseline.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
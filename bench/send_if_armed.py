@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+server/send_if_armed.py's draft lookup against a fake Gmail service that
+answers each call after --latency milliseconds: the old lookup (one page
+of 50, then each draft's subject in turn) against the paginated,
+thread-pooled one, at several draft counts, with today's draft last in
+the listing.  Also runs main() against the fake for each exit code:
+    one match, sent           0, sentinel deleted
+    no sentinel               0
+    no match / two matches    2, sentinel kept
+    more than MAX_DRAFTS      2, sentinel kept
+    a draft lookup fails      1, sentinel kept
+    a draft lookup times out  1, sentinel kept (the socket's CALL_TIMEOUT)
+    a draft lookup hangs      1, sentinel kept (the lookup's deadline)
+    the send fails            1, sentinel kept
+
+Usage:
+    python3 bench/send_if_armed.py
+    python3 bench/send_if_armed.py --latency 120 --drafts 10 100 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+
+import send_if_armed  # noqa: E402
+
+DATE = "June 2, 2026"
+
+
+class FakeCall:
+    def __init__(self, gmail, answer):
+        self.gmail = gmail
+        self.answer = answer
+
+    def execute(self, http=None, num_retries=0):
+        return self.gmail.call(self.answer)
+
+
+class FakeGmail:
+    """
+    Enough of service.users().drafts() for send_if_armed: list (with
+    pageToken / nextPageToken), get and send, each taking latency
+    seconds, counting calls and the most running at once.  A get of one
+    of fail_ids raises, of timeout_ids raises TimeoutError after
+    CALL_TIMEOUT as the client's socket would, and of hang_ids outlasts it.
+    """
+
+    def __init__(self, subjects, latency, fail_ids=(), timeout_ids=(), hang_ids=(), send_fails=False):
+        self.subjects = subjects  # draft id -> subject, in listing order
+        self.latency = latency
+        self.fail_ids = set(fail_ids)
+        self.timeout_ids = set(timeout_ids)
+        self.hang_ids = set(hang_ids)
+        self.send_fails = send_fails
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.running = 0
+        self.most_running = 0
+        self.sent = []
+
+    def users(self):
+        return self
+
+    def drafts(self):
+        return self
+
+    def call(self, answer):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(self.latency)
+            return answer()
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def list(self, userId, q, maxResults, pageToken=None):
+        def answer():
+            ids = list(self.subjects)
+            start = int(pageToken or 0)
+            page = {"drafts": [{"id": draft_id} for draft_id in ids[start:start + maxResults]]}
+            if start + maxResults < len(ids):
+                page["nextPageToken"] = str(start + maxResults)
+            return page
+        return FakeCall(self, answer)
+
+    def get(self, userId, id, format):
+        def answer():
+            if id in self.fail_ids:
+                raise RuntimeError(f"HttpError 500 for draft {id}")
+            if id in self.timeout_ids:
+                time.sleep(send_if_armed.CALL_TIMEOUT)
+                raise TimeoutError("timed out")
+            if id in self.hang_ids:
+                time.sleep(send_if_armed.CALL_TIMEOUT * 4)
+            return {"message": {"payload": {"headers": [{"name": "Subject", "value": self.subjects[id]}]}}}
+        return FakeCall(self, answer)
+
+    def send(self, userId, body):
+        def answer():
+            if self.send_fails:
+                raise RuntimeError("HttpError 503 sending")
+            self.sent.append(body["id"])
+            return {"id": "sent-" + body["id"]}
+        return FakeCall(self, answer)
+
+
+def drafts(n, matching=1):
+    """n draft subjects, the last matching of them today's POKER TONIGHT."""
+    subjects = {f"d{i}": f"POKER TONIGHT - May {i % 28 + 1}, 2026" for i in range(n - matching)}
+    subjects.update({f"today{i}": f"POKER TONIGHT - {DATE}" for i in range(matching)})
+    return subjects
+
+
+def old_find_todays_draft(service, date_str):
+    """find_todays_draft before pagination and the thread pool."""
+    resp = service.users().drafts().list(
+        userId="me", q='subject:"POKER TONIGHT"', maxResults=50
+    ).execute()
+    matches = []
+    for d in resp.get("drafts", []):
+        full = service.users().drafts().get(userId="me", id=d["id"], format="metadata").execute()
+        headers = full.get("message", {}).get("payload", {}).get("headers", [])
+        subject = next((h["value"] for h in headers if h["name"].lower() == "subject"), "")
+        if "POKER TONIGHT" in subject and date_str in subject:
+            matches.append((d["id"], subject))
+    return matches
+
+
+def run_main(gmail, tmp_dir, armed=True):
+    """(exit code, sentinel still there) of main() with gmail as the service."""
+    send_if_armed.SENTINEL = os.path.join(tmp_dir, "send_email_ok")
+    if armed:
+        open(send_if_armed.SENTINEL, "w").close()
+    elif os.path.exists(send_if_armed.SENTINEL):
+        os.unlink(send_if_armed.SENTINEL)
+    send_if_armed.get_credentials = lambda: None
+    send_if_armed.get_service = lambda creds: gmail
+    send_if_armed.authorized_http = lambda creds: None
+    send_if_armed.today_date_string = lambda: DATE
+    send_if_armed.log = lambda msg: None
+    code = send_if_armed.main()
+    return (code, os.path.exists(send_if_armed.SENTINEL))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Draft lookup latency against a fake Gmail service.")
+    ap.add_argument("--latency", type=float, default=80, help="Milliseconds per API call (default: 80)")
+    ap.add_argument("--drafts", type=int, nargs="+", default=[5, 60, 200, 1000])
+    args = ap.parse_args()
+    latency = args.latency / 1000
+
+    print(f"{args.latency:g} ms per call, MAX_WORKERS {send_if_armed.MAX_WORKERS}, "
+          f"PAGE_SIZE {send_if_armed.PAGE_SIZE}")
+    print(f"{'drafts':>7} {'old s':>8} {'found':>6} {'new s':>8} {'found':>6} {'calls':>6} {'concurrent':>11}")
+    for n in args.drafts:
+        gmail = FakeGmail(drafts(n), latency)
+        started = time.perf_counter()
+        old = old_find_todays_draft(gmail, DATE)
+        old_s = time.perf_counter() - started
+        gmail = FakeGmail(drafts(n), latency)
+        started = time.perf_counter()
+        (new, complete) = send_if_armed.find_todays_draft(gmail, DATE)
+        new_s = time.perf_counter() - started
+        assert complete and len(new) == 1
+        print(f"{n:>7} {old_s:>8.2f} {len(old):>6} {new_s:>8.2f} {len(new):>6} {gmail.calls:>6} "
+              f"{gmail.most_running:>11}")
+        assert gmail.most_running <= send_if_armed.MAX_WORKERS
+
+    send_if_armed.CALL_TIMEOUT = 0.5
+    send_if_armed.MAX_DRAFTS = 300
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        print(f"{'case':>22} {'exit':>5} {'sentinel':>9}")
+        for (label, gmail, armed, expected) in (
+                ("one match, sent", FakeGmail(drafts(120), 0.001), True, (0, False)),
+                ("no sentinel", FakeGmail(drafts(120), 0.001), False, (0, False)),
+                ("no match", FakeGmail(drafts(120, matching=0), 0.001), True, (2, True)),
+                ("two matches", FakeGmail(drafts(120, matching=2), 0.001), True, (2, True)),
+                ("over MAX_DRAFTS", FakeGmail(drafts(400), 0.001), True, (2, True)),
+                ("a lookup fails", FakeGmail(drafts(120), 0.001, fail_ids=["d7"]), True, (1, True)),
+                ("a lookup times out", FakeGmail(drafts(120), 0.001, timeout_ids=["d3"]), True, (1, True)),
+                ("a lookup hangs", FakeGmail(drafts(16), 0.001, hang_ids=["d3"]), True, (1, True)),
+                ("the send fails", FakeGmail(drafts(120), 0.001, send_fails=True), True, (1, True))):
+            (code, sentinel) = run_main(gmail, tmp_dir, armed)
+            print(f"{label:>22} {code:>5} {str(sentinel):>9}")
+            assert (code, sentinel) == expected, label
+            assert gmail.sent == (["today0"] if code == 0 and armed else [])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Import time of the Tk-free session engine (client/sessionengine.py),
+each in --runs fresh interpreters, against the bare interpreter and the
+modules the session rules used to be reachable only through (tkinter,
+which session.py then needs a display for); the engine must import in
+under --limit ms without pulling in tkinter, locale or sqlite3.
+
+Then checks the engine's amounts against the view on a synthetic
+database (bench/synth.py): session_amount against Session_Amount_List
+for every stopped session.  (Balances come from the Player_Balance view,
+in the app as here.)
+
+Usage:
+    python3 bench/session_engine.py
+    python3 bench/session_engine.py --runs 50 --players 2000 --sessions 200000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLIENT = os.path.join(HERE, "..", "client")
+sys.path.insert(0, os.path.join(HERE, "..", "server"))
+sys.path.insert(0, CLIENT)
+
+import synth  # noqa: E402
+import sessionengine  # noqa: E402
+
+IMPORT_PROBE = """
+import sys, time, json
+before = set(sys.modules)
+started = time.perf_counter()
+{imports}
+ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": ms, "modules": sorted(set(sys.modules) - before)}}))
+"""
+
+UNWANTED = ("tkinter", "_tkinter", "locale", "sqlite3")
+
+
+def import_ms(imports, runs):
+    """(median ms, modules newly loaded) of imports, each run in a fresh interpreter."""
+    timings = []
+    modules = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(imports=imports)],
+                             cwd=CLIENT, check=True, capture_output=True, text=True).stdout
+        probe = json.loads(out)
+        timings.append(probe["ms"])
+        modules = probe["modules"]
+    return (statistics.median(timings), modules)
+
+
+def check_amounts(db_path):
+    """Differences between the engine's session amounts and the view's."""
+    con = sqlite3.connect(db_path)
+    differences = []
+    for (player_id, start, stop, rate, amount) in con.execute(
+            "SELECT Player_Id, Session_Start_Epoch, Session_Stop_Epoch, Rate, Amount "
+            "FROM Session_Amount_List WHERE Is_Prepaid = 0 AND Session_Stop_Epoch IS NOT NULL"):
+        mine = sessionengine.session_amount(sessionengine.session_duration(start, stop), rate)
+        if mine != amount:
+            differences.append((player_id, start, mine, amount))
+    con.close()
+    return differences
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import time and amounts of the session engine.")
+    ap.add_argument("--runs", type=int, default=20, help="Fresh interpreters per import (default: 20)")
+    ap.add_argument("--limit", type=float, default=100, help="Most ms the engine may take (default: 100)")
+    synth.add_scale_arguments(ap)
+    args = ap.parse_args()
+
+    print(f"{'import':>24} {'median ms':>10} {'modules':>8}")
+    results = {}
+    for (label, imports) in (("(nothing)", "pass"),
+                             ("sessionengine", "import sessionengine"),
+                             ("sessionformat", "import sessionformat"),
+                             ("tkinter", "import tkinter, tkinter.ttk, tkinter.font")):
+        (ms, modules) = import_ms(imports, args.runs)
+        results[label] = (ms, modules)
+        print(f"{label:>24} {ms:>10.2f} {len(modules):>8}")
+    (engine_ms, engine_modules) = results["sessionengine"]
+    pulled_in = [name for name in engine_modules if name.split(".")[0] in UNWANTED]
+    print(f"sessionengine loads: {', '.join(engine_modules)}")
+    failed = engine_ms >= args.limit or bool(pulled_in)
+    if failed:
+        print(f"FAILED: {engine_ms:.2f} ms (limit {args.limit:g}), pulled in {pulled_in or 'nothing unwanted'}")
+
+    with tempfile.TemporaryDirectory(prefix="ccc_bench_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "CarolinaCardClub.db")
+        counts = synth.build_from_args(db_path, args)
+        differences = check_amounts(db_path)
+    print(f"{counts['session']} sessions, {counts['player']} players: "
+          f"{'amounts match the view' if not differences else f'{len(differences)} differences'}")
+    for difference in differences[:10]:
+        print("  player %s start %s: engine %s, view %s" % difference)
+    return 1 if failed or differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Benchmark the session list redraw (SessionView.redraw_session_list),
+full delete-and-reinsert against keyed reconciliation.
+
+Needs a display, like the session app itself.
+
+Usage:
+    python3 bench/session_redraw.py                  # 50, 500 and 5000 sessions
+    python3 bench/session_redraw.py --sizes 200 --ticks 120
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+
+import session  # noqa: E402  (creates the Tk root)
+
+START_EPOCH = 1760000000
+
+
+class SteppingClock:
+    """Stand-in for DigitalClock that advances one second per redraw."""
+
+    def __init__(self, epoch):
+        self.epoch = epoch
+
+    def now_epoch(self):
+        return self.epoch
+
+
+def synthetic_sessions(n_sessions, running_fraction=0.1):
+    """Session_Panel_List-shaped rows, the first running_fraction of them running."""
+    n_running = int(n_sessions * running_fraction)
+    rows = []
+    for i in range(n_sessions):
+        start = START_EPOCH - 3600 * (i // 20) - 60 * (i % 20)
+        if i < n_running:
+            rows.append((i + 1, i % 250 + 1, f"Player {i % 250 + 1}", start, None,
+                         None, None, -20 - i % 7, 5))
+        else:
+            stop = start + 3 * 3600
+            rows.append((i + 1, i % 250 + 1, f"Player {i % 250 + 1}", start, stop,
+                         stop - start, 15, -20 - i % 7, 5))
+    return rows
+
+
+def time_redraws(session_view, clock, ticks):
+    """Seconds taken by each of ticks redraws, one clock second apart."""
+    timings = []
+    for _ in range(ticks):
+        clock.epoch += 1
+        started = time.perf_counter()
+        session_view.redraw_session_list()
+        session.root.update_idletasks()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run(sizes, ticks):
+    results = []
+    for n_sessions in sizes:
+        rows = synthetic_sessions(n_sessions)
+        for keyed in (False, True):
+            session.KEYED_SESSION_REDRAW = keyed
+            clock = SteppingClock(START_EPOCH)
+            session_view = session.SessionView(session.root, clock)
+            session_view.updating = False
+            session_view.session_list = rows
+            session_view.pack()
+            session_view.redraw_session_list()    # initial fill is not timed
+            timings = time_redraws(session_view, clock, ticks)
+            session_view.destroy()
+            results.append((n_sessions, "keyed" if keyed else "full", timings))
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark session list redraw cost.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000],
+                    help="Numbers of visible sessions (default: 50 500 5000)")
+    ap.add_argument("--ticks", type=int, default=60,
+                    help="Redraws timed per size and mode (default: 60)")
+    args = ap.parse_args()
+
+    session.root.withdraw()
+    print(f"{'sessions':>8} {'mode':>6} {'median ms':>10} {'p95 ms':>8} {'max ms':>8}")
+    for (n_sessions, mode, timings) in run(args.sizes, args.ticks):
+        timings_ms = sorted(t * 1000 for t in timings)
+        p95 = timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.95))]
+        print(f"{n_sessions:>8} {mode:>6} {statistics.median(timings_ms):>10.2f} "
+              f"{p95:>8.2f} {timings_ms[-1]:>8.2f}")
+    session.root.destroy()
+
+
+if __name__ == "__main__":
+    main()
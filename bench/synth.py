@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Build synthetic Carolina Card Club databases for benchmarking,
+from server/CarolinaCardClub.db.schema.sql.
+
+A club night is every week at 7:30 PM.  The sessions are spread evenly
+over the nights, each priced at its player's category rate at the time,
+and a random share of them are paid for.  The last night can be left
+running so Session_Panel_List has live sessions in it.  Players get
+email addresses, phone numbers, flags and Super Bowl entries so
+Email_List has contacts to fan out over.
+
+Usage:
+    python3 bench/synth.py /tmp/ten_years.db                 # ten years of weekly sessions
+    python3 bench/synth.py /tmp/big.db --players 10000 --sessions 1000000 \\
+        --payments 100000 --rate-intervals 6
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_SQL = os.path.join(HERE, "..", "server", "CarolinaCardClub.db.schema.sql")
+
+WEEK_SECONDS = 7 * 24 * 3600
+FIRST_NIGHT_EPOCH = 1439940600  # Tuesday 2015-08-18 7:30 PM Eastern
+
+# (Rate_Id, Rate, Description), as in the live database
+RATES = [(1, 0, "Free"), (2, 3, "OG Reduced"), (3, 5, "OG Regular"),
+         (4, 4, "Reduced"), (5, 6, "Regular")]
+
+# (Player_Category_Id, Name, Rate_Group_Id, weight when picking a player's category)
+CATEGORIES = [(1, "Founder", 1, 1), (2, "Manager", 1, 1), (3, "Assistant Manager", 2, 2),
+              (4, "Five Oaks Member", 2, 10), (5, "Regular", 3, 86)]
+
+# Rate_Id for each Rate_Group_Id, before and after a rate change
+GROUP_RATES = {1: (1, 1), 2: (2, 4), 3: (3, 5)}
+
+# Scale of the ten-year default: 40 sessions a week for 520 weeks
+DEFAULT_SCALE = {"players": 250, "weeks": 520, "sessions": 20800, "payments": 10400,
+                 "rate_interval_count": 2}
+
+
+def rate_intervals(first_epoch, last_epoch, n_intervals):
+    """Split [first_epoch, last_epoch] into n_intervals consecutive (start, stop) pairs."""
+    step = max((last_epoch - first_epoch) // n_intervals, 1)
+    bounds = [first_epoch + i * step for i in range(n_intervals)] + [last_epoch]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(n_intervals)]
+
+
+def insert_rates(con, intervals):
+    """
+    Fill Rate, Player_Category, Rate_Interval and Category_Rate_Interval.
+    Each rate group is charged its first rate for the first half of
+    the intervals and its second rate after that.
+    Return {Player_Category_Id: [(start, stop, rate)]} and the Rate_Interval count.
+    """
+    con.executemany("INSERT INTO Rate (Rate_Id, Rate, Description) VALUES (?, ?, ?)", RATES)
+    con.executemany("INSERT INTO Player_Category (Player_Category_Id, Name, Rate_Group_Id) "
+                    "VALUES (?, ?, ?)", [c[:3] for c in CATEGORIES])
+
+    rate_interval_rows = []
+    category_rate_interval_rows = []
+    rate_by_category = {c[0]: [] for c in CATEGORIES}
+    for (group_id, (old_rate_id, new_rate_id)) in GROUP_RATES.items():
+        for (i, (start, stop)) in enumerate(intervals):
+            rate_id = old_rate_id if i < (len(intervals) + 1) // 2 else new_rate_id
+            rate_interval_id = len(rate_interval_rows) + 1
+            rate_interval_rows.append((rate_interval_id, rate_id, start, stop, group_id))
+            for (category_id, _name, category_group_id, _weight) in CATEGORIES:
+                if category_group_id == group_id:
+                    category_rate_interval_rows.append((category_id, rate_interval_id))
+                    rate_by_category[category_id].append((start, stop, RATES[rate_id - 1][1]))
+    con.executemany("INSERT INTO Rate_Interval (Rate_Interval_Id, Rate_Id, Start_Epoch, Stop_Epoch, "
+                    "Rate_Group_Id) VALUES (?, ?, ?, ?, ?)", rate_interval_rows)
+    con.executemany("INSERT INTO Category_Rate_Interval (Player_Category_Id, Rate_Interval_Id) "
+                    "VALUES (?, ?)", category_rate_interval_rows)
+    return rate_by_category, len(rate_interval_rows)
+
+
+def insert_players(con, rng, players):
+    """
+    Fill Player and its contact tables; return each player's category, by Player_Id - 1.
+    Most players have one email address and one phone number; some have
+    two of each, some none, a few are flagged, and one in ten played the Super Bowl.
+    """
+    player_categories = rng.choices([c[0] for c in CATEGORIES],
+                                    weights=[c[3] for c in CATEGORIES], k=players)
+    con.executemany("INSERT INTO Player (Player_Id, Name, Player_Category_Id, NickName, Flag) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    ((i + 1, f"Player {i + 1}", player_categories[i],
+                      f"P{i + 1}" if i % 3 == 0 else None,
+                      "No email" if i % 50 == 49 else None) for i in range(players)))
+
+    email_counts = rng.choices([0, 1, 2], weights=[5, 80, 15], k=players)
+    phone_counts = rng.choices([0, 1, 2], weights=[15, 75, 10], k=players)
+    email_rows = [(player_id, f"player{player_id}.{n}@example.com")
+                  for (player_id, count) in enumerate(email_counts, 1) for n in range(count)]
+    phone_rows = [(player_id, f"919-{player_id // 10000:03d}-{player_id % 10000:04d}x{n}")
+                  for (player_id, count) in enumerate(phone_counts, 1) for n in range(count)]
+    con.executemany("INSERT INTO Email_Address (EmailAddress_Id, Address) VALUES (?, ?)",
+                    ((i + 1, address) for (i, (_player_id, address)) in enumerate(email_rows)))
+    con.executemany("INSERT INTO Player_Email (Player_Id, EmailAddress_Id) VALUES (?, ?)",
+                    ((player_id, i + 1) for (i, (player_id, _address)) in enumerate(email_rows)))
+    con.executemany("INSERT INTO Phone_Number (PhoneNumber_Id, Number) VALUES (?, ?)",
+                    ((i + 1, number) for (i, (_player_id, number)) in enumerate(phone_rows)))
+    con.executemany("INSERT INTO Player_Phone (Player_Id, PhoneNumber_Id) VALUES (?, ?)",
+                    ((player_id, i + 1) for (i, (player_id, _number)) in enumerate(phone_rows)))
+    con.executemany("INSERT INTO Super_Bowl_Players (Player_Id) VALUES (?)",
+                    ((player_id,) for player_id in range(1, players + 1) if player_id % 10 == 0))
+    return player_categories
+
+
+def build(db_path, players=250, weeks=520, sessions=20800, payments=10400,
+          rate_interval_count=2, running=10, seed=1):
+    """
+    Create db_path (replacing any existing file) and fill it with synthetic history.
+    Return a dict of row counts.
+    """
+    rng = random.Random(seed)
+    if os.path.exists(db_path):
+        os.unlink(db_path)
+    con = sqlite3.connect(db_path)
+    try:
+        with open(SCHEMA_SQL) as fh:
+            con.executescript(fh.read())
+        con.execute("PRAGMA journal_mode = OFF")
+        con.execute("PRAGMA synchronous = OFF")
+
+        last_night_epoch = FIRST_NIGHT_EPOCH + (weeks - 1) * WEEK_SECONDS
+        intervals = rate_intervals(FIRST_NIGHT_EPOCH - WEEK_SECONDS,
+                                   last_night_epoch + 52 * WEEK_SECONDS, rate_interval_count)
+
+        con.execute("BEGIN")
+        (rate_by_category, n_rate_intervals) = insert_rates(con, intervals)
+        player_categories = insert_players(con, rng, players)
+
+        def rate_at(category_id, epoch):
+            for (start, stop, rate) in rate_by_category[category_id]:
+                if start <= epoch <= stop:
+                    return rate
+            return 0
+
+        payment_fraction = min(payments / sessions, 1.0) if sessions else 0.0
+        payment_rows = []
+
+        def session_rows():
+            """Sessions night by night, collecting payments for some as they go."""
+            for week in range(weeks):
+                night_epoch = FIRST_NIGHT_EPOCH + week * WEEK_SECONDS
+                last_night = week == weeks - 1
+                n_tonight = sessions // weeks + (1 if week < sessions % weeks else 0)
+                if n_tonight <= players:
+                    tonight = rng.sample(range(players), n_tonight)
+                else:
+                    tonight = rng.choices(range(players), k=n_tonight)
+                for (seat, player_index) in enumerate(tonight):
+                    player_id = player_index + 1
+                    start = night_epoch + 60 * rng.randrange(0, 120)
+                    if last_night and seat < running:
+                        stop = None
+                    else:
+                        stop = start + 60 * rng.randrange(60, 360)
+                    rate = rate_at(player_categories[player_index], start)
+                    if stop is not None and rng.random() < payment_fraction:
+                        amount = round((stop - start) * rate / 3600)
+                        payment_rows.append((player_id, amount, stop))
+                    yield (player_id, start, stop, rate)
+
+        con.executemany("INSERT INTO Session (Player_Id, Start_Epoch, Stop_Epoch, Hourly_Rate) "
+                        "VALUES (?, ?, ?, ?)", session_rows())
+        con.executemany("INSERT INTO Payment (Player_Id, Amount, Epoch) VALUES (?, ?, ?)",
+                        payment_rows)
+        con.execute("INSERT INTO System_State (Id, Is_Club_Open, Club_Start_Epoch, Current_Game_Epoch) "
+                    "VALUES (1, 1, ?, ?)", (last_night_epoch, last_night_epoch + 3600))
+        con.commit()
+        counts = {table.lower(): con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("Player", "Session", "Payment", "Rate_Interval",
+                                "Player_Email", "Player_Phone")}
+    finally:
+        con.close()
+    return counts
+
+
+def add_scale_arguments(ap):
+    """The synthetic-scale options shared by the benchmarks that build a database."""
+    ap.add_argument("--players", type=int, default=DEFAULT_SCALE["players"])
+    ap.add_argument("--weeks", type=int, default=DEFAULT_SCALE["weeks"],
+                    help=f"Weekly club nights (default: {DEFAULT_SCALE['weeks']}, ten years)")
+    ap.add_argument("--sessions", type=int, default=DEFAULT_SCALE["sessions"])
+    ap.add_argument("--payments", type=int, default=DEFAULT_SCALE["payments"],
+                    help="Approximate number of payments")
+    ap.add_argument("--rate-intervals", type=int, default=DEFAULT_SCALE["rate_interval_count"],
+                    help="Rate_Intervals per rate group")
+    ap.add_argument("--seed", type=int, default=1)
+
+
+def build_from_args(db_path, args):
+    return build(db_path, players=args.players, weeks=args.weeks, sessions=args.sessions,
+                 payments=args.payments, rate_interval_count=args.rate_intervals, seed=args.seed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build a synthetic Carolina Card Club database.")
+    ap.add_argument("db", help="Path of the database to create (replaced if it exists)")
+    add_scale_arguments(ap)
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    counts = build_from_args(args.db, args)
+    print(f"Built {args.db} in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{n} {what}" for (what, n) in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
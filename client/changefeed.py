@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Local push notifications of database writes, so the session app can
+refresh just what changed instead of polling for it
+"""
+
+# There is no broker: every subscriber binds a Unix datagram socket in
+# CHANGE_FEED_DIR, and publish() sends one small JSON datagram to each
+# socket it finds there, dropping the files of subscribers that have gone.
+# Publishing never blocks a writer: a subscriber whose queue is full just
+# misses the message, and catches up on its next fallback poll.
+
+import glob
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+CHANGE_FEED_DIR = os.path.join(tempfile.gettempdir(), "ccc-change-feed")
+CHANGE_FEED_MAX_BYTES = 4096
+
+
+def publish(event, feed_dir=CHANGE_FEED_DIR, **ids):
+    """
+    Tell every subscriber about a write, e.g.
+        publish("session_stopped", session_id=12, player_id=3)
+    The message also carries its time of sending, as "t".
+    Return the number of subscribers reached.
+    """
+    message = json.dumps({"event": event, "t": time.time(), **ids}).encode()
+    reached = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        for path in glob.glob(os.path.join(feed_dir, "*.sock")):
+            try:
+                sock.sendto(message, path)
+                reached += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody bound to it any more
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                pass  # That subscriber is behind; it will poll
+    return reached
+
+
+class ChangeSubscriber(threading.Thread):
+    """
+    Receive published changes on a daemon thread and pass each one,
+    as a dict, to callback (on this thread: a Tk app should hand it
+    on with after_idle).
+    """
+
+    def __init__(self, callback, feed_dir=CHANGE_FEED_DIR):
+        super().__init__(name="change-feed", daemon=True)
+        self.callback = callback
+        os.makedirs(feed_dir, exist_ok=True)
+        self.path = os.path.join(feed_dir, f"{os.getpid()}-{id(self):x}.sock")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.stopping = False
+
+    def run(self):
+        while not self.stopping:
+            try:
+                data = self.sock.recv(CHANGE_FEED_MAX_BYTES)
+            except OSError:
+                break
+            if self.stopping:
+                break
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(message, dict) and "event" in message:
+                self.callback(message)
+
+    def stop(self):
+        self.stopping = True
+        # Wake the blocked recv with an empty datagram, then close
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            try:
+                sock.sendto(b"", self.path)
+            except OSError:
+                pass
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=1.0)
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    received = []
+    subscriber = ChangeSubscriber(received.append)
+    subscriber.start()
+    print(f"Subscribed at {subscriber.path}")
+    print("Reached", publish("session_started", session_id=1, player_id=7), "subscriber(s)")
+    time.sleep(0.1)
+    print("Received", received)
+    subscriber.stop()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Long-lived connections to the Carolina Card Club database
+"""
+
+import sqlite3
+
+DB_FILE_NAME = 'CarolinaCardClub.db'
+
+# How long a statement waits on a lock held by another process
+# (e.g. the Dart server) before giving up with "database is locked".
+BUSY_TIMEOUT_SECONDS = 5.0
+
+# Prepared statements kept per connection; the app runs a handful of
+# queries over and over, so they are compiled once and reused.
+CACHED_STATEMENTS = 64
+
+
+class ConnectionManager:
+    """
+    Hold one read-write connection for writes and one read-only
+    connection for polling, opened on first use and kept open,
+    instead of connecting and disconnecting on every call.
+
+    The database keeps its rollback journal, not WAL: bin/pull_db and
+    bin/push_db copy and replace the file on its own, and db_handler.php
+    opens it read-only, none of which would see (or could write) a -wal
+    file beside it.
+    """
+
+    def __init__(self, db_path=DB_FILE_NAME,
+                 busy_timeout=BUSY_TIMEOUT_SECONDS,
+                 cached_statements=CACHED_STATEMENTS):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.write_conn = None
+        self.read_conn = None
+
+    def connect(self, read_only):
+        """
+        Open a connection with the shared busy timeout and statement cache.
+        """
+        if read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   timeout=self.busy_timeout,
+                                   cached_statements=self.cached_statements,
+                                   isolation_level=None)
+        else:
+            conn = sqlite3.connect(self.db_path,
+                                   timeout=self.busy_timeout,
+                                   cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        return conn
+
+    def writer(self):
+        """
+        The read-write connection, opened on first use.
+        """
+        if self.write_conn is None:
+            self.write_conn = self.connect(read_only=False)
+            self.leave_wal()
+        return self.write_conn
+
+    def leave_wal(self):
+        """
+        Put a database left in WAL mode (as an earlier version of this
+        module did) back to a rollback journal, folding the WAL into the
+        file.  That needs it to be the only connection; if it is not,
+        the next start tries again.
+        """
+        (mode,) = self.write_conn.execute("PRAGMA journal_mode").fetchone()
+        if mode == "wal":
+            try:
+                self.write_conn.execute("PRAGMA journal_mode = DELETE")
+            except sqlite3.OperationalError:
+                pass
+
+    def reader(self):
+        """
+        The read-only polling connection, opened on first use.
+        It runs in autocommit mode, so every query sees the latest committed data.
+        """
+        if self.read_conn is None:
+            self.writer()  # Out of WAL mode first
+            self.read_conn = self.connect(read_only=True)
+        return self.read_conn
+
+    def fetch(self, query, data=()):
+        """
+        Run a query on the read-only connection and return all its rows.
+        """
+        return self.reader().execute(query, data).fetchall()
+
+    def execute(self, query, data=()):
+        """
+        Run a statement on the read-write connection and commit it.
+        """
+        conn = self.writer()
+        with conn:
+            conn.execute(query, data)
+
+    def data_version(self):
+        """
+        SQLite's data_version for the read-only connection.  It changes
+        whenever any other connection, this manager's writer included,
+        commits a change to the database.
+        """
+        return self.reader().execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """
+        Close both connections.
+        """
+        if self.read_conn is not None:
+            self.read_conn.close()
+            self.read_conn = None
+        if self.write_conn is not None:
+            self.write_conn.close()
+            self.write_conn = None
+
+
+class ChangeDetector:
+    """
+    Tell a poller whether the database has changed since it last looked,
+    so it can skip re-running a query whose answer cannot have changed.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.conn = None
+        self.version = None
+
+    def changed(self):
+        """
+        True if anything was committed since the previous call, and on the first call.
+        Errors count as changes, so the caller's query runs and reports them.
+        """
+        try:
+            version = self.manager.data_version()
+        except sqlite3.Error:
+            self.invalidate()
+            return True
+        # data_version values are only comparable on the same connection
+        conn = self.manager.read_conn
+        changed = conn is not self.conn or version != self.version
+        self.conn = conn
+        self.version = version
+        return changed
+
+    def invalidate(self):
+        """
+        Make the next call to changed() return True.
+        """
+        self.conn = None
+        self.version = None
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Background thread that runs database work off the Tk main loop
+"""
+
+import queue
+import sqlite3
+import sys
+import threading
+import tkinter as tk
+from concurrent.futures import Future
+
+
+class DbJob:
+    """
+    One piece of database work: fn(manager) runs on the worker thread,
+    then callback(result) or errback(exception) runs on the Tk thread.
+    """
+
+    def __init__(self, fn, callback, errback, kind, generation):
+        self.fn = fn
+        self.callback = callback
+        self.errback = errback
+        self.kind = kind
+        self.generation = generation
+        self.future = Future()
+
+
+class DbWorker(threading.Thread):
+    """
+    Thread owning the ConnectionManager's connections.  Jobs run one at
+    a time in the order they were submitted, so writes stay in order
+    with each other and with the reads around them.
+
+    Jobs submitted with a kind (e.g. a periodic refresh) supersede
+    earlier jobs of the same kind: one still waiting when a newer one
+    is queued is skipped, and a result that arrives after a newer one
+    has already been handed back is dropped.
+
+    Results are handed back to the Tk thread with widget.after_idle,
+    which needs a thread-enabled Tcl (as the macOS Python builds are).
+    """
+
+    def __init__(self, widget, manager):
+        super().__init__(name="DbWorker", daemon=True)
+        self.widget = widget
+        self.manager = manager
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.submitted = {}  # kind -> latest generation submitted
+        self.delivered = {}  # kind -> latest generation handed back
+        self.stopping = False
+
+    def submit(self, fn, callback=None, errback=None, kind=None):
+        """
+        Queue fn(manager) to run on the worker thread; return its Future.
+        """
+        with self.lock:
+            generation = self.submitted.get(kind, 0) + 1
+            if kind is not None:
+                self.submitted[kind] = generation
+        job = DbJob(fn, callback, errback, kind, generation)
+        self.jobs.put(job)
+        return job.future
+
+    def call(self, fn):
+        """
+        Run fn(manager) on the worker thread and wait for its result.
+        Only for startup and other places where the UI must wait anyway.
+        """
+        return self.submit(fn).result()
+
+    def superseded(self, job, latest):
+        return job.kind is not None and job.generation < latest.get(job.kind, 0)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            with self.lock:
+                skip = self.superseded(job, self.submitted)
+            if skip:
+                job.future.cancel()
+                continue
+            try:
+                result = job.fn(self.manager)
+            except Exception as e:  # Handed back to the submitter
+                if isinstance(e, sqlite3.Error):
+                    self.manager.close()  # Reconnect on the next job
+                job.future.set_exception(e)
+                self.hand_back(self.deliver_error, job, e)
+            else:
+                job.future.set_result(result)
+                self.hand_back(self.deliver_result, job, result)
+        self.manager.close()
+
+    def hand_back(self, deliver, job, value):
+        """
+        Schedule deliver(job, value) on the Tk thread, unless nobody is listening.
+        """
+        if self.stopping or (job.callback is None and job.errback is None):
+            return
+        try:
+            self.widget.after_idle(deliver, job, value)
+        except (RuntimeError, tk.TclError):
+            pass  # Main loop already gone
+
+    def deliver_result(self, job, result):
+        with self.lock:
+            if self.superseded(job, self.delivered):
+                return
+            if job.kind is not None:
+                self.delivered[job.kind] = job.generation
+        if job.callback is not None:
+            job.callback(result)
+
+    def deliver_error(self, job, e):
+        if job.errback is not None:
+            job.errback(e)
+        else:
+            print(f"Database error in background job: {e}", file=sys.stderr)
+
+    def stop(self, timeout=5.0):
+        """
+        Finish the queued jobs, close the connections and end the thread.
+        """
+        self.stopping = True
+        self.jobs.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+
+if __name__ == "__main__":
+    import time
+    from dbconnection import ConnectionManager
+    from digitalclock import DigitalClock, digital_clock_resolution
+
+    root = tk.Tk()
+    root.title("DB Worker Test")
+    root['bg']='ivory3'
+    root.geometry('320x160')
+
+    digital_clock = DigitalClock(root, digital_clock_resolution, 'slate gray')
+    digital_clock.pack(pady=10)
+    digital_clock.start()
+
+    worker = DbWorker(root, ConnectionManager(':memory:'))
+    worker.start()
+    status = tk.Label(root, text="Idle", bg='ivory3')
+    status.pack()
+
+    def slow_query(manager):
+        time.sleep(2)  # Stands in for a slow query or a locked database
+        return manager.fetch("SELECT sqlite_version()")[0][0]
+
+    def run_slow_query():
+        status.config(text="Querying (the clock should keep ticking)...")
+        worker.submit(slow_query, lambda version: status.config(text=f"SQLite {version}"),
+                      kind="slow")
+
+    tk.Button(root, text="Run a 2 s query", command=run_slow_query).pack(pady=5)
+    root.mainloop()
+    worker.stop()
@@ -6,9 +6,11 @@ Run a session management module for Carolina Card Club
 
 import tkinter as tk
 import datetime
+import time
 from zoneinfo import ZoneInfo
 from enum import Enum
 from inputpopup import *
+from sessionformat import clock_text
 
 local_tz = ZoneInfo("America/New_York")
 
@@ -21,13 +23,108 @@ digital_clock_resolution = ClockResolution.SECONDS
 
 HICKORY_CLICKABLE_CLOCK = True
 
+# A wake-up that finds the wall clock this far from where the monotonic
+# clock says it should be (an NTP step, a sleep) re-anchors the schedule
+CLOCK_STEP_TOLERANCE_SECONDS = 0.25
+
+
+class TickScheduler:
+    """
+    One after() chain for everything that updates periodically.
+    It wakes once per wall-clock second boundary and calls, in one pass,
+    every subscriber due at that boundary: each asks for a cadence in
+    whole seconds, kept aligned to the wall clock (every=60 runs on
+    the minute, every=10 at :00, :10, ...).
+
+    Wake-ups are timed on the monotonic clock from an anchor on the wall
+    clock, so lateness never accumulates: each delay is aimed at the
+    next boundary itself, a wake-up that comes early (after() rounds to
+    whole milliseconds) waits out the rest, and one that comes more
+    than a second late calls each subscriber once, not once per
+    boundary missed.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.subscribers = {}      # handle -> [callback, every, due epoch]
+        self.next_handle = 1
+        self.next_update = None
+        self.offset = None         # Wall-clock minus monotonic seconds
+        self.tick_epoch = None     # The boundary the scheduled wake-up aims at
+        self.tick_listener = None  # Called with each wake-up's lateness, in ms
+
+    def subscribe(self, callback, every=1):
+        """
+        Call callback(epoch) at every wall-clock epoch divisible by every.
+        Return a handle for unsubscribe.
+        """
+        handle = self.next_handle
+        self.next_handle += 1
+        self.subscribers[handle] = [callback, every, (int(time.time()) // every + 1) * every]
+        return handle
+
+    def unsubscribe(self, handle):
+        """
+        Stop calling a subscriber; when the last one leaves, stop the
+        after() chain too, so nothing is left scheduled at exit.
+        """
+        self.subscribers.pop(handle, None)
+        if not self.subscribers:
+            self.stop()
+
+    def start(self):
+        if self.next_update is None:
+            self.anchor()
+            self.schedule()
+
+    def stop(self):
+        if self.next_update:
+            self.widget.after_cancel(self.next_update)
+            self.next_update = None
+
+    def anchor(self):
+        self.offset = time.time() - time.monotonic()
+
+    def schedule(self):
+        """Aim the next wake-up at the first boundary after now."""
+        wall = time.monotonic() + self.offset
+        self.tick_epoch = int(wall) + 1
+        self.wait_until(self.tick_epoch)
+
+    def wait_until(self, epoch):
+        delay_in_milliseconds = max(round((epoch - time.monotonic() - self.offset) * 1000), 1)
+        self.next_update = self.widget.after(delay_in_milliseconds, self.tick)
+
+    def tick(self):
+        if abs(time.monotonic() + self.offset - time.time()) > CLOCK_STEP_TOLERANCE_SECONDS:
+            # The wall clock was stepped: start over from it, and call everyone now
+            self.anchor()
+            self.tick_epoch = int(time.time())
+            for subscriber in self.subscribers.values():
+                subscriber[2] = self.tick_epoch
+        wall = time.monotonic() + self.offset
+        if wall < self.tick_epoch:
+            self.wait_until(self.tick_epoch)  # Woke early
+            return
+        late_ms = (wall - self.tick_epoch) * 1000
+        epoch = int(wall)
+        self.schedule()  # Before the subscribers, so one that raises cannot stop the chain
+        if self.tick_listener is not None:
+            self.tick_listener(late_ms)
+        for subscriber in list(self.subscribers.values()):
+            (callback, every, due) = subscriber
+            if epoch >= due:
+                subscriber[2] = (epoch // every + 1) * every
+                callback(epoch)
+
+
 class DigitalClock(tk.Label):
     """
        Label specialized to show time
        and allow interaction to reset clock
     """
 
-    def __init__(self, parent, resolution, bgcolor):
+    def __init__(self, parent, resolution, bgcolor, scheduler=None):
         super().__init__(parent,
                          font=('Arial', 20),
                          background=bgcolor, foreground='light gray',
@@ -50,56 +147,33 @@ class DigitalClock(tk.Label):
         if HICKORY_CLICKABLE_CLOCK:
             self.bind('<Button-1>', self.reset_clock)
         self.clock_offset = 0
-        self.running = False
+        # Shared with anything else that updates periodically (e.g. the session list)
+        self.scheduler = scheduler if scheduler is not None else TickScheduler(self)
+        self.subscription = None
+        self.shown_text = None
         self.update_time()
 
-    def update_time(self):
+    def update_time(self, _epoch=None):
         """
-        Updates the digital_clock label with the current time.
+        Updates the digital_clock label with the current time,
+        if its text has changed.
         """
-
-        # Get the current time and format it
-
-        self.config(text=self.now())  # Update the label's text
-
-        one_millisecond_in_microseconds = 1000
-        one_second_in_milliseconds = 1000
-
-
-        # Get the current datetime object
-        current_datetime = datetime.datetime.now(local_tz)
-
-        # Extract the microseconds
-        current_time_in_microseconds = current_datetime.microsecond
-
-        # Round to milliseconds
-        current_time_in_milliseconds = ( ( current_time_in_microseconds
-                                           + (one_millisecond_in_microseconds // 2) )
-                                         // one_millisecond_in_microseconds )
-
-        # Compute the next tick
-        next_tick_time_in_seconds    = ( ( current_time_in_milliseconds
-                                           + one_second_in_milliseconds)
-                                         // one_second_in_milliseconds )
-
-        # Delay for that in milliseconds
-        delay_in_milliseconds = max ( ( next_tick_time_in_seconds * one_second_in_milliseconds )
-                                         -  current_time_in_milliseconds ,
-                                      1 )
-
-        # Schedule the update_time function to run again after 1000 milliseconds (1 second)
-        if self.running:
-            if self.next_update:
-                self.after_cancel(self.next_update)
-            self.next_update = self.after(delay_in_milliseconds, self.update_time)
-        else:
-            self.next_update = None
+        text = self.now()
+        if text != self.shown_text:
+            self.config(text=text)  # Update the label's text
+            self.shown_text = text
 
     def start(self):
         """
         Start the clock running
         """
-        self.running = True
+        if self.subscription is None:
+            # Every second even in MINUTES resolution: the minute shown turns
+            # over with clock_offset, which need not be a whole minute, so a
+            # wake-up on the wall clock's minute could show it up to 59 s off.
+            # update_time leaves the label alone until its text changes.
+            self.subscription = self.scheduler.subscribe(self.update_time, every=1)
+        self.scheduler.start()
         self.update_time()
 
     def cancel_updating(self):
@@ -107,10 +181,9 @@ class DigitalClock(tk.Label):
         Stop the clock updating.
         Do this before stopping the program to avoid a messy error on sys.exiting.
         """
-        self.running = False
-        if self.next_update:
-            self.after_cancel(self.next_update)
-            self.next_update = None
+        if self.subscription is not None:
+            self.scheduler.unsubscribe(self.subscription)
+            self.subscription = None
 
     def reset_clock(self, event):
         """
@@ -155,7 +228,7 @@ class DigitalClock(tk.Label):
         """
         Get the current time in the current digital clock time format
         """
-        return self.now_datetime().strftime("%Y-%m-%d "+self.digital_clock_time_format)
+        return clock_text(self.now_datetime(), self.resolution is ClockResolution.SECONDS)
 
 
     def today_at_1930(self):
@@ -188,5 +261,6 @@ if __name__ == "__main__":
     digital_clock.pack(pady=40)
 
     digital_clock.start()
+    digital_clock.scheduler.subscribe(lambda epoch: print("Every 10 s:", epoch), every=10)
 
     root.mainloop()
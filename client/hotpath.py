@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Per-phase timing of the session app's hot paths, with a rotating JSONL log
+and an optional p50/p95/p99 overlay
+"""
+
+import collections
+import json
+import logging
+import logging.handlers
+import threading
+import time
+import tkinter as tk
+
+HOT_PATH_SAMPLES = 600          # Per phase: ten minutes of once-a-second samples
+HOT_PATH_LOG_BYTES = 1_000_000  # Per log file, before it rotates
+HOT_PATH_LOG_BACKUPS = 3
+HOT_PATH_OVERLAY_MS = 2000      # How often the overlay redraws
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+
+class HotPathStats:
+    """
+    The last HOT_PATH_SAMPLES durations of each phase, in milliseconds,
+    recorded from either the Tk thread or the DB worker.
+    Each record also goes to the JSONL log, if one is open.
+    """
+
+    def __init__(self, samples=HOT_PATH_SAMPLES):
+        self.lock = threading.Lock()
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=samples))
+        self.logger = None
+
+    def open_log(self, path, max_bytes=HOT_PATH_LOG_BYTES, backups=HOT_PATH_LOG_BACKUPS):
+        """Append one JSON object per record to path, rotating it at max_bytes."""
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes,
+                                                       backupCount=backups)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger = logging.getLogger(f"ccc.hot_path.{path}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(handler)
+
+    def close_log(self):
+        if self.logger is not None:
+            for handler in list(self.logger.handlers):
+                handler.close()
+                self.logger.removeHandler(handler)
+            self.logger = None
+
+    def record(self, event, **phases_ms):
+        """
+        Record one event's phases, e.g. record("redraw", format=1.2, render=3.4, rows=40).
+        Numbers named rows are logged but not timed.
+        """
+        with self.lock:
+            for (phase, ms) in phases_ms.items():
+                if phase != "rows":
+                    self.samples[f"{event}.{phase}"].append(ms)
+        if self.logger is not None:
+            entry = {"t": round(time.time(), 3), "event": event}
+            entry.update((phase, round(ms, 3)) for (phase, ms) in phases_ms.items())
+            self.logger.info(json.dumps(entry))
+
+    def summary(self):
+        """{phase: (p50, p95, p99, count)} over the samples held."""
+        with self.lock:
+            snapshot = {phase: sorted(samples) for (phase, samples) in self.samples.items() if samples}
+        return {phase: (percentile(samples, 0.50), percentile(samples, 0.95),
+                        percentile(samples, 0.99), len(samples))
+                for (phase, samples) in snapshot.items()}
+
+
+class PhaseClock:
+    """
+    Split one pass through a hot path into phases:
+        phases = PhaseClock()
+        ...query...;  phases.lap("query")
+        ...format...; phases.lap("format")
+    then phases.ms is {"query": ..., "format": ...}.
+    """
+
+    def __init__(self):
+        self.ms = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.ms[phase] = (now - self.last) * 1000
+        self.last = now
+        return self
+
+
+class HotPathOverlay(tk.Label):
+    """
+    Label showing p50/p95/p99 of every phase, redrawn every HOT_PATH_OVERLAY_MS.
+    """
+
+    def __init__(self, parent, stats, bgcolor="black"):
+        super().__init__(parent, font=("Courier", 10), justify=tk.LEFT, anchor="w",
+                         background=bgcolor, foreground="light green")
+        self.stats = stats
+        self.scheduler = None
+        self.next_update = None  # after() id, or subscription handle on scheduler
+
+    def start(self, scheduler=None):
+        """
+        Redraw every HOT_PATH_OVERLAY_MS, on a digitalclock.TickScheduler
+        if given, else on its own after() chain.
+        """
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.next_update = scheduler.subscribe(lambda _epoch: self.redraw(),
+                                                   max(HOT_PATH_OVERLAY_MS // 1000, 1))
+            self.redraw()
+        else:
+            self.update_summary()
+
+    def cancel_updating(self):
+        if self.next_update:
+            if self.scheduler is not None:
+                self.scheduler.unsubscribe(self.next_update)
+            else:
+                self.after_cancel(self.next_update)
+            self.next_update = None
+
+    def redraw(self):
+        lines = [f"{'ms':<22}{'p50':>8}{'p95':>8}{'p99':>8}{'n':>6}"]
+        for (phase, (p50, p95, p99, count)) in sorted(self.stats.summary().items()):
+            lines.append(f"{phase:<22}{p50:>8.2f}{p95:>8.2f}{p99:>8.2f}{count:>6}")
+        self.config(text="\n".join(lines))
+
+    def update_summary(self):
+        self.redraw()
+        self.next_update = self.after(HOT_PATH_OVERLAY_MS, self.update_summary)
+
+
+hot_path = HotPathStats()
+
+
+if __name__ == "__main__":
+    import random
+
+    root = tk.Tk()
+    root.title("Hot Path Overlay Test")
+    overlay = HotPathOverlay(root, hot_path)
+    overlay.pack(fill=tk.BOTH, expand=True)
+    overlay.start()
+
+    def fake_refresh():
+        phases = PhaseClock()
+        time.sleep(random.uniform(0.001, 0.004))
+        phases.lap("format")
+        time.sleep(random.uniform(0.002, 0.010))
+        phases.lap("render")
+        hot_path.record("redraw", rows=40, **phases.ms)
+        root.after(100, fake_refresh)
+
+    fake_refresh()
+    root.mainloop()
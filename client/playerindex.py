@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Sorted prefix index over player names and nicknames, for type-ahead search
+"""
+
+import bisect
+
+
+def search_terms(*names):
+    """
+    The casefolded strings a player can be found by: each name in full,
+    and from the start of each later word in it ("smith" for "John Smith").
+    """
+    terms = set()
+    for name in names:
+        if not name:
+            continue
+        words = name.casefold().split()
+        for i in range(len(words)):
+            terms.add(" ".join(words[i:]))
+    return terms
+
+
+class PlayerIndex:
+    """
+    Players in display order, with a sorted list of (term, position)
+    for finding every player whose Name or NickName has a word starting
+    with a typed prefix: one bisect, then a walk over just the matches.
+
+    players is a sequence of (Player_Id, display name, balance) rows
+    in the order to show them; names maps Player_Id to (Name, NickName).
+    """
+
+    def __init__(self, players, names=None):
+        self.players = list(players)
+        self.by_id = {player[0]: player for player in self.players}
+        entries = []
+        for (position, (player_id, display_name, _balance)) in enumerate(self.players):
+            (name, nickname) = (names or {}).get(player_id, (display_name, None))
+            for term in search_terms(display_name, name, nickname):
+                entries.append((term, position))
+        entries.sort()
+        self.terms = [term for (term, _position) in entries]
+        self.positions = [position for (_term, position) in entries]
+
+    def __len__(self):
+        return len(self.players)
+
+    def matching_positions(self, prefix):
+        """Display positions of the players matching prefix, in display order."""
+        words = prefix.casefold().split()
+        if not words:
+            return range(len(self.players))
+        # A trailing space means the last word is complete
+        prefix = " ".join(words) + (" " if prefix[-1].isspace() else "")
+        start = bisect.bisect_left(self.terms, prefix)
+        # Every term starting with prefix sorts before prefix + the highest character
+        stop = bisect.bisect_left(self.terms, prefix + "\U0010ffff", start)
+        return sorted(set(self.positions[start:stop]))
+
+    def matching(self, prefix):
+        """The (Player_Id, display name, balance) rows matching prefix, in display order."""
+        return [self.players[position] for position in self.matching_positions(prefix)]
+
+    def player(self, player_id):
+        return self.by_id.get(player_id)
+
+
+if __name__ == "__main__":
+    index = PlayerIndex([(1, "Ace", 0), (2, "John Smith", -20), (3, "Jane Smithers", 15)],
+                        {1: ("Alice Cooper", "Ace"), 2: ("John Smith", None), 3: ("Jane Smithers", None)})
+    for prefix in ("", "j", "smith", "smithe", "coop", "ace", "x"):
+        print(f"{prefix!r:>9} -> {[name for (_id, name, _balance) in index.matching(prefix)]}")
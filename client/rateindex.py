@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Sorted interval index over the Rate_Intervals, for the rate in force at an epoch
+"""
+
+# Player_Selection_List, Payment_Rate_List and Payment_Rate_Interval_Id_List
+# find the rate in force with a range join on every row (Epoch >= Start_Epoch
+# AND (Epoch <= Stop_Epoch OR Stop_Epoch IS NULL OR Stop_Epoch = 0)), which
+# tries every interval of the category, and more every time the rates change.
+# Here each Player_Category_Id's intervals (through Category_Rate_Interval,
+# as in the views) and each Rate_Group_Id's are cut once into consecutive,
+# non-overlapping segments, each naming the interval in force, so a lookup
+# is one bisect.  Where intervals overlap, the one starting latest is in
+# force; where none is, there is no rate.  Both are listed by problems().
+
+import bisect
+import collections
+import heapq
+
+RATE_INTERVALS_QUERY = """
+SELECT ri.Rate_Interval_Id, ri.Rate_Group_Id, ri.Start_Epoch, ri.Stop_Epoch, r.Rate, r.Description
+FROM Rate_Interval as ri
+JOIN Rate as r ON ri.Rate_Id = r.Rate_Id
+"""
+CATEGORY_RATE_INTERVALS_QUERY = "SELECT Player_Category_Id, Rate_Interval_Id FROM Category_Rate_Interval"
+PLAYER_CATEGORIES_QUERY = "SELECT Player_Id, Player_Category_Id FROM Player"
+
+# stop_epoch is the last second the rate is in force, None if open-ended
+RateInterval = collections.namedtuple(
+    "RateInterval", "rate_interval_id start_epoch stop_epoch rate description")
+
+
+class IntervalIndex:
+    """
+    One category's or rate group's intervals as consecutive segments:
+    from starts[i] until starts[i + 1], intervals[i] is in force (None
+    in a gap).  overlaps lists the pairs of intervals that overlap, and
+    gaps the (first, last) epochs between intervals with none in force.
+    """
+
+    def __init__(self, intervals):
+        by_start = sorted(intervals, key=lambda interval: (interval.start_epoch, interval.rate_interval_id))
+        self.overlaps = []
+        self.gaps = []
+        furthest = None  # The interval seen so far that stops last
+        for interval in by_start:
+            if furthest is not None:
+                if furthest.stop_epoch is None or interval.start_epoch <= furthest.stop_epoch:
+                    self.overlaps.append((furthest, interval))
+                elif interval.start_epoch > furthest.stop_epoch + 1:
+                    self.gaps.append((furthest.stop_epoch + 1, interval.start_epoch - 1))
+            if (furthest is None or
+                    (furthest.stop_epoch is not None and
+                     (interval.stop_epoch is None or interval.stop_epoch > furthest.stop_epoch))):
+                furthest = interval
+
+        # Sweep the points where anything starts or stops, keeping the
+        # intervals started so far on a heap, latest start on top, and
+        # dropping the ones found stopped when they reach the top
+        points = sorted({interval.start_epoch for interval in by_start} |
+                        {interval.stop_epoch + 1 for interval in by_start if interval.stop_epoch is not None})
+        self.starts = []
+        self.intervals = []
+        started = []
+        next_interval = 0
+        for point in points:
+            while next_interval < len(by_start) and by_start[next_interval].start_epoch <= point:
+                interval = by_start[next_interval]
+                heapq.heappush(started, (-interval.start_epoch, -interval.rate_interval_id, interval))
+                next_interval += 1
+            while started and started[0][2].stop_epoch is not None and started[0][2].stop_epoch < point:
+                heapq.heappop(started)
+            in_force = started[0][2] if started else None
+            if not self.intervals or self.intervals[-1] is not in_force:
+                self.starts.append(point)
+                self.intervals.append(in_force)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def at(self, epoch):
+        """The RateInterval in force at epoch, or None."""
+        i = bisect.bisect_right(self.starts, epoch) - 1
+        return self.intervals[i] if i >= 0 else None
+
+    def at_each(self, epochs):
+        """at() of each of epochs, in order."""
+        (starts, intervals, find) = (self.starts, self.intervals, bisect.bisect_right)
+        return [intervals[i - 1] if i else None for i in (find(starts, epoch) for epoch in epochs)]
+
+
+NO_INTERVALS = IntervalIndex([])
+
+
+class RateIndex:
+    """
+    The rate history by Player_Category_Id and by Rate_Group_Id, and
+    each player's category, from RATE_INTERVALS_QUERY,
+    CATEGORY_RATE_INTERVALS_QUERY and PLAYER_CATEGORIES_QUERY rows.
+    """
+
+    def __init__(self, rate_intervals, category_rate_intervals, player_categories=()):
+        intervals = {}
+        by_group = collections.defaultdict(list)
+        for (rate_interval_id, group_id, start_epoch, stop_epoch, rate, description) in rate_intervals:
+            interval = RateInterval(rate_interval_id, start_epoch, stop_epoch or None, rate, description)
+            intervals[rate_interval_id] = interval
+            if group_id is not None:
+                by_group[group_id].append(interval)
+        by_category = collections.defaultdict(list)
+        for (category_id, rate_interval_id) in category_rate_intervals:
+            if rate_interval_id in intervals:
+                by_category[category_id].append(intervals[rate_interval_id])
+        self.groups = {group_id: IntervalIndex(group) for (group_id, group) in by_group.items()}
+        self.categories = {category_id: IntervalIndex(category)
+                           for (category_id, category) in by_category.items()}
+        self.player_categories = dict(player_categories)
+
+    def interval(self, category_id, epoch):
+        """The RateInterval in force for category_id at epoch, or None."""
+        return self.categories.get(category_id, NO_INTERVALS).at(epoch)
+
+    def intervals(self, category_id, epochs):
+        """interval() at each of epochs."""
+        return self.categories.get(category_id, NO_INTERVALS).at_each(epochs)
+
+    def group_interval(self, group_id, epoch):
+        """The RateInterval in force for rate group group_id at epoch, or None."""
+        return self.groups.get(group_id, NO_INTERVALS).at(epoch)
+
+    def group_intervals(self, group_id, epochs):
+        return self.groups.get(group_id, NO_INTERVALS).at_each(epochs)
+
+    def rate(self, category_id, epoch):
+        """The hourly rate for category_id at epoch, or None if none is in force."""
+        interval = self.interval(category_id, epoch)
+        return None if interval is None else interval.rate
+
+    def player_rate(self, player_id, epoch):
+        """The hourly rate for player_id's category at epoch, or None."""
+        return self.rate(self.player_categories.get(player_id), epoch)
+
+    def knows_player(self, player_id):
+        return player_id in self.player_categories
+
+    def problems(self):
+        """A message for each overlap and gap in a category's or rate group's intervals."""
+        messages = []
+        for (kind, indexes) in (("Player_Category_Id", self.categories), ("Rate_Group_Id", self.groups)):
+            for (key, index) in sorted(indexes.items()):
+                for (first, second) in index.overlaps:
+                    messages.append(f"{kind} {key}: Rate_Intervals {first.rate_interval_id} and "
+                                    f"{second.rate_interval_id} overlap")
+                for (first, last) in index.gaps:
+                    messages.append(f"{kind} {key}: no Rate_Interval from epoch {first} to {last}")
+        return messages
+
+
+def fetch_rate_index(manager):
+    """Build a RateIndex from the database, on the DB worker thread."""
+    return RateIndex(manager.fetch(RATE_INTERVALS_QUERY),
+                     manager.fetch(CATEGORY_RATE_INTERVALS_QUERY),
+                     manager.fetch(PLAYER_CATEGORIES_QUERY))
+
+
+if __name__ == "__main__":
+    index = RateIndex([(1, 3, 100, 199, 5, "OG Regular"), (2, 3, 200, 0, 6, "Regular"),
+                       (3, 2, 100, 249, 3, "OG Reduced"), (4, 2, 200, 299, 4, "Reduced"),
+                       (5, 2, 400, 0, 4, "Reduced")],
+                      [(5, 1), (5, 2), (4, 3), (4, 4), (4, 5)], [(7, 5), (8, 4)])
+    print([index.player_rate(7, epoch) for epoch in (99, 100, 199, 200, 10**10)])
+    print([interval and interval.rate_interval_id for interval in index.intervals(4, [150, 225, 350, 500])])
+    print("\n".join(index.problems()))
@@ -12,17 +12,58 @@ import datetime
 from datetime import timezone
 from zoneinfo import ZoneInfo
 import time
+import os
 from enum import Enum
 import locale
 import sys
 from inputpopup import *
 from digitalclock import *
+from treeviewsync import KeyedTreeview
+from dbconnection import ConnectionManager, ChangeDetector
+from dbworker import DbWorker
+from sessionhistory import SessionHistory, NEWEST, fetch_older, fetch_newer
+from playerindex import PlayerIndex
+from rateindex import fetch_rate_index
+from hotpath import hot_path, PhaseClock, HotPathOverlay
+from changefeed import ChangeSubscriber, publish
+from sessionformat import session_row, local_time, strip_time, currency_text
+from sessionengine import (session_start_epoch, session_stop_epoch, player_click_action,
+                           running_session_id, merge_player_sessions,
+                           START_SESSION, REQUEST_PAYMENT)
 
 
 #Useful color chart at
 #https://cs111.wellesley.edu/archive/cs111_fall14/public_html/labs/lab12/tkintercolor.html
 CAROLINA_BLUE_HEX = "#4B9CD3"
 
+# Update the session list in place, row by row, keyed by Session_Id,
+# rather than deleting and re-inserting every row on every refresh.
+KEYED_SESSION_REDRAW = True
+
+# Time the session list's query, formatting and treeview update, and the
+# clock's lateness, always for the overlay, and into a rotating JSONL log
+# only when CCC_HOT_PATH_LOG names one (e.g. CCC_HOT_PATH_LOG=hot_path.jsonl).
+# F12 shows and hides their p50/p95/p99; HOT_PATH_OVERLAY shows them from the start.
+HOT_PATH_LOG_FILE = os.environ.get("CCC_HOT_PATH_LOG") or None
+HOT_PATH_OVERLAY = False
+
+# Writers publish each session change on the local change feed
+# (changefeed.py), and the session list re-fetches just that player's
+# sessions at once.  The list still checks PRAGMA data_version every
+# second, feed or no feed, since the Dart server and the tablets write
+# to the database without publishing.
+CHANGE_FEED = True
+
+PLAYER_SELECTION_QUERY = "SELECT Player_Id, Name, Balance FROM Player_Selection_List"
+PLAYER_NAMES_QUERY = "SELECT Player_Id, Name, NickName FROM Player"
+
+SESSION_PANEL_QUERY = """
+SELECT Session_Id, Player_Id, Name, Start_Epoch, Stop_Epoch,
+       Duration_In_Seconds, Amount, Balance, Rate
+FROM Session_Panel_List
+"""
+PLAYER_SESSIONS_QUERY = SESSION_PANEL_QUERY + "WHERE Player_Id = ?"
+
 
 root = tk.Tk()
 
@@ -31,51 +72,35 @@ exit_code = 0
 # Set the locale (example for US English)
 locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
 
-def fetch_data_from_db(query):
+db = ConnectionManager('CarolinaCardClub.db')
+
+# All database access runs on this thread, so a slow query
+# or a locked file never stalls the Tk main loop.
+db_worker = DbWorker(root, db)
+db_worker.start()
+
+if HOT_PATH_LOG_FILE:
+    hot_path.open_log(HOT_PATH_LOG_FILE)
+
+def show_db_error(e):
     """
-    Fetches data from the Carolina Card Club database.
+    Report a database error from a background job.
     """
-    conn = None
-    try:
-        conn = sqlite3.connect('CarolinaCardClub.db')
-        cursor = conn.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-        return data
-    except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error fetching data: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
-
-def send_data_to_db(query,data):
+    messagebox.showerror("Database Error", f"Database error: {e}")
+
+def send_data_to_db(query,data,change=None):
     """
     Sends data to the Carolina Card Club database.
+    Queued on the DB worker behind any earlier writes; does not wait.
+    Once written, change (e.g. {"event": "session_stopped", "player_id": 3})
+    is published on the change feed.
     """
-    conn = None
-    try:
-        conn = sqlite3.connect('CarolinaCardClub.db')
-        cursor = conn.cursor()
-        cursor.execute(query, data)
-        conn.commit()
-    except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Error sending data: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def strip_time(time_string):
-    return (datetime.datetime.strptime(time_string, "%Y-%m-%d %H:%M:%S.000")
-                             .strftime("%-m/%d %H:%M"))
-
-
-def local_time(epoch):
-    dt_object_local = datetime.datetime.fromtimestamp(epoch)
-    # Format the datetime object into a human-readable string
-    # Customize the format using strftime codes (similar to SQLite)
-    formatted_time = dt_object_local.strftime('%-m/%d %H:%M')
-    return formatted_time
+    def write(manager):
+        manager.execute(query, data)
+        if change is not None:
+            publish(**change)
+    db_worker.submit(write, errback=show_db_error)
+
 
 def create_carolina_font():
     """
@@ -102,6 +127,13 @@ class PlayerNameSelector(tk.Frame):
         super().__init__(parent)
         self['bg'] = CAROLINA_BLUE_HEX
         self.id_and_name_list = None
+        self.player_index = PlayerIndex([])
+        self.shown_player_ids = []  # Player_Id of each listbox line
+        self.search_text = tk.StringVar(self)
+        self.search_entry = tk.Entry(self, textvariable=self.search_text)
+        self.search_entry.bind('<Escape>', lambda _event: self.search_text.set(''))
+        self.search_text.trace_add('write', lambda *_args: self.show_matching_players())
+        self.search_entry.pack(padx=5, pady=(5,0), fill=tk.X)
         self.listbox = tk.Listbox(self, selectmode=tk.SINGLE)
         self.listbox['bg'] = CAROLINA_BLUE_HEX
         self.regular_clickedfn = regular_clickedfn
@@ -112,28 +144,50 @@ class PlayerNameSelector(tk.Frame):
 
     def refresh_id_and_name_list(self):
         """
-        Fill out the list of players if possible.
+        Fill out the list of players if possible,
+        and index their names and nicknames for the search box.
         """
-        self.listbox.delete(0,tk.END)
-        self.id_and_name_list = fetch_data_from_db("SELECT * FROM Player_Selection_List")
+        try:
+            (self.id_and_name_list, player_names) = db_worker.call(
+                lambda manager: (manager.fetch(PLAYER_SELECTION_QUERY),
+                                 manager.fetch(PLAYER_NAMES_QUERY)))
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Error fetching data: {e}")
+            self.id_and_name_list = []
+            player_names = []
         if not self.id_and_name_list:
             messagebox.showinfo("No Data", "No items found in the database.")
             return None
-        names = [item[1] for item in self.id_and_name_list] # Extract the names into a list
-        for item in names:
-            self.listbox.insert(tk.END, item)
-        self.listbox.selection_clear(0,tk.END)
+        self.player_index = PlayerIndex(self.id_and_name_list,
+                                        {player_id: (name, nickname)
+                                         for (player_id, name, nickname) in player_names})
+        self.shown_player_ids = None  # Redraw, even if the same players match
+        self.show_matching_players()
         return self
 
+    def show_matching_players(self):
+        """
+        Narrow the listbox to the players matching the search box.
+        """
+        players = self.player_index.matching(self.search_text.get())
+        player_ids = [player[0] for player in players]
+        if player_ids == self.shown_player_ids:
+            return
+        self.shown_player_ids = player_ids
+        self.listbox.delete(0,tk.END)
+        if players:
+            self.listbox.insert(tk.END, *(name for (_player_id, name, _balance) in players))
+        self.listbox.selection_clear(0,tk.END)
+
     def on_player_name_clicked(self, event, clickedfn):
         """
         Player selected by clicking.
         """
         selected_index = self.listbox.nearest(event.y)
-        if selected_index is not None:
+        if selected_index is not None and 0 <= selected_index < len(self.shown_player_ids or []):
             self.listbox.selection_clear(0,tk.END)
             self.listbox.selection_set(selected_index) # ctrl-click won't select
-            (player_id, name, balance) = self.id_and_name_list[selected_index]
+            (player_id, name, balance) = self.player_index.player(self.shown_player_ids[selected_index])
             clickedfn(self.listbox, player_id, name, balance)
 
     def on_player_name_clicked_lambda(self, clickedfn):
@@ -151,6 +205,16 @@ class SessionView(tk.Frame):
     def __init__(self, parent, digital_clock):
         super().__init__(parent)
         self.digital_clock = digital_clock
+
+        # "current" sessions refresh every second;
+        # "history" pages back through every session as the list is scrolled
+        self.mode = tk.StringVar(self, value="current")
+        self.mode_bar = tk.Frame(self)
+        for (mode, label) in (("current", "Current"), ("history", "History")):
+            tk.Radiobutton(self.mode_bar, text=label, value=mode, variable=self.mode,
+                           command=self.on_mode_changed).pack(side=tk.LEFT)
+        self.mode_bar.pack(side=tk.TOP, anchor="w")
+
         self.treeview = ttk.Treeview(self,
                          columns=("Column1",
                                   "Column2",
@@ -175,10 +239,13 @@ class SessionView(tk.Frame):
         self.treeview.tag_configure("red_item", background="red", foreground="white")  # Red background, white text
         self.treeview.tag_configure("green_item", background="green", foreground="black") # Green background, black text
         self.treeview.tag_configure("bold_text", font=('Courier', 14, 'bold')) # You can apply other styling like bolding
-        self.treeview.pack(padx=5,pady=5, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.treeview.yview)
+        self.treeview.configure(yscrollcommand=self.on_treeview_scrolled)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.treeview.pack(side=tk.LEFT, padx=5,pady=5, fill=tk.BOTH, expand=True)
 
-        self.next_update = None
-        self.updating = True
+        self.tick_subscription = None  # On the digital clock's TickScheduler
+        self.updating = False
 
         self.regular_clickedfn = self.session_clickedfn
         self.treeview.bind('<ButtonRelease-1>', self.on_session_clicked_lambda(self.regular_clickedfn))
@@ -187,6 +254,15 @@ class SessionView(tk.Frame):
 
         self.selected_session_id = None
         self.session_list = None
+        self.sessions_by_id = {}
+        self.keyed_treeview = KeyedTreeview(self.treeview)
+        self.db_changes = ChangeDetector(db)   # Used on the DB worker thread only
+        self.starting_player_ids = set()
+        self.history = SessionHistory()
+        self.history_loading = False
+        self.change_feed = None
+        self.rate_index = None       # Loaded at startup, re-read in the background on changes
+        self.rate_problems = None
 
 
 
@@ -195,32 +271,31 @@ class SessionView(tk.Frame):
         Session selected by clicking.
         """
         selected_index = self.treeview.identify_row(event.y)
-        if selected_index is  None:
+        if not selected_index:
             return
 
-        tree_ids = self.treeview.get_children()
-        if tree_ids is None or self.session_list is None:
+        session = self.sessions_by_id.get(int(selected_index))
+        if session is None:
             return
 
-        for (tree_id, session) in zip(tree_ids, self.session_list):
-            if tree_id == selected_index:
-                self.treeview.selection_clear()
-                self.treeview.selection_set(selected_index) # ctrl-click won't select
-                item_data = self.treeview.item(tree_id)
-                (_item_player_name,
-                 _session_start_epoch_string,
-                 _effective_session_stop_epoch_string,
-                 session_duration_string,
-                 session_amount_string,
-                 session_balance_string) = item_data['values']
-                (session_id, session_player_id, session_player_name,
-                 session_start_epoch, session_stop_epoch,
-                 session_duration_in_seconds, session_amount, session_balance) = session
-                self.selected_session_id = session_id
-                clickedfn(session_id, session_player_id, session_player_name,
-                          session_start_epoch, session_stop_epoch,
-                          session_duration_string, session_amount_string,
-                          session_balance)
+        self.treeview.selection_clear()
+        self.treeview.selection_set(selected_index) # ctrl-click won't select
+        item_data = self.treeview.item(selected_index)
+        (_item_player_name,
+         _session_start_epoch_string,
+         _effective_session_stop_epoch_string,
+         session_duration_string,
+         session_amount_string,
+         _session_balance_string) = item_data['values']
+        (session_id, session_player_id, session_player_name,
+         session_start_epoch, session_stop_epoch,
+         _session_duration_in_seconds, _session_amount, session_balance,
+         _session_rate) = session
+        self.selected_session_id = session_id
+        clickedfn(session_id, session_player_id, session_player_name,
+                  session_start_epoch, session_stop_epoch,
+                  session_duration_string, session_amount_string,
+                  session_balance)
 
     def on_session_clicked_lambda(self, clickedfn):
         """
@@ -229,60 +304,233 @@ class SessionView(tk.Frame):
         return lambda event: self.on_session_clicked(event,clickedfn)
 
 
+    def in_history_mode(self):
+        return self.mode.get() == "history"
+
+    def on_mode_changed(self):
+        """
+        Switch the list between the current sessions, refreshed every
+        second, and the history, fetched a page at a time and not refreshed.
+        """
+        self.keyed_treeview.clear()
+        self.history.reset()
+        if self.in_history_mode():
+            self.cancel_updating()
+            self.load_history("reload")
+        else:
+            self.sessions_by_id = {session[0]: session for session in self.session_list or []}
+            self.start()
+
+    def on_treeview_scrolled(self, first, last):
+        """
+        Track the treeview's scrolling in the scrollbar, and in history
+        mode fetch another page when it nears either end of the window.
+        """
+        self.scrollbar.set(first, last)
+        if not self.in_history_mode() or self.history_loading:
+            return
+        if float(last) > 0.9 and not self.history.at_oldest:
+            self.load_history("older")
+        elif float(first) < 0.1 and not self.history.at_newest:
+            self.load_history("newer")
+
+    def load_history(self, direction):
+        """
+        Have the DB worker fetch a page of history "older" or "newer"
+        than the window, or "reload" the whole window after a write.
+        """
+        history = self.history
+        if direction == "older":
+            (fetch, cursor, count) = (fetch_older, history.older_cursor(), history.page_size)
+        elif direction == "newer":
+            (fetch, cursor, count) = (fetch_newer, history.newer_cursor(), history.page_size)
+        else:
+            (fetch, cursor, count) = (fetch_older, history.reload_cursor(),
+                                      max(len(history.rows), history.page_size))
+        self.history_loading = True
+
+        def received(page):
+            self.history_loading = False
+            if not self.in_history_mode():
+                return
+            shift = 0
+            if direction == "older":
+                shift = -history.add_older(page)  # Keep the rows in view where they were
+            elif direction == "newer":
+                history.add_newer(page)
+                shift = len(page.rows)
+            else:
+                history.replace(page, count, cursor == NEWEST)
+            self.sessions_by_id = {session[0]: session for session in history.rows}
+            self.redraw_session_list()
+            if shift:
+                self.treeview.yview_scroll(shift, "units")
+
+        def failed(e):
+            self.history_loading = False
+            show_db_error(e)
+
+        # Only the latest page request matters; an earlier one still queued is skipped
+        db_worker.submit(lambda manager: fetch(manager, cursor, count), received, failed,
+                         kind="history_page")
+
     def refresh_session_list(self):
         """
-        Fill out the list of sessions if possible.
+        Redraw the list of sessions, and have the DB worker
+        fetch a fresh one if the database has changed.
+        In history mode, just fetch the window again.
         """
+        if self.in_history_mode():
+            self.load_history("reload")
+            return self
+
+        db_worker.submit(self.fetch_session_list, self.receive_changed_session_list, show_db_error,
+                         kind="session_list")
+        self.redraw_session_list()
+        return self
 
-        self.treeview.delete(*self.treeview.get_children())
-        self.session_list = fetch_data_from_db("SELECT * FROM Session_Panel_List")
-        if not self.session_list:
+    def start_change_feed(self):
+        """
+        Subscribe to the change feed, if this platform has one.
+        Without it, the list finds every write by its once-a-second poll.
+        """
+        if not CHANGE_FEED:
+            return None
+        try:
+            self.change_feed = ChangeSubscriber(lambda message: self.after_idle(self.on_change, message))
+        except (OSError, AttributeError) as e:  # No AF_UNIX on Windows
+            print(f"Warning: no change feed ({e}), relying on polling.")
             return None
+        self.change_feed.start()
+        return self.change_feed
 
-        selected_tree_id = None
+    def stop_change_feed(self):
+        if self.change_feed is not None:
+            self.change_feed.stop()
+            self.change_feed = None
 
-        for (session_id, _player_id, player_name,
-             session_start_epoch, session_stop_epoch,
-             duration, amount, balance, _rate) in self.session_list:
-            if session_stop_epoch is not None:
-                tags=("courier",)
-                effective_session_stop_epoch = session_stop_epoch
-            else:
-                tags=("courier", "green_item")
-                effective_session_stop_epoch = self.digital_clock.now_epoch()
-            tree_id = self.treeview.insert("", "end",
-                                 text=player_name,
-                                 values=(player_name,
-                                         local_time(session_start_epoch),
-                                         local_time(effective_session_stop_epoch),
+    def on_change(self, message):
+        """
+        A write was published on the change feed: re-fetch just the
+        sessions of the player it names, or everything if it names none.
+        """
+        if self.in_history_mode():
+            self.load_history("reload")
+            return
+        player_id = message.get("player_id")
+        sent = message.get("t")
+        if player_id is None:
+            def fetch_all(manager):
+                self.db_changes.invalidate()
+                return self.fetch_session_list(manager)
+            db_worker.submit(fetch_all, self.receive_changed_session_list, show_db_error,
+                             kind="session_list")
+            return
 
-#                                         f"{duration:>{8}}",
+        def fetch_player_sessions(manager):
+            phases = PhaseClock()
+            player_sessions = manager.fetch(PLAYER_SESSIONS_QUERY, (player_id,))
+            hot_path.record("push", rows=len(player_sessions), **phases.lap("query").ms)
+            return player_sessions
 
-                                         f"{duration//3600}h{((duration%3600)//60):02d}m".rjust(8),
+        def received(player_sessions):
+            if sent is not None:
+                hot_path.record("push", latency=(time.time() - sent) * 1000)
+            self.receive_player_sessions(player_id, player_sessions)
 
-                                         locale.currency(amount, grouping=True).rjust(8),
-                                         locale.currency(balance, grouping=True).rjust(8)),
-                                 tags=tags)
-            if session_id == self.selected_session_id:
-                selected_tree_id = tree_id
+        db_worker.submit(fetch_player_sessions, received, show_db_error,
+                         kind=f"player_sessions.{player_id}")
 
-        self.treeview.selection_clear()
-        if selected_tree_id is not None:
-            self.treeview.selection_set(selected_tree_id)
+    def receive_player_sessions(self, player_id, player_sessions):
+        """
+        Merge one player's freshly fetched sessions into the list and show it.
+        """
+        if self.session_list is None or self.in_history_mode():
+            return
+        self.session_list = merge_player_sessions(self.session_list, player_id, player_sessions)
+        self.sessions_by_id = {session[0]: session for session in self.session_list}
+        self.redraw_session_list()
 
-        if self.updating:
-            if self.next_update:
-                self.after_cancel(self.next_update)
-            self.next_update = self.after(1000, self.refresh_session_list)
+    def fetch_session_list(self, manager):
+        """
+        Runs on the DB worker thread.
+        Only re-run the view when someone has written to the database;
+        in between, the running sessions' durations and amounts
+        are advanced from the clock by session_row.
+        None means nothing has changed.
+        """
+        phases = PhaseClock()
+        if not self.db_changes.changed():
+            hot_path.record("refresh", **phases.lap("poll").ms)
+            return None
+        phases.lap("poll")
+        session_list = manager.fetch(SESSION_PANEL_QUERY)
+        hot_path.record("refresh", rows=len(session_list), **phases.lap("query").ms)
+        return session_list
+
+    def receive_changed_session_list(self, session_list):
+        """
+        A poll or an unspecific change: if the database has changed, its
+        players or rates may have too, so re-read the rate index as well.
+        """
+        if session_list is not None:
+            self.refresh_rate_index()
+        self.receive_session_list(session_list)
+
+    def receive_session_list(self, session_list, select_player_id=None):
+        """
+        Take a session list fetched by the DB worker and show it,
+        selecting select_player_id's running session if given.
+        """
+        if session_list is None:
+            return
+        self.session_list = session_list
+        if not self.in_history_mode():
+            self.sessions_by_id = {session[0]: session for session in self.session_list}
+        if select_player_id is not None:
+            self.starting_player_ids.discard(select_player_id)
+            self.select_running_session(select_player_id)
+        if self.in_history_mode():
+            self.load_history("reload")  # Show the session just started
         else:
-            self.next_update = None
+            self.redraw_session_list()
+
+    def redraw_session_list(self):
+        """
+        Fill out the list of sessions if possible:
+        the current ones, or the window onto the history.
+        """
+        sessions = self.history.rows if self.in_history_mode() else self.session_list
+        if sessions is None:
+            return None
+
+        phases = PhaseClock()
+        now_epoch = self.digital_clock.now_epoch()
+        rows = [session_row(session, now_epoch) for session in sessions]
+        phases.lap("format")
+
+        if not KEYED_SESSION_REDRAW:
+            self.keyed_treeview.clear()
+        self.keyed_treeview.reconcile(rows)
+
+        self.treeview.selection_clear()
+        if self.selected_session_id in self.keyed_treeview:
+            self.treeview.selection_set(str(self.selected_session_id))
+        hot_path.record("redraw", rows=len(rows), **phases.lap("render").ms)
+
+        if not sessions:
+            return None
         return self
 
     def start(self):
         """
-        Start the clock running
+        Refresh the list now, and every second with the digital clock.
         """
         self.updating = True
+        if self.tick_subscription is None:
+            self.tick_subscription = self.digital_clock.scheduler.subscribe(
+                lambda _epoch: self.refresh_session_list())
+            self.digital_clock.scheduler.start()
         self.refresh_session_list()
 
     def cancel_updating(self):
@@ -290,9 +538,9 @@ class SessionView(tk.Frame):
         Cancel auto-updating.
         """
         self.updating = False
-        if self.next_update:
-            self.after_cancel(self.next_update)
-            self.next_update = None
+        if self.tick_subscription is not None:
+            self.digital_clock.scheduler.unsubscribe(self.tick_subscription)
+            self.tick_subscription = None
 
     def on_session_select(self, _event):
         """
@@ -316,42 +564,21 @@ class SessionView(tk.Frame):
         else:
             print("No item selected.")
 
-    def switch_to_running_session(self, player_id):
+    def select_running_session(self, player_id):
         """
         Session selected by player_id, if running.
         """
-        self.selected_session_id = None
-        self.refresh_session_list()
-        self.cancel_updating()
-        found=False
-
-        for (item_id, session) in zip(self.treeview.get_children(), self.session_list):
-            item_data = self.treeview.item(item_id)
-#            print(f"Item ID: {item_id}, Text: {item_data['text']}, Values: {item_data['values']}")
-            (_item_player_name,
-             _item_start_epoch_string,
-             _effective_session_stop_epoch_string,
-             _item_duration_string,
-             _item_seat_fee_string,
-             _item_player_balance) = item_data['values']
-            (session_id,
-             session_player_id, _session_player_name,
-             _session_start_epoch, session_stop_epoch,
-             _session_duration, _session_amount, _session_player_balance) = session
-#             print(f"""Item player name: {item_player_name} session: (
-# session_id: {session_id} player_id: {player_id},
-# session_player_name: {session_player_name}, session_start_epoch: {session_start_epoch},
-# session_stop_epoch: {session_stop_epoch},
-# session_player_category_name: {session_player_category_name},
-# session_rate: {session_rate}
-# )""")
-            if player_id == session_player_id and session_stop_epoch is None:
-                self.selected_session_id = session_id
-                found = True
-                break
-
-        self.start()
-        return found
+        self.selected_session_id = running_session_id(self.session_list or [], player_id)
+        return self.selected_session_id is not None
+
+    def switch_to_running_session(self, player_id):
+        """
+        Session selected by player_id, if running
+        or just started and on its way to the database.
+        """
+        found = self.select_running_session(player_id)
+        self.redraw_session_list()
+        return found or player_id in self.starting_player_ids
 
 
     def session_clickedfn(self,
@@ -367,31 +594,115 @@ class SessionView(tk.Frame):
 
 
 
+    def load_rate_index(self):
+        """
+        Index the rate history at startup, reporting any overlaps or gaps in it.
+        Waits for the DB worker, like the player list.
+        """
+        try:
+            self.receive_rate_index(db_worker.call(fetch_rate_index))
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Error fetching rates: {e}")
+            return None
+        return self
+
+    def refresh_rate_index(self):
+        """
+        Have the DB worker index the rate history again; does not wait.
+        """
+        db_worker.submit(fetch_rate_index, self.receive_rate_index, show_db_error, kind="rate_index")
+
+    def receive_rate_index(self, rate_index):
+        """
+        Take a rate index built by the DB worker, reporting any new problems in it.
+        """
+        if rate_index is None:
+            return
+        self.rate_index = rate_index
+        problems = rate_index.problems()
+        if problems != self.rate_problems:
+            for problem in problems:
+                print(f"Warning: {problem}")
+            self.rate_problems = problems
+
+    def session_rate(self, player_id, epoch):
+        """
+        The hourly rate for player_id at epoch from the rate index, or None
+        if none is in force or the player was added since it was read (in
+        which case it is read again, in the background).
+        """
+        if self.rate_index is None or not self.rate_index.knows_player(player_id):
+            self.refresh_rate_index()
+            return None
+        return self.rate_index.player_rate(player_id, epoch)
+
     def start_session(self, player_id, session_start_time):
-        start_epoch=((self.digital_clock.now_epoch()+ 59) // 60) * 60
-        start = max(start_epoch, session_start_time)
-        send_data_to_db("INSERT INTO Session (Player_Id, Start_Epoch) VALUES (?, ?)",
-                        (player_id,start))
-        self.switch_to_running_session(player_id)
+        start = session_start_epoch(self.digital_clock.now_epoch(), session_start_time)
+        rate_index = self.rate_index
+
+        def insert_session(manager):
+            """
+            The session is charged at the rate in force when it starts.
+            For a player added since the rate index was read, it is read
+            again here, on the DB worker, and handed back.
+            """
+            fetched = None
+            index = rate_index
+            if index is None or not index.knows_player(player_id):
+                index = fetched = fetch_rate_index(manager)
+            rate = index.player_rate(player_id, start)
+            if rate is None:
+                print(f"Warning: no rate in force for player_id {player_id} at {local_time(start)}; "
+                      "starting the session at no charge.")
+                rate = 0
+            manager.execute("INSERT INTO Session (Player_Id, Start_Epoch, Hourly_Rate) VALUES (?, ?, ?)",
+                            (player_id, start, rate))
+            publish("session_started", player_id=player_id)
+            return fetched
+
+        def started_session_failed(e):
+            self.starting_player_ids.discard(player_id)
+            show_db_error(e)
+
+        self.starting_player_ids.add(player_id)
+        db_worker.submit(insert_session, self.receive_rate_index, started_session_failed)
+        # Queued behind the insert, so the new session is in the list
+        db_worker.submit(lambda manager: manager.fetch(SESSION_PANEL_QUERY),
+                         lambda session_list: self.receive_session_list(session_list, player_id),
+                         started_session_failed)
+
+
+
+    def request_payment(self, player_id, player_name, balance):
+        """
+        The player owes money, so no session is started until they pay.
+        """
+        message = f"{player_name} owes {currency_text(-balance).strip()}"
+        rate = self.session_rate(player_id, self.digital_clock.now_epoch())
+        if rate is not None:
+            message += f", and plays at {currency_text(rate).strip()} an hour"
+        messagebox.showinfo("Payment Due", message + "; take a payment before starting a session.")
 
 
 
     def stop_session(self, session_id):
-        stop_epoch = (self.digital_clock.now_epoch() // 60) * 60
+        stop_epoch = session_stop_epoch(self.digital_clock.now_epoch())
+        session = self.sessions_by_id.get(session_id)
         send_data_to_db("UPDATE Session SET Stop_Epoch = ? WHERE Session_Id == ?",
-                        (stop_epoch, session_id))
+                        (stop_epoch, session_id),
+                        {"event": "session_stopped", "session_id": session_id,
+                         "player_id": session[1] if session else None})
         self.refresh_session_list()
 
 
 
 def player_name_regular_clicked(player_id, name, balance, session_start_time, session_view):
     print("regular selected player_id:", player_id, "name:", name, "balance:", balance)
-    if session_view.switch_to_running_session(player_id):
-        return
-    elif 0 <= balance:
+    action = player_click_action(balance, session_view.switch_to_running_session(player_id))
+    if action == START_SESSION:
         session_view.start_session(player_id, session_start_time)
-    else:
-        session_view.request_payment()
+    elif action == REQUEST_PAYMENT:
+        session_view.request_payment(player_id, name, balance)
 
 
 def player_name_control_clicked(player_id, name, balance, session_view):
@@ -420,6 +731,7 @@ class SessionPanel(tk.Frame):
         self['bg']=CAROLINA_BLUE_HEX
         self.session_view = None
         self.digital_clock = None
+        self.hot_path_overlay = None
 
 
 
@@ -438,6 +750,9 @@ class SessionPanel(tk.Frame):
         self.session_start_time_label = \
             self.create_session_start_time_label(self.session_start_time)
         self.session_view = SessionView(self, self.digital_clock)
+        if self.session_view.load_rate_index() is None:
+            self.close_window(1)
+            return False
         self.player_name_listbox=self.create_player_name_listbox(self.session_start_time,
                                                                  self.session_view)
 
@@ -486,8 +801,19 @@ class SessionPanel(tk.Frame):
 
         self.bottom_banner_left.       grid(row=6, column=0, sticky="w")
 
+        self.hot_path_overlay = HotPathOverlay(self, hot_path)
+        self.hot_path_overlay.         grid(row=6, column=1, sticky="e")
+        if not HOT_PATH_OVERLAY:
+            self.hot_path_overlay.grid_remove()
+        root.bind('<F12>', self.toggle_hot_path_overlay)
+        # The clock, the session list and the overlay all update from the clock's one TickScheduler
+        self.hot_path_overlay.start(self.digital_clock.scheduler)
+
+        self.digital_clock.scheduler.tick_listener = \
+            lambda late_ms: hot_path.record("clock", jitter=late_ms)
         self.digital_clock.start()
-        self.session_view.refresh_session_list()
+        self.session_view.start_change_feed()
+        self.session_view.start()
 
         return True
 
@@ -580,6 +906,16 @@ class SessionPanel(tk.Frame):
                         bg=CAROLINA_BLUE_HEX, fg="black", font=("Arial",8))
 
 
+    def toggle_hot_path_overlay(self, _event=None):
+        """
+        Show or hide the p50/p95/p99 timings of the hot paths.
+        """
+        if self.hot_path_overlay.winfo_manager():
+            self.hot_path_overlay.grid_remove()
+        else:
+            self.hot_path_overlay.grid()
+
+
     def stop_updating(self):
         """
         Stop things that are updating
@@ -589,6 +925,12 @@ class SessionPanel(tk.Frame):
             self.digital_clock.cancel_updating()
         if self.session_view:
             self.session_view.cancel_updating()
+            self.session_view.stop_change_feed()
+        if self.hot_path_overlay:
+            self.hot_path_overlay.cancel_updating()
+        if self.digital_clock:
+            # Whatever else still subscribes, end the shared after() chain
+            self.digital_clock.scheduler.stop()
 
 
 
@@ -627,6 +969,8 @@ if __name__ == "__main__":
     root.mainloop()
 
     session_panel.stop_updating()
+    db_worker.stop()
+    hot_path.close_log()
 
     if exit_code != 0:
         sys.exit(exit_code)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+The session app's rules, without Tk: when a session starts and stops,
+what clicking a player does, and what a session costs
+"""
+
+# session.py creates the Tk root, sets the locale and builds its fonts as
+# it is imported, so nothing in it can be used without a display.  These
+# are the parts that do not need one, for session.py and for command-line
+# tools, checks and benchmarks alike.  Keep this module's imports to the
+# standard library's cheapest (bench/session_engine.py holds it to well
+# under 100 ms): no tkinter, no locale, no sqlite3.
+
+import math
+
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+
+# What a regular click on a player's name does
+SWITCH_TO_SESSION = "switch"          # Select the player's running session
+START_SESSION = "start"
+REQUEST_PAYMENT = "request_payment"   # The player owes; take a payment first
+
+
+def session_start_epoch(now_epoch, session_start_time):
+    """
+    When a session started at now_epoch begins: the next whole minute,
+    but no earlier than the club session's start time.
+    """
+    start_epoch = ((now_epoch + SECONDS_PER_MINUTE - 1) // SECONDS_PER_MINUTE) * SECONDS_PER_MINUTE
+    return max(start_epoch, session_start_time)
+
+
+def session_stop_epoch(now_epoch):
+    """When a session stopped at now_epoch ends: the start of the minute under way."""
+    return (now_epoch // SECONDS_PER_MINUTE) * SECONDS_PER_MINUTE
+
+
+def session_duration(start_epoch, stop_epoch):
+    """Seconds from start to stop, never negative."""
+    return max(stop_epoch - start_epoch, 0)
+
+
+def session_amount(duration, rate):
+    """
+    Whole dollars for duration seconds at rate dollars an hour, rounded
+    half up as SQLite's round() does in the Session_Amount_List view.
+    """
+    return math.floor(duration * (rate or 0) / SECONDS_PER_HOUR + 0.5)
+
+
+def session_charge(session, now_epoch):
+    """
+    (stop epoch, duration, amount) of a Session_Panel_List row.  A
+    running session has no stop, duration or amount yet: it runs to
+    now_epoch, and its duration and amount are worked out from its rate.
+    """
+    (_session_id, _player_id, _player_name,
+     start_epoch, stop_epoch,
+     duration, amount, _balance, rate) = session
+    if stop_epoch is None:
+        stop_epoch = now_epoch
+    if duration is None:
+        duration = session_duration(start_epoch, stop_epoch)
+    if amount is None:
+        amount = session_amount(duration, rate)
+    return (stop_epoch, duration, amount)
+
+
+def player_click_action(balance, has_session):
+    """
+    What a regular click on a player does: switch to the session they
+    have (running, or just started), else start one if they owe
+    nothing, else ask for a payment first.
+    """
+    if has_session:
+        return SWITCH_TO_SESSION
+    if 0 <= balance:
+        return START_SESSION
+    return REQUEST_PAYMENT
+
+
+def running_session_id(sessions, player_id):
+    """The Session_Id of player_id's running session among Session_Panel_List rows, or None."""
+    for session in sessions:
+        if session[1] == player_id and session[4] is None:
+            return session[0]
+    return None
+
+
+def merge_player_sessions(session_list, player_id, player_sessions):
+    """
+    Replace player_id's rows of a Session_Panel_List result with
+    player_sessions, freshly fetched, where the old ones were; then move
+    running sessions ahead of stopped ones, as the view orders them.
+    The rest of the view's order is restored by the next full fetch.
+    """
+    merged = []
+    inserted = False
+    for session in session_list:
+        if session[1] != player_id:
+            merged.append(session)
+        elif not inserted:
+            merged.extend(player_sessions)
+            inserted = True
+    if not inserted:
+        merged.extend(player_sessions)
+    merged.sort(key=lambda session: session[4] is not None)  # Stable
+    return merged
+
+
+if __name__ == "__main__":
+    now = 1760000000
+    print(session_start_epoch(now, 0) - now, now - session_stop_epoch(now))
+    print(session_charge((1, 7, "Player 7", now - 5400, None, None, None, 20, 5.0), now))
+    print(player_click_action(-10, False), player_click_action(0, False), player_click_action(-10, True))
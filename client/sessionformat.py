@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Memoized formatting of times, durations and currency for the session
+list and the digital clock
+"""
+
+# The session list re-formats every row every second, but almost none of
+# the text changes: times only show the minute, durations only count
+# minutes, and amounts and balances are whole dollars.  So each piece of
+# text is cached under the value it depends on (the epoch minute, the
+# whole minutes, the amount) in a bounded LRU, and the rows of stopped
+# sessions, which do not depend on the clock at all, are cached whole.
+# Call clear() after changing the locale.
+
+import datetime
+import functools
+import locale
+
+from sessionengine import session_charge
+
+MINUTE_CACHE_SIZE = 4096    # About three days of distinct minutes
+AMOUNT_CACHE_SIZE = 4096
+STOPPED_ROW_CACHE_SIZE = 8192
+
+SESSION_TIME_FORMAT = "%-m/%d %H:%M"
+
+
+@functools.lru_cache(maxsize=MINUTE_CACHE_SIZE)
+def minute_text(minute, time_format, tz=None):
+    """The start of epoch minute (epoch // 60) in time_format, in tz (default: local time)."""
+    return datetime.datetime.fromtimestamp(minute * 60, tz).strftime(time_format)
+
+
+def local_time(epoch):
+    """An epoch as month/day hour:minute, local time."""
+    return minute_text(epoch // 60, SESSION_TIME_FORMAT)
+
+
+@functools.lru_cache(maxsize=MINUTE_CACHE_SIZE)
+def strip_minute(minute_string):
+    return (datetime.datetime.strptime(minute_string, "%Y-%m-%d %H:%M")
+                             .strftime(SESSION_TIME_FORMAT))
+
+
+def strip_time(time_string):
+    """A "%Y-%m-%d %H:%M:%S.000" time as month/day hour:minute."""
+    # Check the whole format, then cache on the minute
+    datetime.datetime.strptime(time_string[16:], ":%S.000")
+    return strip_minute(time_string[:16])
+
+
+def clock_text(now_datetime, seconds=True):
+    """The digital clock's "%Y-%m-%d %H:%M[:%S]" for an aware datetime."""
+    epoch = int(now_datetime.timestamp())
+    text = minute_text(epoch // 60, "%Y-%m-%d %H:%M", now_datetime.tzinfo)
+    return f"{text}:{epoch % 60:02d}" if seconds else text
+
+
+@functools.lru_cache(maxsize=MINUTE_CACHE_SIZE)
+def minutes_text(minutes):
+    return f"{minutes//60}h{(minutes%60):02d}m".rjust(8)
+
+
+def duration_text(seconds):
+    """A duration in seconds as right-justified hours and minutes."""
+    return minutes_text(seconds // 60)
+
+
+@functools.lru_cache(maxsize=AMOUNT_CACHE_SIZE)
+def currency_text(amount):
+    """A dollar amount in the locale's currency format, right-justified."""
+    return locale.currency(amount, grouping=True).rjust(8)
+
+
+def format_session(session, now_epoch):
+    """
+    Turn a Session_Panel_List row into (Session_Id, treeview values, tags).
+    A running session has no stop time yet, so it runs to now_epoch,
+    and its duration and amount are worked out here.
+    """
+    (session_id, _player_id, player_name,
+     session_start_epoch, session_stop_epoch,
+     _duration, _amount, balance, _rate) = session
+    if session_stop_epoch is not None:
+        tags=("courier",)
+    else:
+        tags=("courier", "green_item")
+    (effective_session_stop_epoch, duration, amount) = session_charge(session, now_epoch)
+    values=(player_name,
+            local_time(session_start_epoch),
+            local_time(effective_session_stop_epoch),
+            duration_text(duration),
+            currency_text(amount),
+            currency_text(balance))
+    return (session_id, values, tags)
+
+
+@functools.lru_cache(maxsize=STOPPED_ROW_CACHE_SIZE)
+def format_stopped_session(session):
+    return format_session(session, None)
+
+
+def session_row(session, now_epoch):
+    """
+    format_session, with the rows of stopped sessions (whose text does
+    not depend on now_epoch) cached whole, keyed by the row itself.
+    """
+    if session[4] is not None:
+        return format_stopped_session(session)
+    return format_session(session, now_epoch)
+
+
+def clear():
+    """Forget every cached string, e.g. after a locale or time zone change."""
+    for cached in (minute_text, strip_minute, minutes_text, currency_text, format_stopped_session):
+        cached.cache_clear()
+
+
+def cache_info():
+    """{name: functools cache statistics} of each cache."""
+    return {cached.__name__: cached.cache_info()
+            for cached in (minute_text, strip_minute, minutes_text, currency_text,
+                           format_stopped_session)}
+
+
+if __name__ == "__main__":
+    import time
+    from zoneinfo import ZoneInfo
+
+    print(local_time(1760000000), strip_time("2025-10-09 04:53:20.000"), duration_text(5400))
+    print(clock_text(datetime.datetime.now(ZoneInfo("America/New_York"))))
+    for _ in range(3):
+        local_time(int(time.time()))
+    print(cache_info()["minute_text"])
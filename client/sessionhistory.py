@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Bounded, keyset-paginated window onto the whole session history
+"""
+
+import collections
+
+# Sessions are paged newest first by (Start_Epoch, Session_Id), which
+# idx_session_start (server/indexes.sql) serves without a sort.  Each page
+# picks its Session_Ids from Session alone, then prices just those
+# sessions, so a page costs the same a week or ten years back.  Rows have
+# the columns of session.SESSION_PANEL_QUERY.
+#
+# Pricing goes through Session_Amount_List, which leaves out the sessions
+# of players with no category, as Session_Panel_List does; so a page can
+# come back with fewer rows than the sessions it covered.  The ends of
+# history and the next cursors are worked out from PAGE_KEYS_QUERY, the
+# same page of Session alone, never from the rows shown.
+PAGE_KEYS_QUERY = """
+SELECT Start_Epoch, Session_Id FROM Session
+WHERE (Start_Epoch, Session_Id) {comparison} (?, ?)
+ORDER BY Start_Epoch {direction}, Session_Id {direction}
+LIMIT ?"""
+HISTORY_PAGE_QUERY = "WITH Page AS (" + PAGE_KEYS_QUERY + """)
+SELECT sal.Session_Id, sal.Player_Id, sal.Name, sal.Session_Start_Epoch, sal.Session_Stop_Epoch,
+       sal.Duration_In_Seconds, sal.Amount, pb.Balance, sal.Rate
+FROM Session_Amount_List as sal
+JOIN Player_Balance as pb ON sal.Player_Id == pb.Player_Id
+WHERE sal.Session_Id IN (SELECT Session_Id FROM Page)
+ORDER BY sal.Session_Start_Epoch DESC, sal.Session_Id DESC
+"""
+OLDER = {"comparison": "<", "direction": "DESC"}
+NEWER = {"comparison": ">", "direction": "ASC"}
+OLDER_KEYS_QUERY = PAGE_KEYS_QUERY.format(**OLDER)
+NEWER_KEYS_QUERY = PAGE_KEYS_QUERY.format(**NEWER)
+OLDER_PAGE_QUERY = HISTORY_PAGE_QUERY.format(**OLDER)
+NEWER_PAGE_QUERY = HISTORY_PAGE_QUERY.format(**NEWER)
+
+# A cursor above every session
+NEWEST = (2**63 - 1, 2**63 - 1)
+
+HISTORY_PAGE_SIZE = 100
+HISTORY_WINDOW_ROWS = 300
+
+# A page of history: its priced rows, newest first; how many sessions it
+# covered, shown or not; and the keyset cursor of the one farthest from
+# where it was fetched from (None if it covered none)
+HistoryPage = collections.namedtuple("HistoryPage", "rows sessions edge")
+
+
+def cursor(session):
+    """The (Start_Epoch, Session_Id) keyset position of a session row."""
+    return (session[3], session[0])
+
+
+def fetch_page(manager, keys_query, page_query, parameters):
+    """A HistoryPage, its keys and rows read in one transaction so they agree."""
+    con = manager.reader()
+    con.execute("BEGIN")
+    try:
+        keys = con.execute(keys_query, parameters).fetchall()
+        rows = con.execute(page_query, parameters).fetchall()
+    finally:
+        con.execute("COMMIT")
+    return HistoryPage(rows, len(keys), tuple(keys[-1]) if keys else None)
+
+
+def fetch_older(manager, before, page_size=HISTORY_PAGE_SIZE):
+    """The page_size sessions just older than the cursor before, as a HistoryPage."""
+    return fetch_page(manager, OLDER_KEYS_QUERY, OLDER_PAGE_QUERY, (*before, page_size))
+
+
+def fetch_newer(manager, after, page_size=HISTORY_PAGE_SIZE):
+    """The page_size sessions just newer than the cursor after, as a HistoryPage."""
+    return fetch_page(manager, NEWER_KEYS_QUERY, NEWER_PAGE_QUERY, (*after, page_size))
+
+
+class SessionHistory:
+    """
+    The slice of history the session list is showing: at most max_rows
+    consecutive sessions, newest first.  Pages are fetched (on the DB
+    worker) with fetch_older/fetch_newer from the cursors given here,
+    and added with add_older/add_newer, which drop rows off the far end
+    to keep the window bounded.  The window also remembers the farthest
+    session each end has covered, shown or not, to page on from.
+    """
+
+    def __init__(self, page_size=HISTORY_PAGE_SIZE, max_rows=HISTORY_WINDOW_ROWS):
+        self.page_size = page_size
+        self.max_rows = max(max_rows, 2 * page_size)
+        self.reset()
+
+    def reset(self):
+        self.rows = []
+        self.at_newest = True   # Nothing newer than the first row
+        self.at_oldest = False  # Nothing older than the last row
+        self.oldest = None      # Cursors of the sessions covered at each end,
+        self.newest = None      # if past the rows shown
+
+    def older_cursor(self):
+        if self.oldest is not None:
+            return self.oldest
+        return cursor(self.rows[-1]) if self.rows else NEWEST
+
+    def newer_cursor(self):
+        if self.newest is not None:
+            return self.newest
+        return cursor(self.rows[0]) if self.rows else NEWEST
+
+    def reload_cursor(self):
+        """
+        The cursor to fetch the window again from, after a write:
+        from the very newest if it is showing (to pick up new sessions),
+        else from just above its first row.
+        """
+        if self.at_newest or not self.rows:
+            return NEWEST
+        (start_epoch, session_id) = self.newer_cursor()
+        return (start_epoch, session_id + 1)
+
+    def add_older(self, page):
+        """
+        Append a HistoryPage fetched with older_cursor.
+        Return the number of rows dropped from the top.
+        """
+        if page.sessions < self.page_size:
+            self.at_oldest = True
+        if page.edge is not None:
+            self.oldest = page.edge
+        self.rows.extend(page.rows)
+        dropped = max(len(self.rows) - self.max_rows, 0)
+        if dropped:
+            del self.rows[:dropped]
+            self.at_newest = False
+            self.newest = None
+        return dropped
+
+    def add_newer(self, page):
+        """
+        Prepend a HistoryPage fetched with newer_cursor.
+        Return the number of rows dropped from the bottom.
+        """
+        if page.sessions < self.page_size:
+            self.at_newest = True
+        if page.edge is not None:
+            self.newest = page.edge
+        self.rows[:0] = page.rows
+        dropped = max(len(self.rows) - self.max_rows, 0)
+        if dropped:
+            del self.rows[-dropped:]
+            self.at_oldest = False
+            self.oldest = None
+        return dropped
+
+    def replace(self, page, requested, from_newest):
+        """
+        Start the window over with a HistoryPage of up to requested
+        sessions, fetched from reload_cursor (from NEWEST if from_newest).
+        """
+        self.rows = list(page.rows[:self.max_rows])
+        self.at_newest = from_newest
+        self.at_oldest = page.sessions < requested
+        self.oldest = page.edge if len(page.rows) <= self.max_rows else None
+        self.newest = None
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from dbconnection import ConnectionManager
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="ccc_history_"), "history.db")
+    manager = ConnectionManager(db_path)  # The reader needs a file, not :memory:
+    con = manager.writer()
+    con.executescript("""
+        CREATE TABLE Session (Session_Id INTEGER PRIMARY KEY, Player_Id, Start_Epoch, Stop_Epoch);
+        CREATE INDEX idx_session_start ON Session (Start_Epoch);
+        -- Leaves out some sessions, as the real view does those of players with no category
+        CREATE VIEW Session_Amount_List AS
+            SELECT Session_Id, Player_Id, 'Player ' || Player_Id as Name,
+                   Start_Epoch as Session_Start_Epoch, Stop_Epoch as Session_Stop_Epoch,
+                   Stop_Epoch - Start_Epoch as Duration_In_Seconds, 5 as Amount, 5 as Rate
+            FROM Session WHERE Player_Id % 10 != 0 AND Session_Id NOT BETWEEN 4000 AND 4300;
+        CREATE VIEW Player_Balance AS SELECT DISTINCT Player_Id, 0 as Balance FROM Session;
+    """)
+    with con:
+        con.executemany("INSERT INTO Session (Player_Id, Start_Epoch, Stop_Epoch) VALUES (?, ?, ?)",
+                        ((i % 40, 1700000000 + 600 * (i // 3), 1700003600 + 600 * (i // 3))
+                         for i in range(10000)))
+
+    history = SessionHistory(page_size=100, max_rows=300)
+    shown = 0
+    while not history.at_oldest:
+        page = fetch_older(manager, history.older_cursor(), history.page_size)
+        shown += len(page.rows)
+        history.add_older(page)
+    print(f"Scrolled to the oldest: {shown} of {len(manager.fetch('SELECT * FROM Session'))} sessions shown "
+          f"({len(manager.fetch('SELECT * FROM Session_Amount_List'))} priced), {len(history.rows)} rows held, "
+          f"Session_Ids {history.rows[0][0]}..{history.rows[-1][0]}")
+    while not history.at_newest:
+        history.add_newer(fetch_newer(manager, history.newer_cursor(), history.page_size))
+    print(f"Scrolled back to the newest: {len(history.rows)} rows held, "
+          f"Session_Ids {history.rows[0][0]}..{history.rows[-1][0]}")
+    manager.close()
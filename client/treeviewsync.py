@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Scott Marks
+"""
+Keyed reconciliation of a ttk.Treeview against a fresh list of rows
+"""
+
+import tkinter as tk
+
+
+class KeyedTreeview:
+    """
+    Keep the top-level items of a ttk.Treeview in step with a list of keyed rows.
+    Each row's key becomes its Treeview iid, so a row keeps its identity
+    (and its selection) from one refresh to the next.  Only cells whose
+    values or tags changed are rewritten; rows are inserted or deleted
+    only when they appear in or disappear from the list, and moved only
+    when the ordering changes.
+    """
+
+    def __init__(self, treeview):
+        self.treeview = treeview
+        self.rows = {}   # iid -> (values, tags) as last written to the treeview
+        self.order = []  # iids in treeview order
+
+    def reconcile(self, rows):
+        """
+        Bring the treeview in line with rows, an iterable of (key, values, tags).
+        Return the number of items inserted, updated, moved and deleted.
+        """
+        wanted = [(str(key), tuple(values), tuple(tags)) for (key, values, tags) in rows]
+        wanted_iids = {iid for (iid, _values, _tags) in wanted}
+
+        removed = [iid for iid in self.order if iid not in wanted_iids]
+        if removed:
+            self.treeview.delete(*removed)
+            for iid in removed:
+                del self.rows[iid]
+            self.order = [iid for iid in self.order if iid in wanted_iids]
+
+        inserted = updated = moved = 0
+        for (index, (iid, values, tags)) in enumerate(wanted):
+            row = (values, tags)
+            old_row = self.rows.get(iid)
+            if old_row is None:
+                self.treeview.insert("", index, iid=iid, values=values, tags=tags)
+                self.order.insert(index, iid)
+                inserted += 1
+            else:
+                if self.order[index] != iid:
+                    self.treeview.move(iid, "", index)
+                    self.order.remove(iid)
+                    self.order.insert(index, iid)
+                    moved += 1
+                if old_row != row:
+                    self.treeview.item(iid, values=values, tags=tags)
+                    updated += 1
+            self.rows[iid] = row
+
+        return (inserted, updated, moved, len(removed))
+
+    def clear(self):
+        """
+        Delete every top-level item and forget the rows.
+        """
+        self.treeview.delete(*self.treeview.get_children())
+        self.rows = {}
+        self.order = []
+
+    def __contains__(self, key):
+        return str(key) in self.rows
+
+
+if __name__ == "__main__":
+    from tkinter import ttk
+
+    root = tk.Tk()
+    root.title("Keyed Treeview Test")
+    treeview = ttk.Treeview(root, columns=("Column1", "Column2"), show="headings")
+    treeview.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
+    keyed = KeyedTreeview(treeview)
+    tick = [0]
+
+    def refresh():
+        tick[0] += 1
+        keyed.reconcile((key, (f"row {key}", tick[0] * key), ())
+                        for key in range(tick[0] % 5, 10))
+        root.after(1000, refresh)
+
+    refresh()
+    root.mainloop()
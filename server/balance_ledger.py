@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Install, rebuild and verify the maintained per-player balance ledger.
+
+balance_ledger.sql adds a Player_Balance_Ledger table kept current by triggers
+on Session, Payment and Player, and redefines the Player_Balance view to read
+it, so Player_Selection_List and Session_Panel_List no longer re-aggregate the
+club's whole payment and session history on every query.  The old
+from-scratch computation stays available as the Player_Balance_Recomputed view.
+
+Commands:
+    install   apply balance_ledger.sql (table, views, triggers) and rebuild,
+              in one transaction
+    rebuild   recompute every player's totals from the full history
+    verify    compare the ledger with a from-scratch recompute and report drift;
+              exits 1 if any player's balance differs
+
+Usage:
+    python3 balance_ledger.py install
+    python3 balance_ledger.py verify --db CarolinaCardClub.db.bak
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "CarolinaCardClub.db")
+LEDGER_SQL = os.path.join(HERE, "balance_ledger.sql")
+
+REBUILD_SQL = """
+DELETE FROM Player_Balance_Ledger;
+INSERT INTO Player_Balance_Ledger (Player_Id, Total_Payment, Total_Session_Amount)
+SELECT tp.Player_Id, tp.Total_Payment, IFNULL(sa.Total_Amount, 0)
+FROM Player_Total_Payment as tp
+LEFT JOIN Player_Total_Session_Amount as sa ON tp.Player_Id == sa.Player_Id;
+"""
+
+# Every player whose ledger balance differs from the recomputed one,
+# plus ledger rows left behind for players that no longer exist.
+DRIFT_SQL = """
+SELECT r.Player_Id, l.Balance, r.Balance
+FROM Player_Balance_Recomputed as r
+LEFT JOIN Player_Balance as l ON r.Player_Id == l.Player_Id
+WHERE l.Balance IS NOT r.Balance
+UNION ALL
+SELECT l.Player_Id, l.Balance, NULL
+FROM Player_Balance as l
+WHERE l.Player_Id NOT IN (SELECT Player_Id FROM Player)
+ORDER BY 1;
+"""
+
+
+def install(con):
+    """
+    Create the ledger, its triggers and the new Player_Balance view, and
+    fill it, in one transaction: no reader ever sees the new view over
+    an empty ledger.  Return the number of players.
+    """
+    with open(LEDGER_SQL) as fh:
+        script = fh.read().strip()
+    # balance_ledger.sql is its own transaction; here it shares one with the rebuild
+    if not (script.startswith("BEGIN TRANSACTION;") and script.endswith("COMMIT;")):
+        raise ValueError(f"{LEDGER_SQL} is not one BEGIN TRANSACTION; ... COMMIT; script")
+    script = script[len("BEGIN TRANSACTION;"):-len("COMMIT;")]
+    try:
+        con.executescript("BEGIN IMMEDIATE;" + script + REBUILD_SQL + "COMMIT;")
+    except sqlite3.Error:
+        if con.in_transaction:
+            con.rollback()
+        raise
+    return con.execute("SELECT COUNT(*) FROM Player_Balance_Ledger").fetchone()[0]
+
+
+def rebuild(con):
+    """Recompute every player's totals from scratch; return the number of players."""
+    con.executescript("BEGIN IMMEDIATE;" + REBUILD_SQL + "COMMIT;")
+    return con.execute("SELECT COUNT(*) FROM Player_Balance_Ledger").fetchone()[0]
+
+
+def verify(con):
+    """Return [(Player_Id, ledger balance, recomputed balance)] for every drifted player."""
+    return con.execute(DRIFT_SQL).fetchall()
+
+
+def is_installed(con):
+    return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                       "AND name = 'Player_Balance_Ledger'").fetchone() is not None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the Player_Balance_Ledger table.")
+    ap.add_argument("command", choices=["install", "rebuild", "verify"])
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+
+    con = sqlite3.connect(args.db, timeout=5.0)
+    try:
+        if args.command != "install" and not is_installed(con):
+            print(f"ERROR: no balance ledger in {args.db}; run `install` first.", file=sys.stderr)
+            return 1
+
+        if args.command == "install":
+            n_players = install(con)
+            print(f"Installed balance ledger in {args.db} ({n_players} players).")
+        elif args.command == "rebuild":
+            n_players = rebuild(con)
+            print(f"Rebuilt balance ledger for {n_players} players.")
+        else:
+            drift = verify(con)
+            for (player_id, ledger_balance, recomputed_balance) in drift:
+                print(f"DRIFT: Player_Id {player_id}: ledger {ledger_balance}, "
+                      f"recomputed {recomputed_balance}")
+            if drift:
+                print(f"{len(drift)} players drifted; run `rebuild` to correct them.")
+                return 1
+            print("Balance ledger matches the full recompute.")
+    finally:
+        con.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+BEGIN TRANSACTION;
+
+-- Maintained per-player balance ledger.
+--
+-- Player_Balance used to re-aggregate every payment and every session
+-- (Player_Total_Payment -> Player_Total_Session_Amount -> Session_Amount_List
+-- -> Session_Rate_List) on every read.  The totals are now kept in
+-- Player_Balance_Ledger by the triggers below, and Player_Balance reads them
+-- one row per player.  The old definition is kept as
+-- Player_Balance_Recomputed for `balance_ledger.py rebuild` / `verify`.
+--
+-- Apply with:  python3 balance_ledger.py install
+
+-- 1. The ledger
+CREATE TABLE IF NOT EXISTS "Player_Balance_Ledger" (
+    "Player_Id"            INTEGER PRIMARY KEY,
+    "Total_Payment"        INTEGER NOT NULL DEFAULT 0,
+    "Total_Session_Amount" INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY("Player_Id") REFERENCES "Player"("Player_Id")
+);
+
+-- 2. Keep the from-scratch computation, under a new name
+DROP VIEW IF EXISTS "Player_Balance_Recomputed";
+CREATE VIEW "Player_Balance_Recomputed" AS
+SELECT p.Player_Id, p.Total_Payment - IFNULL(sa.Total_Amount,0) as Balance
+FROM Player_Total_Payment as p
+LEFT JOIN Player_Total_Session_Amount as sa ON p.Player_Id == sa.Player_Id;
+
+-- 3. Player_Balance now reads the ledger (Player_Selection_List,
+--    Session_Panel_List and bin/zero_negative_balances all go through it)
+DROP VIEW IF EXISTS "Player_Balance";
+CREATE VIEW "Player_Balance" AS
+SELECT l.Player_Id, l.Total_Payment - l.Total_Session_Amount as Balance
+FROM Player_Balance_Ledger as l;
+
+-- 4. Players
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Player_Insert";
+CREATE TRIGGER "Player_Balance_Ledger_Player_Insert"
+AFTER INSERT ON Player
+BEGIN
+    INSERT OR IGNORE INTO Player_Balance_Ledger (Player_Id) VALUES (NEW.Player_Id);
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Player_Delete";
+CREATE TRIGGER "Player_Balance_Ledger_Player_Delete"
+AFTER DELETE ON Player
+BEGIN
+    DELETE FROM Player_Balance_Ledger WHERE Player_Id = OLD.Player_Id;
+END;
+
+-- A session only has an amount while its player has a category
+-- (Session_Rate_List inner-joins Player_Category), so moving a player
+-- between categories re-totals that player's sessions.
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Player_Category_Before";
+CREATE TRIGGER "Player_Balance_Ledger_Player_Category_Before"
+BEFORE UPDATE OF Player_Category_Id ON Player
+BEGIN
+    UPDATE Player_Balance_Ledger
+    SET Total_Session_Amount = Total_Session_Amount
+        - (SELECT IFNULL(SUM(Amount),0) FROM Session_Amount_List WHERE Player_Id = OLD.Player_Id)
+    WHERE Player_Id = OLD.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Player_Category_After";
+CREATE TRIGGER "Player_Balance_Ledger_Player_Category_After"
+AFTER UPDATE OF Player_Category_Id ON Player
+BEGIN
+    UPDATE Player_Balance_Ledger
+    SET Total_Session_Amount = Total_Session_Amount
+        + (SELECT IFNULL(SUM(Amount),0) FROM Session_Amount_List WHERE Player_Id = NEW.Player_Id)
+    WHERE Player_Id = NEW.Player_Id;
+END;
+
+-- 5. Payments
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Payment_Insert";
+CREATE TRIGGER "Player_Balance_Ledger_Payment_Insert"
+AFTER INSERT ON Payment
+BEGIN
+    UPDATE Player_Balance_Ledger SET Total_Payment = Total_Payment + NEW.Amount
+    WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Payment_Update";
+CREATE TRIGGER "Player_Balance_Ledger_Payment_Update"
+AFTER UPDATE OF Player_Id, Amount ON Payment
+BEGIN
+    UPDATE Player_Balance_Ledger SET Total_Payment = Total_Payment - OLD.Amount
+    WHERE Player_Id = OLD.Player_Id;
+    UPDATE Player_Balance_Ledger SET Total_Payment = Total_Payment + NEW.Amount
+    WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Payment_Delete";
+CREATE TRIGGER "Player_Balance_Ledger_Payment_Delete"
+AFTER DELETE ON Payment
+BEGIN
+    UPDATE Player_Balance_Ledger SET Total_Payment = Total_Payment - OLD.Amount
+    WHERE Player_Id = OLD.Player_Id;
+END;
+
+-- 6. Sessions.  Amounts come from Session_Amount_List itself, looked up by
+--    Session_Id, so the ledger uses exactly the view's pricing: the old
+--    amount is taken off before the row changes and the new one added after.
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Session_Insert";
+CREATE TRIGGER "Player_Balance_Ledger_Session_Insert"
+AFTER INSERT ON Session
+BEGIN
+    UPDATE Player_Balance_Ledger
+    SET Total_Session_Amount = Total_Session_Amount
+        + (SELECT IFNULL(SUM(Amount),0) FROM Session_Amount_List WHERE Session_Id = NEW.Session_Id)
+    WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Session_Update_Before";
+CREATE TRIGGER "Player_Balance_Ledger_Session_Update_Before"
+BEFORE UPDATE OF Player_Id, Start_Epoch, Stop_Epoch, Is_Prepaid, Prepay_Amount, Hourly_Rate ON Session
+BEGIN
+    UPDATE Player_Balance_Ledger
+    SET Total_Session_Amount = Total_Session_Amount
+        - (SELECT IFNULL(SUM(Amount),0) FROM Session_Amount_List WHERE Session_Id = OLD.Session_Id)
+    WHERE Player_Id = OLD.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Session_Update_After";
+CREATE TRIGGER "Player_Balance_Ledger_Session_Update_After"
+AFTER UPDATE OF Player_Id, Start_Epoch, Stop_Epoch, Is_Prepaid, Prepay_Amount, Hourly_Rate ON Session
+BEGIN
+    UPDATE Player_Balance_Ledger
+    SET Total_Session_Amount = Total_Session_Amount
+        + (SELECT IFNULL(SUM(Amount),0) FROM Session_Amount_List WHERE Session_Id = NEW.Session_Id)
+    WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Player_Balance_Ledger_Session_Delete";
+CREATE TRIGGER "Player_Balance_Ledger_Session_Delete"
+BEFORE DELETE ON Session
+BEGIN
+    UPDATE Player_Balance_Ledger
+    SET Total_Session_Amount = Total_Session_Amount
+        - (SELECT IFNULL(SUM(Amount),0) FROM Session_Amount_List WHERE Session_Id = OLD.Session_Id)
+    WHERE Player_Id = OLD.Player_Id;
+END;
+
+COMMIT;
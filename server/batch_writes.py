@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Batched writes to the Carolina Card Club database: each operation is one
+IMMEDIATE transaction with its rows sent through executemany, instead of
+a connect-execute-commit (or a sqlite3 shell-out) per row.
+
+Commands:
+    stop-running     stop every running session (e.g. at close), at --epoch
+                     or now, rounded down to the minute as session.py does
+    pay              apply payments given as PLAYER_ID:AMOUNT arguments
+    zero-negative    pay off every negative balance, dated at the player's
+                     last session stop (what bin/zero_negative_balances did)
+    import-players   add the players in a CSV of Name,Email,Phone[,Category]
+    new-player       add one player (what bin/new_player did)
+
+Each committed batch is published on the session app's change feed
+(client/changefeed.py) with no player named, so a session list that is
+up re-fetches everything at once rather than at its next fallback poll.
+
+Usage:
+    python3 batch_writes.py stop-running
+    python3 batch_writes.py pay 12:40 31:-5 --epoch 1760000000
+    python3 batch_writes.py import-players new_players.csv --db CarolinaCardClub.db.bak
+    python3 batch_writes.py new-player "Jane Doe" jane@example.com 919-555-0100
+"""
+import argparse
+import contextlib
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "client"))
+
+from changefeed import publish  # noqa: E402
+from sessionengine import session_stop_epoch  # noqa: E402
+
+DEFAULT_DB = os.path.join(HERE, "CarolinaCardClub.db")
+DEFAULT_CATEGORY = "Regular"
+
+STOP_SESSION_SQL = """
+UPDATE Session SET Stop_Epoch = MAX(?, Start_Epoch)
+WHERE Session_Id = ? AND Stop_Epoch IS NULL
+"""
+
+INSERT_PAYMENT_SQL = "INSERT INTO Payment (Player_Id, Amount, Epoch) VALUES (?, ?, ?)"
+
+# As bin/zero_negative_balances: a payment of -Balance for every player in
+# debt, dated at their most recent session stop (or now, if none)
+NEGATIVE_BALANCE_SQL = """
+SELECT pb.Player_Id, -pb.Balance, COALESCE(last.Most_Recent_Stop_Epoch, ?)
+FROM Player_Balance pb
+LEFT JOIN Player_Most_Recent_Session_Stop_Epoch last ON pb.Player_Id = last.Player_Id
+WHERE pb.Balance < 0
+ORDER BY pb.Player_Id
+"""
+
+INSERT_PLAYER_SQL = "INSERT INTO Player (Name, Player_Category_Id) VALUES (?, ?)"
+INSERT_EMAIL_SQL = "INSERT OR IGNORE INTO Email_Address (Address) VALUES (?)"
+INSERT_PHONE_SQL = "INSERT OR IGNORE INTO Phone_Number (Number) VALUES (?)"
+LINK_EMAIL_SQL = """
+INSERT OR IGNORE INTO Player_Email (Player_Id, EmailAddress_Id)
+SELECT ?, EmailAddress_Id FROM Email_Address WHERE Address = ?
+"""
+LINK_PHONE_SQL = """
+INSERT OR IGNORE INTO Player_Phone (Player_Id, PhoneNumber_Id)
+SELECT ?, PhoneNumber_Id FROM Phone_Number WHERE Number = ?
+"""
+
+
+@contextlib.contextmanager
+def transaction(con):
+    """
+    One IMMEDIATE transaction: the write lock is taken up front, so a batch
+    either waits for other writers before it starts or fails before
+    writing anything, and is rolled back whole on any error.
+    """
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        yield con
+    except BaseException:
+        con.rollback()
+        raise
+    con.commit()
+
+
+def notify(event):
+    """Publish a committed batch on the change feed, where this platform has one."""
+    try:
+        publish(event)
+    except (OSError, AttributeError):  # No AF_UNIX on Windows
+        pass
+
+
+def stop_running_sessions(con, stop_epoch=None, session_ids=None):
+    """
+    Stop the given sessions, or every running one, at stop_epoch (never
+    before a session's own start).  Sessions already stopped are left
+    alone.  Return the number stopped.
+    """
+    stop_epoch = session_stop_epoch(int(time.time() if stop_epoch is None else stop_epoch))
+    with transaction(con):
+        if session_ids is None:
+            session_ids = [session_id for (session_id,) in
+                           con.execute("SELECT Session_Id FROM Session WHERE Stop_Epoch IS NULL")]
+        cursor = con.executemany(STOP_SESSION_SQL, ((stop_epoch, session_id) for session_id in session_ids))
+    n_stopped = max(cursor.rowcount, 0)
+    if n_stopped:
+        notify("sessions_stopped")
+    return n_stopped
+
+
+def apply_payments(con, payments):
+    """
+    Insert (Player_Id, Amount, Epoch) payments.  Every Player_Id must exist,
+    or nothing is written and ValueError says which do not.
+    Return the number of payments made.
+    """
+    payments = list(payments)
+    with transaction(con):
+        known = {player_id for (player_id,) in con.execute("SELECT Player_Id FROM Player")}
+        unknown = sorted({player_id for (player_id, _amount, _epoch) in payments} - known)
+        if unknown:
+            raise ValueError(f"no such Player_Id: {', '.join(map(str, unknown))}")
+        con.executemany(INSERT_PAYMENT_SQL, payments)
+    if payments:
+        notify("payments_applied")
+    return len(payments)
+
+
+def negative_balance_payments(con, epoch=None):
+    """The (Player_Id, Amount, Epoch) payments that would zero every negative balance."""
+    return con.execute(NEGATIVE_BALANCE_SQL, (int(time.time() if epoch is None else epoch),)).fetchall()
+
+
+def zero_negative_balances(con, epoch=None):
+    """
+    Make negative_balance_payments in the transaction that finds them,
+    so a session stopped in between cannot make them stale: atomic, as
+    bin/zero_negative_balances's one INSERT ... SELECT was.
+    Return the payments made.
+    """
+    with transaction(con):
+        payments = negative_balance_payments(con, epoch)
+        con.executemany(INSERT_PAYMENT_SQL, payments)
+    if payments:
+        notify("payments_applied")
+    return payments
+
+
+def import_players(con, players, default_category=DEFAULT_CATEGORY):
+    """
+    Add (Name, Email, Phone[, Category name]) players, linking each to
+    its email address and phone number (added if new; either may be
+    empty).  Return the new Player_Ids, in the order given.
+    """
+    players = [tuple(player) + (None,) * (4 - len(player)) for player in players]
+    with transaction(con):
+        categories = dict(con.execute("SELECT Name, Player_Category_Id FROM Player_Category"))
+        missing = sorted({category or default_category for (*_contact, category) in players} -
+                         categories.keys())
+        if missing:
+            raise ValueError(f"no such Player_Category: {', '.join(missing)}")
+        # AUTOINCREMENT hands out ids one past the largest ever used, and
+        # nobody else can insert while this transaction holds the write lock
+        (last_id,) = con.execute("SELECT MAX(IFNULL((SELECT seq FROM sqlite_sequence "
+                                 "WHERE name = 'Player'), 0), IFNULL(MAX(Player_Id), 0)) "
+                                 "FROM Player").fetchone()
+        con.executemany(INSERT_PLAYER_SQL, ((name, categories[category or default_category])
+                                            for (name, _email, _phone, category) in players))
+        player_ids = list(range(last_id + 1, last_id + 1 + len(players)))
+        (inserted,) = con.execute("SELECT COUNT(*) FROM Player WHERE Player_Id > ?", (last_id,)).fetchone()
+        if inserted != len(players):
+            raise RuntimeError(f"expected {len(players)} new Player_Ids after {last_id}, found {inserted}")
+        emails = [(player_id, email) for (player_id, (_name, email, _phone, _category))
+                  in zip(player_ids, players) if email]
+        phones = [(player_id, phone) for (player_id, (_name, _email, phone, _category))
+                  in zip(player_ids, players) if phone]
+        con.executemany(INSERT_EMAIL_SQL, ((email,) for (_player_id, email) in emails))
+        con.executemany(INSERT_PHONE_SQL, ((phone,) for (_player_id, phone) in phones))
+        con.executemany(LINK_EMAIL_SQL, emails)
+        con.executemany(LINK_PHONE_SQL, phones)
+    if player_ids:
+        notify("players_added")
+    return player_ids
+
+
+def parse_payment(text):
+    """PLAYER_ID:AMOUNT, for argparse."""
+    try:
+        (player_id, amount) = text.split(":")
+        return (int(player_id), int(amount))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PLAYER_ID:AMOUNT, got {text!r}")
+
+
+def read_players_csv(path):
+    """Rows of Name,Email,Phone[,Category], skipping a header row starting with Name."""
+    with open(path, newline="") as fh:
+        rows = [row for row in csv.reader(fh) if row and any(cell.strip() for cell in row)]
+    if rows and rows[0][0].strip().casefold() == "name":
+        rows = rows[1:]
+    return [tuple(cell.strip() or None for cell in row[:4]) for row in rows]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Batched writes to the Carolina Card Club database.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    commands = ap.add_subparsers(dest="command", required=True)
+    stop = commands.add_parser("stop-running", help="Stop every running session")
+    stop.add_argument("--epoch", type=int, help="Stop time (default: now)")
+    pay = commands.add_parser("pay", help="Apply payments")
+    pay.add_argument("payments", nargs="+", type=parse_payment, metavar="PLAYER_ID:AMOUNT")
+    pay.add_argument("--epoch", type=int, help="Payment time (default: now)")
+    zero = commands.add_parser("zero-negative", help="Pay off every negative balance")
+    zero.add_argument("--dry-run", action="store_true", help="Only list the payments")
+    imp = commands.add_parser("import-players", help="Add players from a CSV of Name,Email,Phone[,Category]")
+    imp.add_argument("csv")
+    new = commands.add_parser("new-player", help="Add one player")
+    new.add_argument("name")
+    new.add_argument("email")
+    new.add_argument("phone")
+    new.add_argument("--category", default=DEFAULT_CATEGORY)
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+
+    con = sqlite3.connect(args.db, timeout=5.0)
+    try:
+        if args.command == "stop-running":
+            n_stopped = stop_running_sessions(con, args.epoch)
+            print(f"Stopped {n_stopped} running sessions.")
+        elif args.command == "pay":
+            epoch = int(time.time() if args.epoch is None else args.epoch)
+            n_payments = apply_payments(con, ((player_id, amount, epoch)
+                                              for (player_id, amount) in args.payments))
+            print(f"Applied {n_payments} payments.")
+        elif args.command == "zero-negative":
+            payments = negative_balance_payments(con) if args.dry_run else zero_negative_balances(con)
+            for (player_id, amount, epoch) in payments:
+                print(f"Player_Id {player_id}: pay {amount} at {epoch}")
+            if not args.dry_run:
+                print(f"Applied {len(payments)} payments.")
+        elif args.command == "import-players":
+            player_ids = import_players(con, read_players_csv(args.csv))
+            print(f"Imported {len(player_ids)} players"
+                  + (f" (Player_Id {player_ids[0]}..{player_ids[-1]})." if player_ids else "."))
+        else:
+            (player_id,) = import_players(con, [(args.name, args.email, args.phone, args.category)])
+            print(f"Added {args.name} as Player_Id {player_id}.")
+    except (ValueError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        con.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
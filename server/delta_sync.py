@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Row-level delta sync of the Carolina Card Club tables that change between
+pushes and pulls (Player, Session, Payment and the contact tables), so a
+copy can be brought up to date without moving the whole database file
+as bin/push_db and bin/pull_db do.
+
+Each table's rows are hashed in buckets of LEAF_WIDTH consecutive keys,
+and the bucket hashes into a tree with FANOUT children per node (Merkle
+style).  The two sides compare the tree top-down, one message per level
+for all the tables together, and only the rows of the buckets that
+differ are sent across and applied, in one transaction.
+
+Conflicts: after a sync, the bucket hashes both sides then agree on are
+kept next to the target as <target>.sync.json.  Next time, a bucket the
+sync would overwrite that the target has changed since then (a session
+entered locally while the copy being pulled from moved on, say) stops
+the sync before anything is written, unless --force.
+
+The sides talk in JSON messages (Endpoint.handle), so one side can be
+remote.  db_handler.php has no sync action yet, so here both sides are
+database files and the side named by --remote (default: the source) is
+reached through a loopback that encodes every message as it would go on
+the wire and counts the bytes, for comparison with a whole-file copy.
+
+Usage:
+    python3 delta_sync.py /tmp/remote.db CarolinaCardClub.db          # pull remote.db's rows into the local db
+    python3 delta_sync.py CarolinaCardClub.db /tmp/remote.db --remote target
+    python3 delta_sync.py A.db B.db --dry-run --tables Session Payment
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+import batch_writes
+
+# table -> key columns, in the order changes are applied (referenced rows
+# before the rows referring to them).  Links are bucketed by Player_Id.
+SYNC_TABLES = {
+    "Player": ("Player_Id",),
+    "Email_Address": ("EmailAddress_Id",),
+    "Phone_Number": ("PhoneNumber_Id",),
+    "Player_Email": ("Player_Id", "EmailAddress_Id"),
+    "Player_Phone": ("Player_Id", "PhoneNumber_Id"),
+    "Session": ("Session_Id",),
+    "Payment": ("Payment_Id",),
+}
+
+LEAF_WIDTH = 16     # Consecutive keys per bucket
+FANOUT = 16         # Children per tree node
+HASH_CHARS = 16     # Hex digits of sha256 kept per node: 64 bits
+
+
+class SyncError(RuntimeError):
+    """The two databases cannot be synced as asked."""
+
+
+def node_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:HASH_CHARS]
+
+
+def encode_row(row):
+    return json.dumps(row, separators=(",", ":"))
+
+
+class Endpoint:
+    """
+    One side of a sync: a database and the hash tree of each table,
+    built on first use, answering the messages in handle().
+    """
+
+    def __init__(self, db_path, writable=False):
+        if not os.path.exists(db_path):
+            raise SyncError(f"database not found: {db_path}")
+        self.db_path = db_path
+        self.con = (sqlite3.connect(db_path) if writable
+                    else sqlite3.connect(f"file:{db_path}?mode=ro", uri=True))
+        self.trees = {}  # table -> [{node: hash} for each level, leaves first]
+
+    def close(self):
+        self.con.close()
+
+    def handle(self, request):
+        """Answer one message: {"op": ..., ...} -> a JSON-able response."""
+        op = request["op"]
+        if op == "summary":
+            return self.summary(request["tables"])
+        if op == "nodes":
+            return {table: self.nodes(table, request["level"], parents)
+                    for (table, parents) in request["parents"].items()}
+        if op == "rows":
+            return {table: self.rows(table, buckets) for (table, buckets) in request["buckets"].items()}
+        if op == "apply":
+            return self.apply(request["changes"])
+        raise SyncError(f"unknown sync message {op!r}")
+
+    def columns(self, table):
+        return [row[1] for row in self.con.execute(f'PRAGMA table_info("{table}")')]
+
+    def bucket_rows(self, table, where="", params=()):
+        """(bucket, row) in key order, for the rows matching where."""
+        key = SYNC_TABLES[table]
+        cursor = self.con.execute(f'SELECT * FROM "{table}" {where} ORDER BY {", ".join(key)}', params)
+        key_index = self.columns(table).index(key[0])
+        for row in cursor:
+            yield (row[key_index] // LEAF_WIDTH, list(row))
+
+    def leaves(self, table):
+        """{bucket: hash of its rows} for the whole table."""
+        if table not in self.trees:
+            leaves = {}
+            (bucket, hasher) = (None, None)
+            for (row_bucket, row) in self.bucket_rows(table):
+                if row_bucket != bucket:
+                    if hasher:
+                        leaves[bucket] = hasher.hexdigest()[:HASH_CHARS]
+                    (bucket, hasher) = (row_bucket, hashlib.sha256())
+                hasher.update(encode_row(row).encode() + b"\n")
+            if hasher:
+                leaves[bucket] = hasher.hexdigest()[:HASH_CHARS]
+            self.trees[table] = [leaves]
+        return self.trees[table][0]
+
+    def level(self, table, level):
+        """{node: hash} at level (0: buckets); a node's children are level-1 nodes node*FANOUT..."""
+        self.leaves(table)
+        tree = self.trees[table]
+        while len(tree) <= level:
+            children = {}
+            for (child, child_hash) in sorted(tree[-1].items()):
+                children.setdefault(child // FANOUT, []).append(f"{child}:{child_hash}")
+            tree.append({node: node_hash(",".join(parts)) for (node, parts) in children.items()})
+        return tree[level]
+
+    def summary(self, tables):
+        """Each table's columns, highest bucket and row count, and the database's size."""
+        (page_count,) = self.con.execute("PRAGMA page_count").fetchone()
+        (page_size,) = self.con.execute("PRAGMA page_size").fetchone()
+        return {"file_bytes": page_count * page_size,
+                "tables": {table: {"columns": self.columns(table),
+                                   "max_bucket": max(self.leaves(table), default=-1),
+                                   "rows": self.con.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]}
+                           for table in tables}}
+
+    def nodes(self, table, level, parents):
+        """{node: hash} of the children at level of the given parents (None: the root at level)."""
+        nodes = self.level(table, level)
+        if parents is None:
+            return {str(node): digest for (node, digest) in nodes.items() if node == 0}
+        wanted = set(parents)
+        return {str(node): digest for (node, digest) in nodes.items() if node // FANOUT in wanted}
+
+    def rows(self, table, buckets):
+        """Every row in the given buckets."""
+        key = SYNC_TABLES[table][0]
+        found = []
+        for bucket in buckets:
+            found.extend(row for (_, row) in self.bucket_rows(
+                table, f"WHERE {key} BETWEEN ? AND ?", (bucket * LEAF_WIDTH, bucket * LEAF_WIDTH + LEAF_WIDTH - 1)))
+        return found
+
+    def apply(self, changes):
+        """
+        Make each given bucket hold exactly the given rows, in one
+        transaction: rows not given are deleted, new rows inserted and
+        changed ones updated in place (so the Session, Payment and Player
+        triggers of balance_ledger.sql and recipient_list.sql see an
+        UPDATE, which INSERT OR REPLACE would hide from them), identical
+        ones left alone.  Deletes go children first, writes parents first.
+        -> {table: [deleted, written]}.
+        """
+        plans = {}
+        for table in SYNC_TABLES:
+            if table not in changes:
+                continue
+            key = SYNC_TABLES[table]
+            columns = self.columns(table)
+            key_indexes = [columns.index(column) for column in key]
+            current = {tuple(row[i] for i in key_indexes): row
+                       for row in self.rows(table, changes[table]["buckets"])}
+            wanted = {tuple(row[i] for i in key_indexes): row for row in changes[table]["rows"]}
+            deleted = [key_values for key_values in current if key_values not in wanted]
+            inserted = [row for (key_values, row) in wanted.items() if key_values not in current]
+            updated = [row for (key_values, row) in wanted.items()
+                       if key_values in current and current[key_values] != row]
+            plans[table] = (columns, key_indexes, deleted, inserted, updated)
+
+        counts = {}
+        with batch_writes.transaction(self.con):
+            for table in reversed(list(plans)):
+                (_columns, _key_indexes, deleted, _inserted, _updated) = plans[table]
+                self.con.executemany(f'DELETE FROM "{table}" WHERE '
+                                     + " AND ".join(f"{column} = ?" for column in SYNC_TABLES[table]), deleted)
+            for (table, (columns, key_indexes, deleted, inserted, updated)) in plans.items():
+                key = SYNC_TABLES[table]
+                values = [i for i in range(len(columns)) if i not in key_indexes]
+                if updated and values:
+                    self.con.executemany(
+                        f'UPDATE "{table}" SET ' + ", ".join(f"{columns[i]} = ?" for i in values)
+                        + " WHERE " + " AND ".join(f"{column} = ?" for column in key),
+                        ([row[i] for i in values] + [row[i] for i in key_indexes] for row in updated))
+                self.con.executemany(f'INSERT INTO "{table}" ({", ".join(columns)}) '
+                                     f'VALUES ({", ".join("?" * len(columns))})', inserted)
+                counts[table] = [len(deleted), len(inserted) + len(updated)]
+        self.trees.clear()
+        return counts
+
+
+class Loopback:
+    """
+    Reach an Endpoint as if it were remote: every message and reply goes
+    through JSON, and the bytes each way and the round trips are counted.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.sent = 0
+        self.received = 0
+        self.round_trips = 0
+
+    def handle(self, request):
+        body = json.dumps(request, separators=(",", ":"))
+        self.sent += len(body.encode())
+        reply = json.dumps(self.endpoint.handle(json.loads(body)), separators=(",", ":"))
+        self.received += len(reply.encode())
+        self.round_trips += 1
+        return json.loads(reply)
+
+
+def tree_height(max_bucket):
+    """The level at which every bucket up to max_bucket is under node 0."""
+    height = 0
+    while max_bucket >= FANOUT ** height:
+        height += 1
+    return height
+
+
+def differing_buckets(source, target, tables, height):
+    """
+    Walk both trees down from their roots, one message per level for all
+    the tables; -> {table: {bucket: (source hash, target hash)}} where they differ.
+    """
+    parents = {table: None for table in tables}
+    for level in range(height, -1, -1):
+        request = {"op": "nodes", "level": level, "parents": parents}
+        (theirs, ours) = (source.handle(request), target.handle(request))
+        parents = {}
+        differing = {}
+        for table in request["parents"]:
+            (source_nodes, target_nodes) = (theirs[table], ours[table])
+            differing[table] = {int(node): (source_nodes.get(node), target_nodes.get(node))
+                                for node in set(source_nodes) | set(target_nodes)
+                                if source_nodes.get(node) != target_nodes.get(node)}
+            if differing[table]:
+                parents[table] = sorted(differing[table])
+        if not parents:
+            return {}
+    return {table: nodes for (table, nodes) in differing.items() if nodes}
+
+
+def base_path(target_path):
+    return target_path + ".sync.json"
+
+
+def load_base(target_path, source_id):
+    """The bucket hashes of the last sync from source_id into target_path, {} if none."""
+    try:
+        with open(base_path(target_path)) as fh:
+            base = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return base["tables"] if base.get("source") == source_id else {}
+
+
+def save_base(target_path, source_id, tables):
+    tmp_path = base_path(target_path) + ".tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump({"source": source_id, "tables": tables}, fh, separators=(",", ":"))
+    os.replace(tmp_path, base_path(target_path))
+
+
+def sync(source, target, tables=tuple(SYNC_TABLES), base=None, force=False, dry_run=False):
+    """
+    Bring target's tables to source's rows, changing only the buckets
+    that differ.  source and target are Endpoints or Loopbacks; base is
+    {table: {bucket: hash}} from the last sync (see load_base).
+    -> report dict: per-table differing buckets, rows sent, [deleted, written]
+    (None on a dry run), and "conflicts": the buckets target changed since base.
+    Raises SyncError on conflicts unless force, before writing anything.
+    """
+    request = {"op": "summary", "tables": list(tables)}
+    (theirs, ours) = (source.handle(request), target.handle(request))
+    for table in tables:
+        if theirs["tables"][table]["columns"] != ours["tables"][table]["columns"]:
+            raise SyncError(f"{table} has different columns on the two sides; sync the schema first")
+    height = tree_height(max(max(summary["tables"][table]["max_bucket"] for table in tables)
+                             for summary in (theirs, ours)))
+    differing = differing_buckets(source, target, tables, height)
+
+    conflicts = {}
+    if base:
+        for (table, buckets) in differing.items():
+            changed = sorted(bucket for (bucket, (_, target_hash)) in buckets.items()
+                             if target_hash != base.get(table, {}).get(str(bucket)))
+            if changed:
+                conflicts[table] = changed
+    report = {"source_bytes": theirs["file_bytes"], "height": height, "conflicts": conflicts,
+              "tables": {table: {"rows": theirs["tables"][table]["rows"],
+                                 "buckets": len(differing.get(table, {})), "sent": 0,
+                                 "applied": None if dry_run else [0, 0]}
+                         for table in tables}}
+    if conflicts and not force:
+        raise SyncError("the target changed since the last sync in "
+                        + ", ".join(f"{table} ({len(buckets)} buckets)" for (table, buckets) in conflicts.items())
+                        + "; nothing written (--force to overwrite)")
+    if differing:
+        rows = source.handle({"op": "rows", "buckets": {table: sorted(buckets)
+                                                        for (table, buckets) in differing.items()}})
+        for (table, table_rows) in rows.items():
+            report["tables"][table]["sent"] = len(table_rows)
+        if not dry_run:
+            applied = target.handle({"op": "apply", "changes": {
+                table: {"buckets": sorted(differing[table]), "rows": rows[table]} for table in differing}})
+            for (table, counts) in applied.items():
+                report["tables"][table]["applied"] = counts
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sync changed rows from one CCC database into another.")
+    ap.add_argument("source", help="Database to copy rows from")
+    ap.add_argument("target", help="Database to bring up to date")
+    ap.add_argument("--tables", nargs="+", choices=list(SYNC_TABLES), default=list(SYNC_TABLES),
+                    help="Tables to sync (default: all of them)")
+    ap.add_argument("--remote", choices=("source", "target"), default="source",
+                    help="Which side to count as across the network (default: source)")
+    ap.add_argument("--dry-run", action="store_true", help="Report what differs; write nothing")
+    ap.add_argument("--force", action="store_true",
+                    help="Overwrite buckets the target changed since the last sync")
+    args = ap.parse_args()
+    tables = [table for table in SYNC_TABLES if table in args.tables]
+
+    try:
+        source = Endpoint(args.source)
+        target = Endpoint(args.target, writable=True)
+    except SyncError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    source_id = os.path.abspath(args.source)
+    remote = Loopback(source if args.remote == "source" else target)
+    (source_side, target_side) = (remote, target) if args.remote == "source" else (source, remote)
+    try:
+        report = sync(source_side, target_side, tables, load_base(args.target, source_id),
+                      args.force, args.dry_run)
+        if not args.dry_run:
+            base = {table: {str(bucket): leaf for (bucket, leaf) in source.leaves(table).items()}
+                    for table in tables}
+            save_base(args.target, source_id, dict(load_base(args.target, source_id), **base))
+    except (SyncError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        source.close()
+        target.close()
+
+    print(f"{'table':>14} {'rows':>8} {'buckets':>8} {'sent':>6} {'deleted':>8} {'written':>8}")
+    for (table, info) in report["tables"].items():
+        (deleted, written) = info["applied"] or ("-", "-")
+        print(f"{table:>14} {info['rows']:>8} {info['buckets']:>8} {info['sent']:>6} {deleted:>8} {written:>8}")
+    if report["conflicts"]:
+        print("Overwrote target changes in: " + ", ".join(report["conflicts"]))
+    print(f"{remote.sent + remote.received:,} bytes in {remote.round_trips} round trips "
+          f"({remote.sent:,} sent, {remote.received:,} received); "
+          f"a full copy is {report['source_bytes']:,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,30 @@
 #!/usr/bin/env python3
+import gzip
 import json
 import os
 import sqlite3
 import sys
+import threading
+import time
 import urllib.parse
 import urllib.request
 
-import pyperclip
+import recipient_list
 
 # Prefer the remote (canonical) database via db_handler.php's whitelisted,
-# read-only 'email_list' query. If the remote is unreachable, fall back to the
-# local server copy. If neither works, die.
+# read-only 'email_list' query, but ask the local server copy at the same
+# time: if the remote has not answered within REMOTE_DEADLINE, or fails, use
+# the local rows (and say so). If neither works, die.
 #
-# Same endpoint/credentials as bin/push_db / bin/pull_db / bin/deploy_db_handler.
-URL = "https://carolinacardclub.com/db_handler.php"
-API_KEY = "31221da269c89d6e770cd96ad259433dffedd1f75250597cff4114144086129797bf09ab6fff19234e9674d7e48e428cd8aeb8a5a23a36abcd705acae8d1c030"
-REQUEST_TIMEOUT = 8  # seconds — fail fast to the local fallback if remote is down
+# Same endpoint/credentials as bin/push_db / bin/pull_db / bin/deploy_db_handler;
+# override via CCC_DB_URL / CCC_DB_API_KEY (e.g. to use local_db_handler.py).
+URL = os.environ.get("CCC_DB_URL", "https://carolinacardclub.com/db_handler.php")
+API_KEY = os.environ.get(
+    "CCC_DB_API_KEY",
+    "31221da269c89d6e770cd96ad259433dffedd1f75250597cff4114144086129797bf09ab6fff19234e9674d7e48e428cd8aeb8a5a23a36abcd705acae8d1c030",
+)
+REQUEST_TIMEOUT = 8  # seconds — the most the remote gets if the local copy fails too
+REMOTE_DEADLINE = float(os.environ.get("CCC_REMOTE_DEADLINE", "2"))  # seconds for the remote to win
 
 # The local DB lives next to this script in server/.
 LOCAL_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CarolinaCardClub.db")
@@ -25,12 +34,13 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "application/json, text/plain, */*",
+    "Accept-Encoding": "gzip",
     "Accept-Language": "en-US,en;q=0.5",
     "Content-Type": "application/x-www-form-urlencoded",
 }
 
 
-def fetch_remote_rows():
+def fetch_remote_rows(timeout=REQUEST_TIMEOUT):
     """Return Email_List rows (list of dicts) from the remote server, or raise."""
     body = urllib.parse.urlencode({
         "apiKey": API_KEY,
@@ -38,8 +48,11 @@ def fetch_remote_rows():
         "query": "email_list",
     }).encode()
     req = urllib.request.Request(URL, data=body, headers=HEADERS, method="POST")
-    with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
-        payload = resp.read().decode()
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        payload = resp.read()
+        if resp.headers.get("Content-Encoding") == "gzip":
+            payload = gzip.decompress(payload)
+        payload = payload.decode()
     rows = json.loads(payload)
     if isinstance(rows, dict) and "error" in rows:
         raise RuntimeError("server error: " + rows["error"])
@@ -48,11 +61,11 @@ def fetch_remote_rows():
     return rows
 
 
-def fetch_local_rows():
+def fetch_local_rows(db_path=LOCAL_DB):
     """Return Email_List rows (list of dicts) from the local DB, or raise."""
-    if not os.path.exists(LOCAL_DB) or os.path.getsize(LOCAL_DB) == 0:
-        raise RuntimeError("local DB missing or empty: " + LOCAL_DB)
-    con = sqlite3.connect(LOCAL_DB)
+    if not os.path.exists(db_path) or os.path.getsize(db_path) == 0:
+        raise RuntimeError("local DB missing or empty: " + db_path)
+    con = sqlite3.connect(db_path)
     try:
         con.row_factory = sqlite3.Row
         cur = con.execute("SELECT * FROM Email_List")
@@ -61,37 +74,120 @@ def fetch_local_rows():
         con.close()
 
 
-# --- choose a source: remote first, then local, else die ---
-try:
-    rows = fetch_remote_rows()
-    source = "remote"
-except Exception as remote_err:
-    print("email_list: remote DB unreachable (%s); trying local copy..." % remote_err,
-          file=sys.stderr)
-    try:
-        rows = fetch_local_rows()
-        source = "local"
-        print("email_list: using LOCAL database %s (may be stale)." % LOCAL_DB,
-              file=sys.stderr)
-    except Exception as local_err:
-        sys.exit("email_list: no database reachable — remote (%s) and local (%s) both failed."
-                 % (remote_err, local_err))
-
-# --- build the list (identical logic regardless of source) ---
-email_addresses = ''
-n_email_addresses = 0
-for row in rows:
-    Name = row["Name"]
-    EmailAddresses = row["EmailAddresses"]
-    PhoneNumbers = row["PhoneNumbers"]
-    Flag = row["Flag"]
-    if PhoneNumbers != '[]' and Flag is None:
+class Attempt:
+    """
+    One fetch running on its own daemon thread, so a remote that hangs can
+    be given up on (and left behind) instead of holding everything up.
+    """
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.result = None
+        self.error = None
+        self.elapsed = None
+        self.done = threading.Event()
+        self.started = time.monotonic()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
         try:
-            for EmailAddress in json.loads(EmailAddresses):
-                email_addresses += (Name + " <" + EmailAddress + ">\n")
-                n_email_addresses += 1
-        except json.JSONDecodeError:
-            print("Error: Invalid JSON string provided for email addresses.")
-
-pyperclip.copy(email_addresses)
-print("Copied " + str(n_email_addresses) + " email addresses to clipboard from " + source + " db.")
+            self.result = self.fetch()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed = time.monotonic() - self.started
+            self.done.set()
+
+    def wait(self, until=None):
+        """Wait for the fetch, until the monotonic time until at most; True if it succeeded."""
+        self.done.wait(None if until is None else max(until - time.monotonic(), 0))
+        return self.done.is_set() and self.error is None
+
+
+def choose_recipients(deadline=REMOTE_DEADLINE, remote_fetch=None, local_fetch=None):
+    """
+    Fetch from the remote and the local DB at once.  The remote wins if it
+    answers within deadline seconds; otherwise (or as soon as it fails)
+    the local copy is used; if that fails too, the remote still has until
+    REQUEST_TIMEOUT.  Returns ((name, address) pairs, source, how it was
+    chosen), or raises.
+    """
+    started = time.monotonic()
+    remote = Attempt(remote_fetch or fetch_remote_recipients)
+    local = Attempt(local_fetch or fetch_local_recipients)
+    if remote.wait(started + deadline):
+        return (remote.result, "remote", "remote answered in %.2fs" % remote.elapsed)
+    if remote.done.is_set():
+        why = "remote failed after %.2fs (%s)" % (remote.elapsed, remote.error)
+    else:
+        why = "remote gave no answer within the %gs deadline" % deadline
+    if local.wait():
+        return (local.result, "local", why)
+    if remote.wait(started + REQUEST_TIMEOUT + 1):
+        return (remote.result, "remote",
+                "remote answered in %.2fs, after local failed (%s)" % (remote.elapsed, local.error))
+    raise RuntimeError("no database reachable — remote (%s) and local (%s) both failed."
+                       % (remote.error or "no answer", local.error))
+
+
+def recipient_pairs(rows):
+    """(name, address) for every address to mail, from Email_List rows."""
+    for row in rows:
+        Name = row["Name"]
+        EmailAddresses = row["EmailAddresses"]
+        PhoneNumbers = row["PhoneNumbers"]
+        Flag = row["Flag"]
+        if PhoneNumbers != '[]' and Flag is None:
+            try:
+                for EmailAddress in json.loads(EmailAddresses):
+                    yield (Name, EmailAddress)
+            except json.JSONDecodeError:
+                print("Error: Invalid JSON string provided for email addresses.")
+
+
+def fetch_remote_recipients():
+    return list(recipient_pairs(fetch_remote_rows()))
+
+
+def fetch_local_recipients(db_path=LOCAL_DB):
+    """
+    (name, address) pairs from the local DB: straight from the maintained
+    Email_Recipient table if recipient_list.py installed it, else via Email_List.
+    """
+    if not os.path.exists(db_path) or os.path.getsize(db_path) == 0:
+        raise RuntimeError("local DB missing or empty: " + db_path)
+    con = sqlite3.connect(db_path)
+    try:
+        if recipient_list.is_installed(con):
+            return list(recipient_list.read_recipients(con))
+    finally:
+        con.close()
+    return list(recipient_pairs(fetch_local_rows(db_path)))
+
+
+def build_list(recipients):
+    """The Name <address> lines of every address to mail, and how many there are."""
+    lines = [Name + " <" + EmailAddress + ">\n" for (Name, EmailAddress) in recipients]
+    return ("".join(lines), len(lines))
+
+
+def main():
+    try:
+        (recipients, source, how) = choose_recipients()
+    except RuntimeError as e:
+        sys.exit("email_list: %s" % e)
+    if source == "local":
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(os.path.getmtime(LOCAL_DB)))
+        print("email_list: %s; using LOCAL database %s, last modified %s (may be stale)."
+              % (how, LOCAL_DB, modified), file=sys.stderr)
+
+    (email_addresses, n_email_addresses) = build_list(recipients)
+
+    import pyperclip
+    pyperclip.copy(email_addresses)
+    print("Copied " + str(n_email_addresses) + " email addresses to clipboard from " + source
+          + " db (" + how + ").")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,14 @@ This is the headless replacement for the clipboard-based email_list_to_clipboard
 It applies the IDENTICAL inclusion rule:
     include a player only if PhoneNumbers != '[]'  AND  Flag IS NULL
 and expands the JSON array of email addresses, one entry per address.
+Where recipient_list.py has installed the Email_Recipient table, the list
+is read from it, already filtered and expanded.
 
 Output (default: weekly_recipients.json next to this script):
     {
       "generated_at": "<ISO-8601 local time>",
       "source_db": "<absolute path of the db read>",
+      "content_sha256": "<hash of the recipients alone>",
       "count": <number of email addresses>,
       "emails": ["a@x.com", ...],                # flat list, for Gmail BCC
       "recipients": [{"name": "...", "email": "..."}, ...],
@@ -27,16 +30,25 @@ Usage:
     python3 export_recipients.py                       # live db -> weekly_recipients.json
     python3 export_recipients.py --db CarolinaCardClub.db.bak --out /tmp/test.json
     python3 export_recipients.py --clipboard           # also copy bcc_line to clipboard
+    python3 export_recipients.py --format ndjson --out /tmp/recipients.ndjson
+
+The JSON also carries "content_sha256", a hash of the recipients alone,
+so --skip-unchanged can leave the file untouched when nobody changed.
 """
 import argparse
+import csv
+import hashlib
 import json
 import os
+import shutil
 import sqlite3
 import sys
 import tempfile
-import urllib.request
 from datetime import datetime
 
+import pull_db
+import recipient_list
+
 DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CarolinaCardClub.db")
 DEFAULT_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weekly_recipients.json")
 
@@ -54,37 +66,39 @@ DEFAULT_API_KEY = os.environ.get(
 
 def fetch_remote_db(url, api_key):
     """Download the authoritative DB to a temp file and return its path."""
-    req = urllib.request.Request(
-        f"{url}?apiKey={api_key}",
-        headers={
-            # Spoof Chrome to get past the server's ModSecurity, same as bin/push_db.
-            "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                           "AppleWebKit/537.36 (KHTML, like Gecko) "
-                           "Chrome/120.0.0.0 Safari/537.36"),
-            "Accept": "application/octet-stream,*/*;q=0.8",
-        },
-    )
     fd, path = tempfile.mkstemp(suffix=".db", prefix="ccc_remote_")
-    with urllib.request.urlopen(req, timeout=60) as resp, os.fdopen(fd, "wb") as out:
-        out.write(resp.read())
-    # Sanity-check it really is a SQLite file, not an error page.
-    with open(path, "rb") as fh:
-        if fh.read(16) != b"SQLite format 3\x00":
-            os.unlink(path)
-            raise RuntimeError("Remote did not return a SQLite database (bad key or ModSecurity block?)")
+    os.close(fd)
+    try:
+        # Streamed and header-checked as it arrives; gzipped, as nothing is kept to resume
+        pull_db.fetch(url, api_key, path, cache=False, resume=False, compress=True, backup=False)
+    except pull_db.DownloadError as e:
+        os.unlink(path)
+        raise RuntimeError(str(e))
     return path
 
 
-def build(db_path):
-    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
-    try:
-        rows = con.cursor().execute("SELECT * FROM Email_List;").fetchall()
-    finally:
-        con.close()
+# Rows are read FETCH_BATCH at a time, and every output is written in a
+# single pass through a generator, via temporary spool files, so memory
+# stays flat however long the list gets.
+FETCH_BATCH = 500
+FORMATS = ("json", "ndjson", "csv")
+
 
-    recipients = []
-    emails = []
-    bcc_parts = []
+def email_list_rows(con, batch=FETCH_BATCH):
+    """Stream the Email_List view's rows, batch at a time."""
+    cursor = con.execute("SELECT * FROM Email_List;")
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def recipients(rows):
+    """
+    Apply the inclusion rule to Email_List rows and expand each player's
+    JSON array of addresses: yield (name, email), one per address.
+    """
     for row in rows:
         # View column order: Name, EmailAddresses, PhoneNumbers, Super_Bowl, Flag
         Name, EmailAddresses, PhoneNumbers, Super_Bowl, Flag = row
@@ -96,24 +110,217 @@ def build(db_path):
             print(f"WARNING: invalid JSON email field for {Name!r}; skipping", file=sys.stderr)
             continue
         for addr in addresses:
-            recipients.append({"name": Name, "email": addr})
-            emails.append(addr)
-            bcc_parts.append(f"{Name} <{addr}>")
+            yield (Name, addr)
+
+
+def recipient_pairs(con):
+    """
+    (name, email) for everyone to mail: read straight from the maintained
+    Email_Recipient table (see recipient_list.py) where it is installed,
+    else worked out from Email_List.
+    """
+    if recipient_list.is_installed(con):
+        return recipient_list.read_recipients(con, FETCH_BATCH)
+    return recipients(email_list_rows(con))
+
+
+def recipient_digest():
+    """The content hash's running state; feed it each (name, email) with add_to_digest."""
+    return hashlib.sha256()
+
 
+def add_to_digest(digest, name, email):
+    digest.update(f"{name}\0{email}\n".encode())
+
+
+def open_db(db_path):
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def build(db_path):
+    """The whole export as one dict, in memory (see export() to stream it to a file)."""
+    con = open_db(db_path)
+    try:
+        pairs = list(recipient_pairs(con))
+    finally:
+        con.close()
     return {
         "generated_at": datetime.now().astimezone().isoformat(timespec="seconds"),
         "source_db": os.path.abspath(db_path),
-        "count": len(emails),
-        "emails": emails,
-        "recipients": recipients,
-        "bcc_line": "\n".join(bcc_parts) + ("\n" if bcc_parts else ""),
+        "count": len(pairs),
+        "emails": [addr for (_name, addr) in pairs],
+        "recipients": [{"name": name, "email": addr} for (name, addr) in pairs],
+        "bcc_line": "".join(f"{name} <{addr}>\n" for (name, addr) in pairs),
     }
 
 
+class JsonWriter:
+    """
+    The JSON layout build() gives, as json.dump(indent=2) writes it, plus
+    "content_sha256".  Each section is spooled as it streams by, since
+    the header (with the count and hash) has to come first.
+    """
+
+    def __init__(self, tmp_dir):
+        self.spools = [tempfile.TemporaryFile("w+", dir=tmp_dir) for _ in range(3)]
+        self.count = 0
+
+    def add(self, name, email):
+        (emails, people, bcc) = self.spools
+        separator = ",\n" if self.count else "\n"
+        emails.write(f"{separator}    {json.dumps(email)}")
+        people.write(f"{separator}    {{\n      \"name\": {json.dumps(name)},\n"
+                     f"      \"email\": {json.dumps(email)}\n    }}")
+        bcc.write(json.dumps(f"{name} <{email}>\n")[1:-1])
+        self.count += 1
+
+    def write(self, out, header):
+        out.write("{\n")
+        for (key, value) in header.items():
+            out.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+        out.write(f'  "count": {self.count},\n')
+        for (key, spool, close) in (("emails", self.spools[0], "\n  ],\n"),
+                                    ("recipients", self.spools[1], "\n  ],\n"),
+                                    ("bcc_line", self.spools[2], '"\n')):
+            spool.seek(0)
+            if key == "bcc_line":
+                out.write('  "bcc_line": "')
+            elif self.count:
+                out.write(f"  {json.dumps(key)}: [")
+            else:
+                out.write(f"  {json.dumps(key)}: [],\n")
+                continue
+            shutil.copyfileobj(spool, out)
+            out.write(close)
+        out.write("}")
+
+    def close(self):
+        for spool in self.spools:
+            spool.close()
+
+
+class NdjsonWriter:
+    """A header line ({"generated_at", "source_db", "content_sha256"}), then one {"name", "email"} per line."""
+
+    def __init__(self, tmp_dir):
+        self.spool = tempfile.TemporaryFile("w+", dir=tmp_dir)
+        self.count = 0
+
+    def add(self, name, email):
+        self.spool.write(json.dumps({"name": name, "email": email}) + "\n")
+        self.count += 1
+
+    def write(self, out, header):
+        out.write(json.dumps(header) + "\n")
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, out)
+
+    def close(self):
+        self.spool.close()
+
+
+class CsvWriter:
+    """A name,email header, then one row per address; the hash is not stored in the file."""
+
+    def __init__(self, tmp_dir):
+        self.spool = tempfile.TemporaryFile("w+", dir=tmp_dir, newline="")
+        self.rows = csv.writer(self.spool)
+        self.rows.writerow(("name", "email"))
+        self.count = 0
+
+    def add(self, name, email):
+        self.rows.writerow((name, email))
+        self.count += 1
+
+    def write(self, out, _header):
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, out)
+
+    def close(self):
+        self.spool.close()
+
+
+WRITERS = {"json": JsonWriter, "ndjson": NdjsonWriter, "csv": CsvWriter}
+
+
+def previous_digest(path, fmt):
+    """The content hash of an earlier export at path, or None."""
+    try:
+        with open(path, newline="") as fh:
+            if fmt == "json":
+                for (_i, line) in zip(range(8), fh):  # It is in the first few lines
+                    if line.startswith('  "content_sha256": '):
+                        return json.loads(line.split(":", 1)[1].rstrip(",\n"))
+                return None
+            if fmt == "ndjson":
+                return json.loads(fh.readline()).get("content_sha256")
+            rows = csv.reader(fh)
+            if next(rows, None) != ["name", "email"]:
+                return None
+            digest = recipient_digest()
+            for (name, email) in rows:
+                add_to_digest(digest, name, email)
+            return digest.hexdigest()
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def export(db_path, out_path, fmt="json", skip_unchanged=False):
+    """
+    Stream the recipients in db_path to out_path as fmt, replacing it
+    atomically.  With skip_unchanged, leave out_path alone if its
+    recipients are the same.  Return (count, written).
+    """
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    writer = WRITERS[fmt](out_dir)
+    try:
+        digest = recipient_digest()
+        con = open_db(db_path)
+        try:
+            for (name, email) in recipient_pairs(con):
+                add_to_digest(digest, name, email)
+                writer.add(name, email)
+        finally:
+            con.close()
+        content_sha256 = digest.hexdigest()
+        if skip_unchanged and previous_digest(out_path, fmt) == content_sha256:
+            return (writer.count, False)
+
+        header = {"generated_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+                  "source_db": os.path.abspath(db_path),
+                  "content_sha256": content_sha256}
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".export_recipients_")
+        try:
+            with os.fdopen(fd, "w", newline="") as out:
+                writer.write(out, header)
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return (writer.count, True)
+    finally:
+        writer.close()
+
+
+def bcc_line(db_path):
+    """The clipboard-style "Name <email>" lines."""
+    con = open_db(db_path)
+    try:
+        return "".join(f"{name} <{addr}>\n" for (name, addr) in recipient_pairs(con))
+    finally:
+        con.close()
+
+
 def main():
     ap = argparse.ArgumentParser(description="Export weekly CCC email recipients to JSON.")
     ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
-    ap.add_argument("--out", default=DEFAULT_OUT, help=f"Output JSON path (default: {DEFAULT_OUT})")
+    ap.add_argument("--out", default=DEFAULT_OUT, help=f"Output path (default: {DEFAULT_OUT})")
+    ap.add_argument("--format", choices=FORMATS, default="json",
+                    help="json (default; the layout Cowork reads), ndjson, or csv")
+    ap.add_argument("--skip-unchanged", action="store_true",
+                    help="Leave --out alone if it already lists the same recipients. Its "
+                         "generated_at then stays at the last change, which the Cowork "
+                         "workflow's staleness check would trip over; not for the cron job.")
     ap.add_argument("--remote", action="store_true",
                     help="Pull the authoritative DB from the remote handler instead of reading --db. "
                          "Only works where outbound network is allowed (your Mac, not the Cowork sandbox).")
@@ -134,21 +341,21 @@ def main():
                 sys.exit(1)
             db_path = args.db
 
-        data = build(db_path)
+        (count, written) = export(db_path, args.out, args.format, args.skip_unchanged)
+        clipboard_text = bcc_line(db_path) if args.clipboard else None
     finally:
         if tmp_db and os.path.exists(tmp_db):
             os.unlink(tmp_db)
 
-    with open(args.out, "w") as fh:
-        json.dump(data, fh, indent=2)
-
-    print(f"Exported {data['count']} email addresses "
-          f"({len(data['recipients'])} player rows) -> {args.out}")
+    if written:
+        print(f"Exported {count} email addresses -> {args.out}")
+    else:
+        print(f"Unchanged: {count} email addresses, same as {args.out}; not rewritten")
 
     if args.clipboard:
         try:
             import pyperclip
-            pyperclip.copy(data["bcc_line"])
+            pyperclip.copy(clipboard_text)
             print("Also copied Name <email> list to clipboard.")
         except Exception as e:  # pragma: no cover
             print(f"Clipboard copy skipped: {e}", file=sys.stderr)
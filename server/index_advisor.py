@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Audit the query plans of every view and every SQL string in the Python
+clients, and install the covering indexes they call for.
+
+`audit` runs EXPLAIN QUERY PLAN over each view (SELECT * FROM it) and over
+each SQL string literal in client/session.py and server/*.py, and flags:
+    SCAN        a full scan of a table (not through an index)
+    TEMP B-TREE a sort or grouping done in a temporary B-tree
+    AUTOMATIC   an index SQLite builds and throws away on every run;
+                each of these on a real table is proposed as an index
+
+indexes.sql holds the indexes chosen from that audit; `audit --with-indexes`
+shows the plans as they would be once it is installed, without touching
+the database.
+
+Commands:
+    audit     print the flagged plan steps and the proposed indexes;
+              exits 1 if a query cannot be planned
+    install   apply indexes.sql (indexes, then ANALYZE)
+
+Usage:
+    python3 index_advisor.py audit
+    python3 index_advisor.py audit --with-indexes --db /tmp/big.db
+    python3 index_advisor.py install --db CarolinaCardClub.db.bak
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "CarolinaCardClub.db")
+INDEXES_SQL = os.path.join(HERE, "indexes.sql")
+DEFAULT_SOURCES = [os.path.join(HERE, "..", "client", "session.py")] + sorted(
+    glob.glob(os.path.join(HERE, "*.py")))
+
+# Case-sensitive: the code writes its SQL keywords in capitals, and its prose does not
+SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b")
+# What SQLite says of a string that only looked like SQL
+NOT_SQL = ("syntax error", "incomplete input", "unrecognized token")
+AUTOMATIC_INDEX = re.compile(r"^SEARCH (\w+) USING AUTOMATIC (?:COVERING |PARTIAL )*INDEX \(([^)]*)\)")
+# "FROM Payment as pmt", "JOIN Session s", "LEFT JOIN "Phone_Number" as pn"
+TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:as\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|'
+                         r'INNER\b|CROSS\b|GROUP\b|ORDER\b)(\w+))?', re.IGNORECASE)
+
+
+def source_queries(paths):
+    """
+    Yield (file:line, sql) for every string literal in paths that is
+    one SQL statement, leaving out docstrings, scripts and catalog
+    (sqlite_master) queries.
+    """
+    for path in paths:
+        with open(path) as fh:
+            tree = ast.parse(fh.read(), filename=path)
+        f_string_parts = {id(part) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr)
+                          for part in node.values}
+        docstrings = {id(node.body[0].value) for node in ast.walk(tree)
+                      if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+                      and ast.get_docstring(node, clean=False) is not None}
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                    and id(node) not in f_string_parts
+                    and id(node) not in docstrings
+                    and SQL_START.match(node.value)
+                    and node.value.strip().rstrip(";").count(";") == 0
+                    and "sqlite_master" not in node.value):
+                yield (f"{os.path.relpath(path, os.path.join(HERE, '..'))}:{node.lineno}",
+                       node.value)
+
+
+def view_queries(con):
+    """Yield (view:Name, SELECT * FROM Name) for every view in the database."""
+    for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'view' ORDER BY name"):
+        yield (f"view:{name}", f'SELECT * FROM "{name}"')
+
+
+def alias_tables(con, queries):
+    """
+    Map each alias used in the views and queries to the set of tables
+    and views it names, so (table,) means the alias is unambiguous.
+    """
+    sql_texts = [sql for (sql,) in con.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'view'")] + [sql for (_label, sql) in queries]
+    aliases = {}
+    for sql in sql_texts:
+        for (name, alias) in TABLE_ALIAS.findall(sql):
+            aliases.setdefault(alias or name, set()).add(name)
+            aliases.setdefault(name, set()).add(name)
+    return aliases
+
+
+def plan(con, sql):
+    """EXPLAIN QUERY PLAN sql, with NULL for each parameter; return the detail lines."""
+    return [detail for (_id, _parent, _unused, detail)
+            in con.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("?"))]
+
+
+def flags(details):
+    """
+    Return [(flag, detail)] for the plan steps worth a look.  Scans of a
+    subquery's or view's own result (a CO-ROUTINE or MATERIALIZE step) are not flagged.
+    """
+    intermediate = {detail.split()[-1] for detail in details
+                    if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    flagged = []
+    for detail in details:
+        if (detail.startswith("SCAN ") and " INDEX " not in detail
+                and detail.split()[1] not in intermediate):
+            flagged.append(("SCAN", detail))
+        elif detail.startswith("USE TEMP B-TREE"):
+            flagged.append(("TEMP B-TREE", detail))
+        elif AUTOMATIC_INDEX.match(detail):
+            flagged.append(("AUTOMATIC", detail))
+    return flagged
+
+
+def proposals(con, flagged, aliases):
+    """
+    Turn each AUTOMATIC index step on an alias naming just one table
+    into (table, (columns...)); return them as a set.
+    """
+    tables = {name for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    proposed = set()
+    for (flag, detail) in flagged:
+        match = AUTOMATIC_INDEX.match(detail) if flag == "AUTOMATIC" else None
+        if match is None:
+            continue
+        names = aliases.get(match.group(1), set())
+        if len(names) != 1 or not names <= tables:
+            continue  # A view, a subquery, or an alias used for two tables
+        columns = tuple(term.split("=")[0].strip() for term in match.group(2).split(" AND "))
+        proposed.add((next(iter(names)), columns))
+    return proposed
+
+
+def covered(con, table, columns):
+    """Is there already an index on table whose leading columns are columns?"""
+    for (index_name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                     "AND tbl_name = ?", (table,)):
+        index_columns = [row[2] for row in con.execute(f'PRAGMA index_info("{index_name}")')]
+        if tuple(index_columns[:len(columns)]) == columns:
+            return True
+    return False
+
+
+def audit(con, sources):
+    """
+    Plan every view and source query.  Return ([(label, flagged)],
+    [(label, reason)] skipped because they name tables this database
+    does not have (e.g. the balance ledger's) or are source strings that
+    only looked like SQL, [(label, error)], and {(table, columns)}
+    proposed and not yet covered).
+    """
+    queries = list(view_queries(con)) + list(source_queries(sources))
+    aliases = alias_tables(con, queries)
+    results = []
+    skipped = []
+    errors = []
+    proposed = set()
+    for (label, sql) in queries:
+        try:
+            flagged = flags(plan(con, sql))
+        except sqlite3.OperationalError as e:
+            if str(e).startswith("no such "):
+                skipped.append((label, str(e)))
+            elif not label.startswith("view:") and any(reason in str(e) for reason in NOT_SQL):
+                skipped.append((label, f"not SQL: {e}"))
+            else:
+                errors.append((label, str(e)))
+            continue
+        except sqlite3.Error as e:
+            errors.append((label, str(e)))
+            continue
+        results.append((label, flagged))
+        proposed |= proposals(con, flagged, aliases)
+    return (results, skipped, errors,
+            {(table, columns) for (table, columns) in proposed if not covered(con, table, columns)})
+
+
+def install(con):
+    """Create the indexes in indexes.sql and ANALYZE; return the names of the indexes."""
+    with open(INDEXES_SQL) as fh:
+        script = fh.read()
+    con.executescript(script)
+    return re.findall(r'CREATE INDEX IF NOT EXISTS "(\w+)"', script)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Audit query plans and install covering indexes.")
+    ap.add_argument("command", choices=["audit", "install"])
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    ap.add_argument("--with-indexes", action="store_true",
+                    help="audit: plan as if indexes.sql were installed (the db is not changed)")
+    ap.add_argument("--sources", nargs="+", default=DEFAULT_SOURCES,
+                    help="Python files whose SQL strings are audited too")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+
+    con = sqlite3.connect(args.db, timeout=5.0)
+    try:
+        if args.command == "install":
+            names = install(con)
+            print(f"Installed {', '.join(names)} in {args.db}.")
+            return 0
+
+        if args.with_indexes:
+            copy = sqlite3.connect(":memory:")
+            con.backup(copy)
+            con.close()
+            con = copy
+            install(con)
+
+        (results, skipped, errors, proposed) = audit(con, args.sources)
+        for (label, flagged) in results:
+            print(f"{label}: {'' if flagged else 'ok'}")
+            for (flag, detail) in flagged:
+                print(f"    {flag:<12} {detail}")
+        for (label, reason) in skipped:
+            print(f"{label}: skipped ({reason})")
+        for (label, error) in errors:
+            print(f"ERROR: {label}: {error}", file=sys.stderr)
+        n_flagged = sum(len(flagged) for (_label, flagged) in results)
+        print(f"\n{len(results)} queries planned, {n_flagged} steps flagged.")
+        if proposed:
+            print("Proposed indexes:")
+            for (table, columns) in sorted(proposed):
+                print(f'    CREATE INDEX "idx_{table.lower()}_{"_".join(columns).lower()}" '
+                      f'ON "{table}" ({", ".join(columns)});')
+        else:
+            print("No automatic indexes left to replace.")
+    finally:
+        con.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+BEGIN TRANSACTION;
+
+-- Covering indexes for the per-player aggregates behind the views.
+--
+-- `index_advisor.py audit` showed every balance read building throw-away
+-- AUTOMATIC COVERING INDEXes on Payment(Player_Id) and Session(Player_Id),
+-- and grouping the whole Session table through a temp B-tree, for
+-- Player_Total_Payment, Player_Total_Session_Amount (and so Player_Balance,
+-- Player_Selection_List and Session_Panel_List), the MAX(Session_Id)
+-- GROUP BY Player_Id subquery in Player_Selection_List, and the
+-- Player_Most_Recent_Session_* views.
+--
+-- Apply with:  python3 index_advisor.py install
+
+-- 1. Player_Total_Payment: SUM(Amount) per player straight from the index;
+--    with Epoch second, the Payment_Rate_* views find each player's
+--    payments inside a Rate_Interval by range, without the table
+CREATE INDEX IF NOT EXISTS "idx_payment_player"
+ON "Payment" ("Player_Id", "Epoch", "Amount");
+
+-- 2. Sessions in player order, carrying every column Session_Rate_List
+--    prices with, so the per-player totals, MAX(Session_Id) (the rowid,
+--    which every index entry carries) and the most-recent-session views
+--    group without a temp B-tree or a table lookup
+CREATE INDEX IF NOT EXISTS "idx_session_player"
+ON "Session" ("Player_Id", "Start_Epoch", "Stop_Epoch", "Hourly_Rate", "Is_Prepaid", "Prepay_Amount");
+
+-- 3. The session list's history mode pages newest first by
+--    (Start_Epoch, Session_Id); the rowid completes the key, and
+--    nightly_report.py streams sessions by Start_Epoch range from it
+CREATE INDEX IF NOT EXISTS "idx_session_start"
+ON "Session" ("Start_Epoch");
+
+-- 4. nightly_report.py streams a night's (or a season's) payments in
+--    Epoch order, summing Amount straight from the index
+CREATE INDEX IF NOT EXISTS "idx_payment_epoch"
+ON "Payment" ("Epoch", "Amount");
+
+COMMIT;
+
+-- Give the planner row counts, so it picks the new indexes for the
+-- aggregates and not for plain scans of Session
+ANALYZE;
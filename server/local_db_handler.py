@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+A local, read-only stand-in for db_handler.php, so the Python tools that
+use it (email_list_to_clipboard.py, export_recipients.py --remote) can be
+run, tested and benchmarked without the live site.
+
+Same contract as db_handler.php:
+    action=query&query=<name>&apiKey=<key>   (GET or POST)
+        -> JSON list of row objects for a whitelisted named query;
+           403 bad key, 400 unknown name (with the allowed names), 404 no DB
+    GET ?apiKey=<key>
+        -> the whole database file
+Uploads (POST without action=query) are refused: this stand-in never
+writes to the database, and opens it read-only.
+
+On top of the contract, every 200 response carries a strong ETag and is
+answered 304 Not Modified to a matching If-None-Match, is gzipped for
+clients that accept it, and is cached until the database changes, as
+told by PRAGMA data_version (or by the file being replaced).  A single
+byte range (Range: bytes=N- or bytes=N-M, with If-Range) is answered
+206 from the uncompressed body, so interrupted downloads can resume.
+
+Usage:
+    python3 local_db_handler.py                          # CarolinaCardClub.db on 127.0.0.1:8765
+    python3 local_db_handler.py --db CarolinaCardClub.db.bak --port 9000
+    CCC_DB_URL=http://127.0.0.1:8765/db_handler.php python3 email_list_to_clipboard.py
+"""
+import argparse
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import sqlite3
+import sys
+import threading
+import urllib.parse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "CarolinaCardClub.db")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_API_KEY = os.environ.get(
+    "CCC_DB_API_KEY",
+    "31221da269c89d6e770cd96ad259433dffedd1f75250597cff4114144086129797bf09ab6fff19234e9674d7e48e428cd8aeb8a5a23a36abcd705acae8d1c030",
+)
+
+# Read-only, named queries only, as in db_handler.php's $allowed_queries
+ALLOWED_QUERIES = {
+    "email_list": "SELECT * FROM Email_List",
+}
+
+BUSY_TIMEOUT_MS = 5000
+GZIP_LEVEL = 6
+
+
+class CachedResponse:
+    """One response body, its ETag and (made on first request) its gzipped form."""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.gzipped = None
+
+    def gzip_body(self):
+        if self.gzipped is None:
+            self.gzipped = gzip.compress(self.body, GZIP_LEVEL)
+        return self.gzipped
+
+
+class ReadOnlyDatabase:
+    """
+    The database behind the handler: a read-only connection kept open,
+    and the named-query results and whole-file snapshot made from it,
+    cached until the database changes.
+    """
+
+    def __init__(self, db_path, queries=ALLOWED_QUERIES):
+        self.db_path = db_path
+        self.queries = queries
+        self.lock = threading.Lock()
+        self.conn = None
+        self.file_id = None
+        self.version = None
+        self.cache = {}  # query name, or None for the whole file -> CachedResponse
+        self.hits = 0
+        self.misses = 0
+
+    def exists(self):
+        return os.path.exists(self.db_path)
+
+    def check_version(self):
+        """
+        Drop the cache if the database changed since it was filled: a commit
+        by any connection moves data_version, and replacing the file (as an
+        upload does) changes its inode, so reopen it then.  Call with the lock held.
+        """
+        st = os.stat(self.db_path)
+        file_id = (st.st_dev, st.st_ino)
+        if self.conn is None or file_id != self.file_id:
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                        check_same_thread=False)
+            self.conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            self.file_id = file_id
+            self.version = None
+        version = (self.conn.execute("PRAGMA data_version").fetchone()[0], st.st_size, st.st_mtime_ns)
+        if version != self.version:
+            self.cache.clear()
+            self.version = version
+
+    def cached(self, key, make):
+        with self.lock:
+            self.check_version()
+            response = self.cache.get(key)
+            if response is None:
+                self.misses += 1
+                response = self.cache[key] = make()
+            else:
+                self.hits += 1
+            return response
+
+    def query(self, name):
+        """The named query's rows as a JSON list of objects, as db_handler.php returns them."""
+        def make():
+            cursor = self.conn.execute(self.queries[name])
+            columns = [description[0] for description in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor]
+            return CachedResponse(json.dumps(rows).encode(), "application/json")
+        return self.cached(name, make)
+
+    def whole_file(self):
+        """
+        A consistent image of the whole database, including anything
+        still in its WAL, which a plain copy of the file would miss.
+        """
+        return self.cached(None, lambda: CachedResponse(self.conn.serialize(),
+                                                        "application/octet-stream"))
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+class DbHandler(http.server.BaseHTTPRequestHandler):
+    """Request handler; the server carries the database and API key."""
+
+    server_version = "CCCLocalDbHandler/1.0"
+
+    def do_GET(self):
+        self.handle_request(self.query_params())
+
+    def do_POST(self):
+        params = self.query_params()
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length).decode("latin-1")
+            if self.headers.get_content_type() == "application/x-www-form-urlencoded":
+                params.update(urllib.parse.parse_qsl(body))
+        self.handle_request(params)
+
+    def query_params(self):
+        return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+
+    def handle_request(self, params):
+        database = self.server.database
+        key_ok = params.get("apiKey") == self.server.api_key
+        if params.get("action") == "query":
+            if not key_ok:
+                return self.send_json(403, {"error": "Invalid or missing API key."})
+            name = params.get("query", "")
+            if name not in database.queries:
+                return self.send_json(400, {"error": "Unknown query name.",
+                                            "allowed": list(database.queries)})
+            if not database.exists():
+                return self.send_json(404, {"error": "Database file not found on the server."})
+            try:
+                return self.send_cached(database.query(name))
+            except (sqlite3.Error, OSError) as e:
+                return self.send_json(500, {"error": f"Query failed: {e}"})
+
+        if self.command != "GET":
+            return self.send_text(405, "Error: This read-only stand-in does not accept uploads.")
+        if not key_ok:
+            return self.send_text(403, "Error: Invalid or missing API key for download.")
+        if not database.exists():
+            return self.send_text(404, "Error: Database file not found on the server.")
+        try:
+            response = database.whole_file()
+        except (sqlite3.Error, OSError) as e:
+            return self.send_text(500, f"Error: Could not read the database: {e}")
+        self.send_cached(response, {"Content-Disposition":
+                                    f'attachment; filename="{os.path.basename(database.db_path)}"'})
+
+    def accepts_gzip(self):
+        return any(coding.split(";")[0].strip() == "gzip"
+                   for coding in self.headers.get("Accept-Encoding", "").split(","))
+
+    def byte_range(self, response):
+        """
+        (first, last) of a satisfiable single Range on response.body, None
+        for the whole body (no Range, a stale If-Range, or one we do not
+        serve), or False if it starts past the end.
+        """
+        spec = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if not spec.startswith("bytes=") or "," in spec or (if_range and if_range != response.etag):
+            return None
+        (first, _, last) = spec[len("bytes="):].strip().partition("-")
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        (first, last) = (int(first), min(int(last), len(response.body) - 1) if last else len(response.body) - 1)
+        if first >= len(response.body):
+            return False
+        return (first, last) if first <= last else None
+
+    def send_cached(self, response, headers=None):
+        if response.etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", response.etag)
+            self.end_headers()
+            return
+        body = response.body
+        byte_range = self.byte_range(response)
+        if byte_range is False:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(body)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("ETag", response.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Accept-Ranges", "bytes")
+        if byte_range:
+            (first, last) = byte_range
+            body = memoryview(body)[first:last + 1]
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(response.body)}")
+        elif self.accepts_gzip():
+            body = response.gzip_body()
+            self.send_header("Content-Encoding", "gzip")
+        for (name, value) in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode(), "application/json")
+
+    def send_text(self, status, text):
+        self.send_body(status, text.encode(), "text/plain; charset=utf-8")
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(db_path=DEFAULT_DB, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                api_key=DEFAULT_API_KEY, quiet=False):
+    """A threading HTTP server for db_path; port 0 picks a free one (see server_address)."""
+    server = http.server.ThreadingHTTPServer((host, port), DbHandler)
+    server.daemon_threads = True
+    server.database = ReadOnlyDatabase(db_path)
+    server.api_key = api_key
+    server.quiet = quiet
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve a database read-only with db_handler.php's contract.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    ap.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    ap.add_argument("--quiet", action="store_true", help="Do not log each request")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+    server = make_server(args.db, args.host, args.port, quiet=args.quiet)
+    (host, port) = server.server_address[:2]
+    print(f"Serving {os.path.abspath(args.db)} read-only at http://{host}:{port}/db_handler.php")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
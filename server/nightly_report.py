@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Nightly operations report: each club night's revenue, hours played,
+peak concurrent players and per-PokerTable seat utilization, from one
+pass over its sessions.
+
+Sessions are streamed in Start_Epoch order over the nights asked for
+(idx_session_start in indexes.sql serves the range) and swept as start
+and stop events: each start first retires the sessions that stopped by
+then, from a min-heap of stop times, so the occupancy curve, its peak
+and every table's occupancy are known as the stream goes, and each
+night is written as soon as the next one begins.  That is O(n log k)
+for n sessions with at most k playing at once (a few dozen): linear in
+the sessions.  Payments are summed per night in one pass by Epoch
+(idx_payment_epoch).
+
+A night runs from NIGHT_START_HOUR local time to the same hour the next
+day, so sessions past midnight count toward the night they began in.
+Revenue is the sessions' amounts as Session_Amount_List prices them;
+a running session is counted up to --now.  Peak_Players counts each
+player in play once, however many of their sessions overlap (a player
+started again without the first session being stopped, say); the
+tables' Peak_Seats count sessions.
+
+Nights (CSV, one row each):
+    Night, Sessions, Players, Hours, Revenue, Payments,
+    Peak_Players, Peak_At, First_Start, Last_Stop, Running
+Tables (--tables-out CSV, one row per night and table):
+    Night, PokerTable, Capacity, Sessions, Seat_Hours, Peak_Seats, Utilization
+Utilization is the seat-hours over Capacity times the night's open
+hours (first start to last stop).  JSON holds both, each night with its
+"tables" and, with --curve, its "occupancy" as [epoch, players] at
+every change.
+
+Usage:
+    python3 nightly_report.py                                # the latest night
+    python3 nightly_report.py --night 2025-08-05
+    python3 nightly_report.py --since 2025-01-01 --until 2026-01-01 \\
+        --out season.csv --tables-out season_tables.csv
+    python3 nightly_report.py --night 2025-08-05 --format json --curve
+"""
+import argparse
+import csv
+import heapq
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CarolinaCardClub.db")
+
+NIGHT_START_HOUR = 12  # Noon: a night's sessions start after it, and end before the next
+NO_TABLE = 0           # PokerTable_Id of sessions not at a table (AUTOINCREMENT ids start at 1)
+
+SESSIONS_QUERY = """
+SELECT Start_Epoch, Stop_Epoch, Player_Id, IFNULL(PokerTable_Id, 0),
+       IFNULL(Hourly_Rate, 0), IFNULL(Is_Prepaid, 0), IFNULL(Prepay_Amount, 0)
+FROM Session
+WHERE Start_Epoch >= ? AND Start_Epoch < ?
+ORDER BY Start_Epoch
+"""
+PAYMENTS_QUERY = "SELECT Epoch, Amount FROM Payment WHERE Epoch >= ? AND Epoch < ? ORDER BY Epoch"
+TABLES_QUERY = "SELECT PokerTable_Id, Name, Capacity FROM PokerTable"
+
+NIGHT_FIELDS = ["Night", "Sessions", "Players", "Hours", "Revenue", "Payments",
+                "Peak_Players", "Peak_At", "First_Start", "Last_Stop", "Running"]
+TABLE_FIELDS = ["Night", "PokerTable", "Capacity", "Sessions", "Seat_Hours", "Peak_Seats", "Utilization"]
+
+
+def night_start(night):
+    """The epoch a night (a date) begins at."""
+    return int(datetime.combine(night, datetime.min.time()).replace(hour=NIGHT_START_HOUR).timestamp())
+
+
+def night_of(epoch):
+    """The night (a date) an epoch falls in."""
+    return (datetime.fromtimestamp(epoch) - timedelta(hours=NIGHT_START_HOUR)).date()
+
+
+class NightClock:
+    """night_of, worked out once per night rather than once per session."""
+
+    def __init__(self):
+        (self.night, self.start, self.end) = (None, 0, 0)
+
+    def night_of(self, epoch):
+        if not self.start <= epoch < self.end:
+            self.night = night_of(epoch)
+            (self.start, self.end) = (night_start(self.night), night_start(self.night + timedelta(days=1)))
+        return self.night
+
+
+def session_amount(seconds, rate, prepaid, prepay_amount):
+    """Whole dollars, as Session_Amount_List prices a session: rounded half up."""
+    if prepaid:
+        return prepay_amount
+    return math.floor(seconds * rate / 3600.0 + 0.5)
+
+
+class Night:
+    """
+    One night's totals, swept from its sessions in start order: add each
+    with add_session, then finish() to retire the rest.
+    """
+
+    def __init__(self, night, curve=False):
+        self.night = night
+        self.sessions = 0
+        self.player_ids = set()
+        self.seconds = 0
+        self.revenue = 0
+        self.payments = 0
+        self.running = 0
+        self.first_start = None
+        self.last_stop = None
+        self.stops = []       # Heap of (stop epoch, PokerTable_Id, Player_Id) of the sessions in play
+        self.in_play = {}     # Player_Id -> sessions in play (a player may have two at once)
+        self.occupancy = 0    # Players in play
+        self.peak = 0
+        self.peak_at = None
+        self.curve = [] if curve else None
+        self.tables = {}      # PokerTable_Id -> [sessions, seat seconds, seats taken, peak]
+
+    def record(self, epoch):
+        if self.curve is None:
+            return
+        if self.curve and self.curve[-1][0] == epoch:
+            self.curve[-1][1] = self.occupancy
+        else:
+            self.curve.append([epoch, self.occupancy])
+
+    def retire(self, until):
+        """Take out every session that stopped by until, in stop order."""
+        while self.stops and self.stops[0][0] <= until:
+            (stop, table_id, player_id) = heapq.heappop(self.stops)
+            self.in_play[player_id] -= 1
+            if not self.in_play[player_id]:
+                del self.in_play[player_id]
+                self.occupancy -= 1
+            self.tables[table_id][2] -= 1
+            self.record(stop)
+
+    def add_session(self, start, stop, player_id, table_id, amount, running):
+        self.retire(start)  # A seat given up at start is free for this session
+        self.sessions += 1
+        self.player_ids.add(player_id)
+        self.seconds += stop - start
+        self.revenue += amount
+        self.running += running
+        if self.first_start is None:
+            self.first_start = start
+        self.last_stop = stop if self.last_stop is None else max(self.last_stop, stop)
+        table = self.tables.setdefault(table_id, [0, 0, 0, 0])
+        table[0] += 1
+        table[1] += stop - start
+        if stop <= start:
+            return
+        heapq.heappush(self.stops, (stop, table_id, player_id))
+        if player_id not in self.in_play:
+            self.in_play[player_id] = 0
+            self.occupancy += 1
+        self.in_play[player_id] += 1
+        table[2] += 1
+        table[3] = max(table[3], table[2])
+        if self.occupancy > self.peak:
+            (self.peak, self.peak_at) = (self.occupancy, start)
+        self.record(start)
+
+    def finish(self):
+        self.retire(math.inf)
+        return self
+
+    def open_seconds(self):
+        return (self.last_stop - self.first_start) if self.sessions else 0
+
+    def row(self):
+        return {"Night": self.night.isoformat(), "Sessions": self.sessions, "Players": len(self.player_ids),
+                "Hours": round(self.seconds / 3600, 2), "Revenue": self.revenue, "Payments": self.payments,
+                "Peak_Players": self.peak, "Peak_At": epoch_text(self.peak_at),
+                "First_Start": epoch_text(self.first_start), "Last_Stop": epoch_text(self.last_stop),
+                "Running": self.running}
+
+    def table_rows(self, tables):
+        """TABLE_FIELDS rows, in PokerTable_Id order (no table last); tables maps id -> (name, capacity)."""
+        open_seconds = self.open_seconds()
+        for table_id in sorted(self.tables, key=lambda table_id: (table_id == NO_TABLE, table_id)):
+            (sessions, seat_seconds, _taken, peak) = self.tables[table_id]
+            (name, capacity) = tables.get(table_id, (None, None))
+            if table_id == NO_TABLE:
+                name = "(no table)"
+            elif name is None:
+                name = f"PokerTable {table_id}"
+            utilization = (round(seat_seconds / (capacity * open_seconds), 3)
+                           if capacity and open_seconds else None)
+            yield {"Night": self.night.isoformat(), "PokerTable": name, "Capacity": capacity,
+                   "Sessions": sessions, "Seat_Hours": round(seat_seconds / 3600, 2),
+                   "Peak_Seats": peak, "Utilization": utilization}
+
+
+def nightly_payments(con, since, until):
+    """{night: total payments} over [since, until), in one pass by Epoch."""
+    clock = NightClock()
+    totals = {}
+    for (epoch, amount) in con.execute(PAYMENTS_QUERY, (since, until)):
+        night = clock.night_of(epoch)
+        totals[night] = totals.get(night, 0) + (amount or 0)
+    return totals
+
+
+def nights(con, since, until, now=None, curve=False):
+    """
+    Yield a finished Night for each night with sessions starting in
+    [since, until), as the session stream moves past it.
+    """
+    now = int(time.time()) if now is None else now
+    payments = nightly_payments(con, since, until)
+    clock = NightClock()
+    night = None
+    for (start, stop, player_id, table_id, rate, prepaid, prepay_amount) in con.execute(
+            SESSIONS_QUERY, (since, until)):
+        running = stop is None
+        stop = max(now if running else stop, start)
+        this_night = clock.night_of(start)
+        if night is None or night.night != this_night:
+            if night is not None:
+                yield night.finish()
+            night = Night(this_night, curve)
+            night.payments = payments.get(this_night, 0)
+        night.add_session(start, stop, player_id, table_id,
+                          session_amount(stop - start, rate, prepaid, prepay_amount), running)
+    if night is not None:
+        yield night.finish()
+
+
+def write_csv(night_stream, tables, out_fh, tables_fh=None):
+    """Write each night's row (and its tables' rows) as it finishes; return the number of nights."""
+    writer = csv.DictWriter(out_fh, fieldnames=NIGHT_FIELDS)
+    writer.writeheader()
+    table_writer = None
+    if tables_fh is not None:
+        table_writer = csv.DictWriter(tables_fh, fieldnames=TABLE_FIELDS)
+        table_writer.writeheader()
+    count = 0
+    for night in night_stream:
+        writer.writerow(night.row())
+        if table_writer is not None:
+            table_writer.writerows(night.table_rows(tables))
+        count += 1
+    return count
+
+
+def write_json(night_stream, tables, out_fh):
+    """A JSON array, one night at a time; return the number of nights."""
+    out_fh.write("[")
+    count = 0
+    for night in night_stream:
+        entry = night.row()
+        entry["tables"] = list(night.table_rows(tables))
+        if night.curve is not None:
+            entry["occupancy"] = night.curve
+        out_fh.write(("," if count else "") + "\n" + json.dumps(entry))
+        count += 1
+    out_fh.write("\n]\n")
+    return count
+
+
+def epoch_text(epoch):
+    return None if epoch is None else datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M")
+
+
+def parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Nightly operations report from the sessions.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    ap.add_argument("--night", type=parse_date, help="One night, YYYY-MM-DD (default: the latest)")
+    ap.add_argument("--since", type=parse_date, help="First night of a season, YYYY-MM-DD")
+    ap.add_argument("--until", type=parse_date, help="Night after the season's last, YYYY-MM-DD")
+    ap.add_argument("--now", type=int, help="Epoch running sessions are counted to (default: now)")
+    ap.add_argument("--format", choices=["csv", "json"], default="csv")
+    ap.add_argument("--out", help="Output file (default: stdout)")
+    ap.add_argument("--tables-out", help="CSV file for the per-table rows (csv format)")
+    ap.add_argument("--curve", action="store_true", help="JSON: include each night's occupancy curve")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+    if args.night and (args.since or args.until):
+        print("ERROR: give --night, or --since/--until, not both", file=sys.stderr)
+        return 1
+    if args.tables_out and args.format == "json":
+        print("ERROR: --tables-out is for csv; json has the tables in it", file=sys.stderr)
+        return 1
+
+    con = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        if args.since or args.until:
+            (first, last) = (args.since or date(1970, 1, 2), args.until or date.today() + timedelta(days=1))
+        else:
+            night = args.night
+            if night is None:
+                (latest,) = con.execute("SELECT MAX(Start_Epoch) FROM Session").fetchone()
+                if latest is None:
+                    print("ERROR: no sessions", file=sys.stderr)
+                    return 1
+                night = night_of(latest)
+            (first, last) = (night, night + timedelta(days=1))
+        tables = {table_id: (name, capacity) for (table_id, name, capacity) in con.execute(TABLES_QUERY)}
+        night_stream = nights(con, night_start(first), night_start(last), args.now, args.curve)
+        out_fh = open(args.out, "w", newline="") if args.out else sys.stdout
+        tables_fh = open(args.tables_out, "w", newline="") if args.tables_out else None
+        try:
+            if args.format == "json":
+                count = write_json(night_stream, tables, out_fh)
+            else:
+                count = write_csv(night_stream, tables, out_fh, tables_fh)
+        finally:
+            if args.out:
+                out_fh.close()
+            if tables_fh is not None:
+                tables_fh.close()
+    finally:
+        con.close()
+    print(f"{count} nights from {first} to {last - timedelta(days=1)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
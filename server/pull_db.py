@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Pull the authoritative database down from db_handler.php, the way
+bin/pull_db did, but without holding it in memory or fetching it twice:
+
+  - the body is streamed CHUNK_SIZE bytes at a time to <dest>.part, and
+    its SQLite header is checked as soon as the first 100 bytes arrive,
+    so an error page or a truncated file is refused early;
+  - a transfer that breaks off is resumed from where it stopped with a
+    Range request (If-Range on the ETag or Last-Modified, so a database
+    that changed in between starts over), up to --retries times, and
+    across runs, since <dest>.part and <dest>.part.json are kept;
+  - <dest>.pull.json remembers the ETag, Last-Modified and sha256 of what
+    was installed: an unchanged database is answered 304 with no body,
+    and one the server cannot validate is still left in place, untouched,
+    when its content hash matches.  The cache only counts while <dest>
+    itself still hashes to what was installed;
+  - the download is checked (PRAGMA integrity_check, as bin/pull_db did)
+    before it replaces <dest>, and the old <dest> is kept as
+    <dest>.before-pull.
+
+The live handler may ignore Range (then a retry starts over) and send
+no ETag (then only the content hash saves the install).
+
+Usage:
+    python3 pull_db.py                                   # -> CarolinaCardClub.db next to this script
+    python3 pull_db.py --dest /tmp/remote.db --no-cache
+    CCC_DB_URL=http://127.0.0.1:8765/db_handler.php python3 pull_db.py --dest /tmp/remote.db
+"""
+import argparse
+import collections
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import time
+import urllib.error
+import urllib.request
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "CarolinaCardClub.db")
+DEFAULT_REMOTE_URL = os.environ.get("CCC_DB_URL", "https://carolinacardclub.com/db_handler.php")
+DEFAULT_API_KEY = os.environ.get(
+    "CCC_DB_API_KEY",
+    "31221da269c89d6e770cd96ad259433dffedd1f75250597cff4114144086129797bf09ab6fff19234e9674d7e48e428cd8aeb8a5a23a36abcd705acae8d1c030",
+)
+
+# Spoof Chrome to get past the server's ModSecurity, same as bin/push_db.
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/120.0.0.0 Safari/537.36")
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT_SECONDS = 60
+RETRIES = 3
+RETRY_DELAY_SECONDS = 1.0
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+SQLITE_HEADER_SIZE = 100
+
+Fetched = collections.namedtuple("Fetched", "path changed transferred size sha256 resumed_from")
+
+
+class DownloadError(RuntimeError):
+    """The remote did not hand over a usable database."""
+
+
+class SqliteHeaderCheck:
+    """
+    Checks a database's bytes as they arrive: feed() each chunk in order,
+    and the 100-byte header is validated as soon as it is complete;
+    finish() then checks the total length against the header's page
+    size and (when the header's copy of it is current) page count.
+    """
+
+    def __init__(self):
+        self.head = b""
+        self.page_size = None
+        self.page_count = None
+        self.received = 0
+
+    def feed(self, chunk):
+        self.received += len(chunk)
+        if self.page_size is None:
+            self.head += chunk[:SQLITE_HEADER_SIZE - len(self.head)]
+            if len(self.head) == SQLITE_HEADER_SIZE:
+                self.check_header()
+            elif not SQLITE_MAGIC.startswith(self.head[:len(SQLITE_MAGIC)]):
+                self.refuse()
+
+    def refuse(self):
+        raise DownloadError("Remote did not return a SQLite database (bad key or ModSecurity block?); "
+                            f"it starts {self.head[:60]!r}")
+
+    def check_header(self):
+        head = self.head
+        if head[:16] != SQLITE_MAGIC:
+            self.refuse()
+        (page_size,) = struct.unpack(">H", head[16:18])
+        page_size = 65536 if page_size == 1 else page_size
+        if page_size < 512 or page_size & (page_size - 1):
+            raise DownloadError(f"Bad SQLite header: page size {page_size}")
+        if head[18] not in (1, 2) or head[19] not in (1, 2) or head[21:24] != b"\x40\x20\x20":
+            raise DownloadError("Bad SQLite header: unknown file format or payload fractions")
+        (change_counter, page_count) = struct.unpack(">II", head[24:32])
+        (version_valid_for,) = struct.unpack(">I", head[92:96])
+        self.page_size = page_size
+        # The header's page count is only current if written with the change counter
+        self.page_count = page_count if page_count and version_valid_for == change_counter else None
+
+    def finish(self):
+        if self.page_size is None:
+            self.refuse()
+        if self.received % self.page_size:
+            raise DownloadError(f"Truncated database: {self.received} bytes is not a whole number "
+                                f"of {self.page_size}-byte pages")
+        if self.page_count is not None and self.received != self.page_count * self.page_size:
+            raise DownloadError(f"Truncated database: {self.received} bytes, header says "
+                                f"{self.page_count} pages of {self.page_size}")
+
+
+def load_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def file_sha256(path, limit=None):
+    """sha256 of path (of its first limit bytes), read CHUNK_SIZE at a time."""
+    digest = hashlib.sha256()
+    remaining = os.path.getsize(path) if limit is None else limit
+    with open(path, "rb") as fh:
+        while remaining:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def inflate(decompressor, chunk, limit):
+    """Decompress chunk at most limit bytes at a time (database pages gzip a long way)."""
+    while chunk:
+        yield decompressor.decompress(chunk, limit)
+        chunk = decompressor.unconsumed_tail
+
+
+def validator(meta):
+    """What If-Range / If-None-Match can compare: the ETag, else Last-Modified."""
+    return meta.get("etag") or meta.get("last_modified")
+
+
+def content_range_start(resp):
+    """The first byte of a 206's Content-Range: bytes first-last/total."""
+    spec = resp.headers.get("Content-Range", "")
+    try:
+        return int(spec.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        raise DownloadError(f"Bad Content-Range on a partial response: {spec!r}")
+
+
+def fetch(url, api_key, dest, cache=True, resume=True, compress=False, backup=True,
+          retries=RETRIES, chunk_size=CHUNK_SIZE, timeout=TIMEOUT_SECONDS, log=None):
+    """
+    Bring dest up to date with the database at url, and return a Fetched:
+    whether dest changed, the body bytes transferred, and the size and
+    sha256 of dest.  compress asks for a gzipped body, which saves bytes
+    but cannot be resumed; cache=False ignores (and does not write)
+    dest's .pull.json; resume=False neither resumes nor keeps a .part;
+    backup=False does not keep the replaced dest as .before-pull.
+    """
+    log = log or (lambda message: None)
+    cache_path = dest + ".pull.json"
+    part_path = dest + ".part"
+    part_meta_path = part_path + ".json"
+    meta = load_json(cache_path) if cache and os.path.exists(dest) else {}
+    if meta and (meta.get("size") != os.path.getsize(dest) or
+                 meta.get("sha256") != file_sha256(dest).hexdigest()):
+        meta = {}  # dest changed behind our back (even if not in size); do not trust the cache
+    if not resume:
+        remove(part_path, part_meta_path)
+
+    transferred = 0
+    resumed_from = None
+    for attempt in range(retries + 1):
+        part_meta = load_json(part_meta_path) if resume and os.path.exists(part_path) else {}
+        if part_meta.get("url") != url or not validator(part_meta):
+            remove(part_path, part_meta_path)
+            part_meta = {}
+        offset = os.path.getsize(part_path) if part_meta else 0
+
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/octet-stream,*/*;q=0.8"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator(part_meta)
+        else:
+            if compress:
+                headers["Accept-Encoding"] = "gzip"
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            elif meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        req = urllib.request.Request(f"{url}?apiKey={api_key}", headers=headers)
+
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                if resp.status == 206:
+                    if content_range_start(resp) != offset:
+                        raise DownloadError("Partial response does not start where the download stopped")
+                    log(f"Resuming at byte {offset:,}")
+                    resumed_from = resumed_from or offset
+                else:
+                    offset = 0
+                gzipped = resp.headers.get("Content-Encoding") == "gzip"
+                part_meta = {"url": url, "etag": resp.headers.get("ETag"),
+                             "last_modified": resp.headers.get("Last-Modified")}
+                if resume and not gzipped and validator(part_meta):
+                    save_json(part_meta_path, part_meta)
+                else:
+                    remove(part_meta_path)
+
+                check = SqliteHeaderCheck()
+                if offset:
+                    with open(part_path, "rb") as fh:
+                        check.feed(fh.read(SQLITE_HEADER_SIZE))
+                    check.received = offset
+                    digest = file_sha256(part_path, offset)
+                else:
+                    digest = hashlib.sha256()
+                decompressor = zlib.decompressobj(wbits=31) if gzipped else None
+                expected = resp.headers.get("Content-Length")
+                body_bytes = 0
+                with open(part_path, "ab" if offset else "wb") as out:
+                    while True:
+                        chunk = resp.read(chunk_size)
+                        if not chunk:
+                            break
+                        transferred += len(chunk)
+                        body_bytes += len(chunk)
+                        for piece in inflate(decompressor, chunk, chunk_size) if decompressor else (chunk,):
+                            check.feed(piece)
+                            digest.update(piece)
+                            out.write(piece)
+                    # read(amt) just stops at a dropped connection, so count
+                    if expected and body_bytes < int(expected):
+                        raise http.client.IncompleteRead(b"", int(expected) - body_bytes)
+                    if decompressor:
+                        chunk = decompressor.flush()
+                        if not decompressor.eof:
+                            raise http.client.IncompleteRead(b"")
+                        check.feed(chunk)
+                        digest.update(chunk)
+                        out.write(chunk)
+                check.finish()
+                size = check.received
+                break
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                log("Not modified")
+                return Fetched(dest, False, transferred, meta["size"], meta["sha256"], None)
+            if e.code == 416 and offset:
+                remove(part_path, part_meta_path)  # Nothing left to resume from; start over
+                continue
+            detail = e.read(300).decode("utf-8", "replace").strip()
+            raise DownloadError(f"HTTP {e.code} from {url}: {detail}")
+        except (OSError, http.client.HTTPException) as e:
+            # Dropped connection, timeout or short read: keep the .part and go again
+            if attempt == retries:
+                if not resume:
+                    remove(part_path)
+                raise DownloadError(f"Download failed after {retries + 1} attempts: {e}")
+            log(f"Transfer interrupted ({e!r}); retrying")
+            time.sleep(RETRY_DELAY_SECONDS * (attempt + 1))
+        except DownloadError:
+            remove(part_path, part_meta_path)
+            raise
+
+    sha256 = digest.hexdigest()
+    if meta.get("sha256") == sha256:
+        remove(part_path, part_meta_path)
+        log("Same content as the installed copy")
+        return Fetched(dest, False, transferred, size, sha256, resumed_from)
+
+    con = sqlite3.connect(f"file:{part_path}?mode=ro", uri=True)
+    try:
+        result = con.execute("PRAGMA integrity_check").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        result = str(e)
+    finally:
+        con.close()
+    if result != "ok":
+        remove(part_path, part_meta_path)
+        raise DownloadError(f"Downloaded database failed integrity_check: {result}")
+
+    if backup and os.path.exists(dest):
+        shutil.copy2(dest, dest + ".before-pull")
+    os.replace(part_path, dest)
+    remove(part_meta_path)
+    if cache:
+        save_json(cache_path, {"url": url, "etag": part_meta["etag"],
+                               "last_modified": part_meta["last_modified"],
+                               "sha256": sha256, "size": size})
+    return Fetched(dest, True, transferred, size, sha256, resumed_from)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pull the authoritative CCC database, resumably and only if changed.")
+    ap.add_argument("--dest", default=DEFAULT_DB, help=f"Where to install it (default: {DEFAULT_DB})")
+    ap.add_argument("--url", default=DEFAULT_REMOTE_URL, help=f"Handler URL (default: {DEFAULT_REMOTE_URL})")
+    ap.add_argument("--retries", type=int, default=RETRIES,
+                    help=f"Resume attempts after a dropped transfer (default: {RETRIES})")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Download even if the installed copy looks current")
+    ap.add_argument("--gzip", action="store_true",
+                    help="Ask for a gzipped body: fewer bytes, but a dropped transfer starts over")
+    args = ap.parse_args()
+
+    print(f"Downloading database from {args.url} ...")
+    try:
+        fetched = fetch(args.url, DEFAULT_API_KEY, args.dest, cache=not args.no_cache,
+                        compress=args.gzip, retries=args.retries, log=print)
+    except DownloadError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    if not fetched.changed:
+        print(f"Up to date: {args.dest} ({fetched.size:,} bytes, {fetched.transferred:,} transferred)")
+        return 0
+    con = sqlite3.connect(f"file:{args.dest}?mode=ro", uri=True)
+    try:
+        (players,) = con.execute("SELECT count(*) FROM Player").fetchone()
+    finally:
+        con.close()
+    print(f"Installed {args.dest} ({fetched.size:,} bytes, {fetched.transferred:,} transferred, "
+          f"{players} players)")
+    if os.path.exists(args.dest + ".before-pull"):
+        print(f"Previous copy saved as {args.dest}.before-pull")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
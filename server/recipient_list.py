@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Install, rebuild and verify the maintained weekly-email recipient list.
+
+recipient_list.sql adds an Email_Recipient table, one row per address to
+mail (the inclusion rule: the player has a phone number and no Flag),
+kept current by triggers on Player, Player_Email, Player_Phone,
+Email_Address and Phone_Number, so export_recipients.py and
+email_list_to_clipboard.py read the finished list instead of the
+Email_List view's emails x phones fan-out.  Both fall back to the view
+on a database without it.
+
+Commands:
+    install   apply recipient_list.sql (table, view, triggers), then rebuild
+    rebuild   re-derive the whole list from the players' contacts
+    verify    compare the list with Email_List and the inclusion rule, in
+              order; exits 1 if they differ
+
+Usage:
+    python3 recipient_list.py install
+    python3 recipient_list.py verify --db CarolinaCardClub.db.bak
+"""
+import argparse
+import collections
+import json
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "CarolinaCardClub.db")
+RECIPIENT_LIST_SQL = os.path.join(HERE, "recipient_list.sql")
+
+FETCH_BATCH = 500
+
+REBUILD_SQL = """
+DELETE FROM Email_Recipient;
+INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source;
+"""
+
+RECIPIENTS_QUERY = "SELECT Name, Address FROM Email_Recipient ORDER BY Player_Id, EmailAddress_Id"
+
+
+def install(con):
+    """Create the table, its source view and triggers, then fill it."""
+    with open(RECIPIENT_LIST_SQL) as fh:
+        con.executescript(fh.read())
+    return rebuild(con)
+
+
+def rebuild(con):
+    """Re-derive every row; return the number of addresses."""
+    con.executescript("BEGIN IMMEDIATE;" + REBUILD_SQL + "COMMIT;")
+    return con.execute("SELECT COUNT(*) FROM Email_Recipient").fetchone()[0]
+
+
+def is_installed(con):
+    return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                       "AND name = 'Email_Recipient'").fetchone() is not None
+
+
+def read_recipients(con, batch=FETCH_BATCH):
+    """Stream (name, address) in Email_List order, batch at a time."""
+    cursor = con.execute(RECIPIENTS_QUERY)
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def view_recipients(con):
+    """(name, address) from Email_List by the inclusion rule, as the exports expand it."""
+    for (name, email_addresses, phone_numbers, _super_bowl, flag) in con.execute("SELECT * FROM Email_List"):
+        if phone_numbers != "[]" and flag is None:
+            # A link to a deleted address shows up in the view as null; it is not an address
+            yield from ((name, address) for address in json.loads(email_addresses) if address is not None)
+
+
+def verify(con):
+    """
+    Return [(name, address, in the list, in the view)] for every address
+    listed a different number of times on the two sides; if there are
+    none but the order differs, the first position where it does, as
+    [(name, address, "position", index)].
+    """
+    listed = list(read_recipients(con))
+    expected = list(view_recipients(con))
+    (have, want) = (collections.Counter(listed), collections.Counter(expected))
+    drift = [(name, address, have[(name, address)], want[(name, address)])
+             for (name, address) in sorted(set(have) | set(want))
+             if have[(name, address)] != want[(name, address)]]
+    if drift or listed == expected:
+        return drift
+    index = next(i for (i, (a, b)) in enumerate(zip(listed, expected)) if a != b)
+    return [(*listed[index], "position", index)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the Email_Recipient table.")
+    ap.add_argument("command", choices=["install", "rebuild", "verify"])
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+
+    con = sqlite3.connect(args.db, timeout=5.0)
+    try:
+        if args.command != "install" and not is_installed(con):
+            print(f"ERROR: no recipient list in {args.db}; run `install` first.", file=sys.stderr)
+            return 1
+
+        if args.command == "install":
+            n_addresses = install(con)
+            print(f"Installed recipient list in {args.db} ({n_addresses} addresses).")
+        elif args.command == "rebuild":
+            n_addresses = rebuild(con)
+            print(f"Rebuilt recipient list: {n_addresses} addresses.")
+        else:
+            drift = verify(con)
+            for (name, address, listed, expected) in drift:
+                if listed == "position":
+                    print(f"DRIFT: out of order at #{expected}: {name} <{address}>")
+                else:
+                    print(f"DRIFT: {name} <{address}>: listed {listed} times, Email_List has {expected}")
+            if drift:
+                print(f"{len(drift)} differences; run `rebuild` to correct them.")
+                return 1
+            print("Recipient list matches Email_List.")
+    finally:
+        con.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+BEGIN TRANSACTION;
+
+-- Maintained weekly-email recipient list.
+--
+-- Email_List joins every player's emails x phones x Super Bowl rows and
+-- de-duplicates them again with json_group_array(DISTINCT ...), so its
+-- cost grows with the product of each player's contact counts, and every
+-- reader then re-applies the inclusion rule (PhoneNumbers != '[]' AND
+-- Flag IS NULL) and re-expands the JSON.  Email_Recipient holds the
+-- result instead: one row per address to mail, already filtered, kept
+-- current by the triggers below, in the view's order (Player_Id, then
+-- EmailAddress_Id).  Email_List itself is left as it was, for the
+-- remote named query and for `recipient_list.py verify`.
+--
+-- Apply with:  python3 recipient_list.py install
+
+-- 1. The list
+CREATE TABLE IF NOT EXISTS "Email_Recipient" (
+    "Player_Id"       INTEGER NOT NULL,
+    "EmailAddress_Id" INTEGER NOT NULL,
+    "Name"            TEXT NOT NULL,
+    "Address"         TEXT NOT NULL,
+    PRIMARY KEY("Player_Id", "EmailAddress_Id")
+) WITHOUT ROWID;
+
+-- For the Email_Address triggers, which look rows up by address
+CREATE INDEX IF NOT EXISTS "idx_email_recipient_address"
+ON "Email_Recipient" ("EmailAddress_Id");
+
+-- 2. What it should hold, for all players or (through the triggers'
+--    WHERE Player_Id = ...) for one: every address of a player with no
+--    Flag and at least one phone number
+DROP VIEW IF EXISTS "Email_Recipient_Source";
+CREATE VIEW "Email_Recipient_Source" AS
+SELECT p.Player_Id, ea.EmailAddress_Id, p.Name, ea.Address
+FROM Player as p
+JOIN Player_Email as pe ON pe.Player_Id = p.Player_Id
+JOIN Email_Address as ea ON ea.EmailAddress_Id = pe.EmailAddress_Id
+WHERE p.Flag IS NULL
+  AND EXISTS (SELECT 1 FROM Player_Phone as pp
+              JOIN Phone_Number as pn ON pn.PhoneNumber_Id = pp.PhoneNumber_Id
+              WHERE pp.Player_Id = p.Player_Id);
+
+-- 3. Triggers: whatever changes a player's addresses, phones, Flag or
+--    Name, re-derive that player's rows (a player has a handful at most)
+
+-- Player: a new player (or one REPLACEd), a flag or name change, a delete
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Insert";
+CREATE TRIGGER "Email_Recipient_Player_Insert"
+AFTER INSERT ON Player
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id = NEW.Player_Id;
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Update";
+CREATE TRIGGER "Email_Recipient_Player_Update"
+AFTER UPDATE OF Player_Id, Name, Flag ON Player
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id IN (OLD.Player_Id, NEW.Player_Id);
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Delete";
+CREATE TRIGGER "Email_Recipient_Player_Delete"
+AFTER DELETE ON Player
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id = OLD.Player_Id;
+END;
+
+-- Player_Email: an address linked, unlinked or moved
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Email_Insert";
+CREATE TRIGGER "Email_Recipient_Player_Email_Insert"
+AFTER INSERT ON Player_Email
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id = NEW.Player_Id;
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Email_Update";
+CREATE TRIGGER "Email_Recipient_Player_Email_Update"
+AFTER UPDATE ON Player_Email
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id IN (OLD.Player_Id, NEW.Player_Id);
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source
+    WHERE Player_Id IN (OLD.Player_Id, NEW.Player_Id);
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Email_Delete";
+CREATE TRIGGER "Email_Recipient_Player_Email_Delete"
+AFTER DELETE ON Player_Email
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id = OLD.Player_Id AND EmailAddress_Id = OLD.EmailAddress_Id;
+END;
+
+-- Player_Phone: a player's first phone added or last one removed
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Phone_Insert";
+CREATE TRIGGER "Email_Recipient_Player_Phone_Insert"
+AFTER INSERT ON Player_Phone
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id = NEW.Player_Id;
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source WHERE Player_Id = NEW.Player_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Phone_Update";
+CREATE TRIGGER "Email_Recipient_Player_Phone_Update"
+AFTER UPDATE ON Player_Phone
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id IN (OLD.Player_Id, NEW.Player_Id);
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source
+    WHERE Player_Id IN (OLD.Player_Id, NEW.Player_Id);
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Player_Phone_Delete";
+CREATE TRIGGER "Email_Recipient_Player_Phone_Delete"
+AFTER DELETE ON Player_Phone
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id = OLD.Player_Id;
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source WHERE Player_Id = OLD.Player_Id;
+END;
+
+-- Email_Address: an address corrected or removed
+DROP TRIGGER IF EXISTS "Email_Recipient_Email_Address_Update";
+CREATE TRIGGER "Email_Recipient_Email_Address_Update"
+AFTER UPDATE OF Address ON Email_Address
+BEGIN
+    UPDATE Email_Recipient SET Address = NEW.Address WHERE EmailAddress_Id = NEW.EmailAddress_Id;
+END;
+
+DROP TRIGGER IF EXISTS "Email_Recipient_Email_Address_Delete";
+CREATE TRIGGER "Email_Recipient_Email_Address_Delete"
+AFTER DELETE ON Email_Address
+BEGIN
+    DELETE FROM Email_Recipient WHERE EmailAddress_Id = OLD.EmailAddress_Id;
+END;
+
+-- Phone_Number: a linked number removed (the link is left dangling)
+DROP TRIGGER IF EXISTS "Email_Recipient_Phone_Number_Delete";
+CREATE TRIGGER "Email_Recipient_Phone_Number_Delete"
+AFTER DELETE ON Phone_Number
+BEGIN
+    DELETE FROM Email_Recipient WHERE Player_Id IN
+        (SELECT Player_Id FROM Player_Phone WHERE PhoneNumber_Id = OLD.PhoneNumber_Id);
+    INSERT INTO Email_Recipient SELECT * FROM Email_Recipient_Source WHERE Player_Id IN
+        (SELECT Player_Id FROM Player_Phone WHERE PhoneNumber_Id = OLD.PhoneNumber_Id);
+END;
+
+COMMIT;
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Reprice past sessions from the rate history and report, player by
+player, what they were charged against what the rates say, and the
+difference.
+
+Each session is charged at the Hourly_Rate locked in when it started
+(Session_Amount_List).  Here it is priced second by second under its
+player's category's Rate_Intervals (Category_Rate_Interval, or for a
+category with none, its Player_Category.Rate_Group_Id's), or, with
+--rate-group, under that rate group's Rate_Intervals instead ("what
+would this year have cost under the new rate group"), so a session
+that straddles an interval boundary is charged each interval's rate for
+its part of it.  Amounts are rounded to whole dollars per session, half
+up, as the view does; prepaid sessions keep their Prepay_Amount, and
+running sessions are left out.
+
+With NumPy installed, the sessions are loaded into columns and priced
+in one vectorized pass per rate schedule; without it, the same integer
+arithmetic runs row by row, with the same results.
+
+Output is CSV (default) or JSON, one row per player:
+    Player_Id, Name, Sessions, Hours, Charged, Repriced, Delta
+
+Usage:
+    python3 reprice.py                                    # every session, its category's rates
+    python3 reprice.py --since 2025-01-01 --until 2026-01-01 --rate-group 3
+    python3 reprice.py --rate-group 2 --category 4 --category 5 --format json --out what_if.json
+"""
+import argparse
+import bisect
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # Priced row by row instead
+    np = None
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CarolinaCardClub.db")
+
+# Prices are worked in cent-seconds (seconds x cents an hour), which are
+# integers, so every rounding to dollars is exact
+CENT_SECONDS_PER_DOLLAR = 100 * 3600
+HALF_DOLLAR = CENT_SECONDS_PER_DOLLAR // 2
+
+ALL_TIME = (-(1 << 62), 1 << 62)
+
+SESSIONS_QUERY = """
+SELECT s.Player_Id, c.Player_Category_Id, s.Start_Epoch, s.Stop_Epoch,
+       CAST(round(IFNULL(s.Hourly_Rate, 0) * 100) AS INTEGER),
+       IFNULL(s.Is_Prepaid, 0), IFNULL(s.Prepay_Amount, 0)
+FROM Session AS s
+JOIN Player AS p ON p.Player_Id = s.Player_Id
+JOIN Player_Category AS c ON c.Player_Category_Id = p.Player_Category_Id
+WHERE s.Stop_Epoch IS NOT NULL AND s.Start_Epoch >= ? AND s.Start_Epoch < ?
+"""
+
+CATEGORY_INTERVALS_QUERY = """
+SELECT cri.Player_Category_Id, ri.Start_Epoch, ri.Stop_Epoch, r.Rate
+FROM Category_Rate_Interval AS cri
+JOIN Rate_Interval AS ri ON ri.Rate_Interval_Id = cri.Rate_Interval_Id
+JOIN Rate AS r ON r.Rate_Id = ri.Rate_Id
+"""
+
+GROUP_INTERVALS_QUERY = """
+SELECT ri.Start_Epoch, ri.Stop_Epoch, r.Rate
+FROM Rate_Interval AS ri
+JOIN Rate AS r ON r.Rate_Id = ri.Rate_Id
+WHERE ri.Rate_Group_Id = ?
+"""
+
+CATEGORY_GROUPS_QUERY = "SELECT Player_Category_Id, Rate_Group_Id FROM Player_Category"
+
+# The categories whose players have sessions to reprice
+PRICED_CATEGORIES_QUERY = """
+SELECT DISTINCT p.Player_Category_Id
+FROM Session AS s
+JOIN Player AS p ON p.Player_Id = s.Player_Id
+WHERE s.Stop_Epoch IS NOT NULL
+"""
+
+FIELDS = ["Player_Id", "Name", "Sessions", "Hours", "Charged", "Repriced", "Delta"]
+
+
+class Schedule:
+    """
+    A rate history as a step function of time: from times[i] on, rates[i]
+    cents an hour, with cumulative[i] cent-seconds charged before times[i].
+
+    Built from Rate_Interval rows (start, stop, rate), where stop is the
+    last second charged and 0 or NULL means open-ended, as in the views.
+    Where intervals overlap their rates add, as the views' joins would
+    count both; where none applies, nothing is charged.  overlaps and
+    gaps list those stretches as (from, to) epochs.
+    """
+
+    def __init__(self, intervals):
+        changes = {}  # Epoch -> [change in cents an hour, change in intervals in force]
+        for (start, stop, rate) in intervals:
+            cents = round(rate * 100)
+            for (epoch, sign) in ((start, 1), (stop + 1, -1)) if stop else ((start, 1),):
+                change = changes.setdefault(epoch, [0, 0])
+                change[0] += sign * cents
+                change[1] += sign
+        self.times = sorted(changes)
+        self.rates = []
+        self.cumulative = []
+        self.overlaps = []
+        self.gaps = []
+        (rate, active, total) = (0, 0, 0)
+        for (i, epoch) in enumerate(self.times):
+            if i:
+                total += (epoch - self.times[i - 1]) * rate
+            self.cumulative.append(total)
+            rate += changes[epoch][0]
+            active += changes[epoch][1]
+            self.rates.append(rate)
+            if i + 1 < len(self.times):
+                if active > 1:
+                    self.overlaps.append((epoch, self.times[i + 1]))
+                elif active == 0:
+                    self.gaps.append((epoch, self.times[i + 1]))
+        if np is not None:
+            self.time_array = np.array(self.times, dtype=np.int64)
+            self.rate_array = np.array(self.rates, dtype=np.int64)
+            self.cumulative_array = np.array(self.cumulative, dtype=np.int64)
+
+    def charged(self, epoch):
+        """Cent-seconds charged from the start of the history up to epoch."""
+        i = bisect.bisect_right(self.times, epoch) - 1
+        if i < 0:
+            return 0
+        return self.cumulative[i] + (epoch - self.times[i]) * self.rates[i]
+
+    def charged_array(self, epochs):
+        """charged() of each of an array of epochs."""
+        if not self.times:
+            return np.zeros(len(epochs), dtype=np.int64)
+        i = np.searchsorted(self.time_array, epochs, side="right") - 1
+        before = i < 0
+        i[before] = 0
+        charged = self.cumulative_array[i] + (epochs - self.time_array[i]) * self.rate_array[i]
+        charged[before] = 0
+        return charged
+
+
+def category_schedules(con):
+    """
+    ({Player_Category_Id: Schedule}, {Player_Category_Id: Rate_Group_Id}):
+    each category's Schedule from its own Rate_Intervals, or, for a
+    category with no Category_Rate_Interval rows, from its
+    Player_Category.Rate_Group_Id's, and the categories priced so.
+    """
+    intervals = {}
+    for (category_id, start, stop, rate) in con.execute(CATEGORY_INTERVALS_QUERY):
+        intervals.setdefault(category_id, []).append((start, stop, rate))
+    schedules = {}
+    fallbacks = {}
+    group_schedules = {}
+    for (category_id, group_id) in con.execute(CATEGORY_GROUPS_QUERY):
+        if category_id in intervals:
+            schedules[category_id] = Schedule(intervals[category_id])
+            continue
+        if group_id not in group_schedules:
+            group_schedules[group_id] = Schedule(con.execute(GROUP_INTERVALS_QUERY, (group_id,)).fetchall())
+        schedules[category_id] = group_schedules[group_id]
+        fallbacks[category_id] = group_id
+    return (schedules, fallbacks)
+
+
+def load_schedules(con, rate_group=None, categories=None):
+    """
+    A function from Player_Category_Id to the Schedule its players'
+    sessions are priced under: the category's own (see category_schedules),
+    or rate_group's for the categories given (all of them if None).
+    """
+    (schedules, _fallbacks) = category_schedules(con)
+    no_schedule = Schedule([])
+    if rate_group is None:
+        return lambda category_id: schedules.get(category_id, no_schedule)
+    group_schedule = Schedule(con.execute(GROUP_INTERVALS_QUERY, (rate_group,)).fetchall())
+    return lambda category_id: (group_schedule if categories is None or category_id in categories
+                                else schedules.get(category_id, no_schedule))
+
+
+def reprice_rows(rows, schedule_for):
+    """
+    {Player_Id: [sessions, seconds, charged, repriced]} for SESSIONS_QUERY
+    rows, priced one at a time.
+    """
+    totals = {}
+    for (player_id, category_id, start, stop, rate_cents, prepaid, prepay_amount) in rows:
+        stop = max(stop, start)
+        seconds = stop - start
+        if prepaid:
+            charged = repriced = prepay_amount
+        else:
+            schedule = schedule_for(category_id)
+            charged = (seconds * rate_cents + HALF_DOLLAR) // CENT_SECONDS_PER_DOLLAR
+            repriced = (schedule.charged(stop) - schedule.charged(start) + HALF_DOLLAR) // CENT_SECONDS_PER_DOLLAR
+        player = totals.setdefault(player_id, [0, 0, 0, 0])
+        player[0] += 1
+        player[1] += seconds
+        player[2] += charged
+        player[3] += repriced
+    return totals
+
+
+def load_columns(cursor):
+    """
+    SESSIONS_QUERY's rows as seven int64 columns, streamed from the cursor
+    straight into one array (no list of row tuples in between).
+    """
+    values = np.fromiter(itertools.chain.from_iterable(cursor), dtype=np.int64)
+    return np.ascontiguousarray(values.reshape(-1, 7).T)
+
+
+def reprice_columns(columns, schedule_for):
+    """reprice_rows over load_columns' arrays, one vectorized pass per schedule."""
+    (player_id, category_id, start, stop, rate_cents, prepaid, prepay_amount) = columns
+    stop = np.maximum(stop, start)
+    seconds = stop - start
+    charged = (seconds * rate_cents + HALF_DOLLAR) // CENT_SECONDS_PER_DOLLAR
+    repriced = np.empty_like(charged)
+    for category in np.unique(category_id):
+        rows = category_id == category
+        schedule = schedule_for(int(category))
+        repriced[rows] = (schedule.charged_array(stop[rows]) - schedule.charged_array(start[rows])
+                          + HALF_DOLLAR) // CENT_SECONDS_PER_DOLLAR
+    prepaid = prepaid != 0
+    charged[prepaid] = prepay_amount[prepaid]
+    repriced[prepaid] = prepay_amount[prepaid]
+
+    (player_ids, player_index) = np.unique(player_id, return_inverse=True)
+    sums = [np.bincount(player_index, minlength=len(player_ids))]
+    # Float sums of integers, exact well past any club's history (2**53)
+    sums += [np.bincount(player_index, weights=column, minlength=len(player_ids)).astype(np.int64)
+             for column in (seconds, charged, repriced)]
+    return {int(player): [int(column[i]) for column in sums] for (i, player) in enumerate(player_ids)}
+
+
+def reprice(con, rate_group=None, categories=None, since=None, until=None, use_numpy=True):
+    """
+    {Player_Id: [sessions, seconds, charged, repriced]} for the stopped
+    sessions started in [since, until) (epochs; None for no bound).
+    """
+    schedule_for = load_schedules(con, rate_group, categories)
+    bounds = (ALL_TIME[0] if since is None else since, ALL_TIME[1] if until is None else until)
+    cursor = con.execute(SESSIONS_QUERY, bounds)
+    if use_numpy and np is not None:
+        return reprice_columns(load_columns(cursor), schedule_for)
+    return reprice_rows(cursor, schedule_for)
+
+
+def schedule_warnings(con, rate_group=None, categories=None):
+    """
+    Overlaps and gaps in the schedules the sessions are priced under, and
+    categories with sessions priced under their Rate_Group_Id's intervals
+    for want of their own, or under none at all, as messages.
+    """
+    schedule_for = load_schedules(con, rate_group, categories)
+    (_schedules, fallbacks) = category_schedules(con)
+    priced = {category_id for (category_id,) in con.execute(PRICED_CATEGORIES_QUERY)}
+    warnings = []
+    for (category_id, name) in con.execute("SELECT Player_Category_Id, Name FROM Player_Category"):
+        schedule = schedule_for(category_id)
+        own = rate_group is None or (categories is not None and category_id not in categories)
+        if category_id in priced and not schedule.times:
+            warnings.append(f"{name}: no Rate_Intervals to price its sessions under; repriced at $0")
+        elif category_id in priced and own and category_id in fallbacks:
+            warnings.append(f"{name}: no Category_Rate_Interval rows; "
+                            f"priced under rate group {fallbacks[category_id]}")
+        for (kind, stretches) in (("overlap", schedule.overlaps), ("gap", schedule.gaps)):
+            for (start, stop) in stretches:
+                warnings.append(f"{name}: Rate_Interval {kind} from {epoch_text(start)} to {epoch_text(stop)}")
+    return warnings
+
+
+def report_rows(con, totals):
+    """A FIELDS dict per player, in Player_Id order."""
+    names = dict(con.execute("SELECT Player_Id, IFNULL(NickName, Name) FROM Player"))
+    for player_id in sorted(totals):
+        (sessions, seconds, charged, repriced) = totals[player_id]
+        yield {"Player_Id": player_id, "Name": names.get(player_id), "Sessions": sessions,
+               "Hours": round(seconds / 3600, 2), "Charged": charged, "Repriced": repriced,
+               "Delta": repriced - charged}
+
+
+def write_report(rows, out_fh, fmt):
+    if fmt == "json":
+        json.dump(list(rows), out_fh, indent=2)
+        out_fh.write("\n")
+        return
+    writer = csv.DictWriter(out_fh, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def epoch_text(epoch):
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M")
+
+
+def date_epoch(text):
+    """A YYYY-MM-DD date's local midnight as an epoch."""
+    return int(datetime.strptime(text, "%Y-%m-%d").timestamp())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Reprice past sessions from the rate history.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"SQLite db path (default: {DEFAULT_DB})")
+    ap.add_argument("--since", type=date_epoch, help="First day, YYYY-MM-DD (default: the beginning)")
+    ap.add_argument("--until", type=date_epoch, help="Day after the last, YYYY-MM-DD (default: no end)")
+    ap.add_argument("--rate-group", type=int, help="Price under this Rate_Group_Id's Rate_Intervals")
+    ap.add_argument("--category", type=int, action="append",
+                    help="With --rate-group, only reprice this Player_Category_Id's players (repeatable)")
+    ap.add_argument("--format", choices=["csv", "json"], default="csv")
+    ap.add_argument("--out", help="Output file (default: stdout)")
+    ap.add_argument("--no-numpy", action="store_true", help="Price row by row even if NumPy is installed")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: database not found: {args.db}", file=sys.stderr)
+        return 1
+    if args.category and args.rate_group is None:
+        print("ERROR: --category needs --rate-group", file=sys.stderr)
+        return 1
+
+    con = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        if (args.rate_group is not None and con.execute(
+                "SELECT 1 FROM Rate_Interval WHERE Rate_Group_Id = ?", (args.rate_group,)).fetchone() is None):
+            print(f"ERROR: no Rate_Intervals for rate group {args.rate_group}", file=sys.stderr)
+            return 1
+        categories = set(args.category) if args.category else None
+        for warning in schedule_warnings(con, args.rate_group, categories):
+            print(f"WARNING: {warning}", file=sys.stderr)
+        started = time.perf_counter()
+        totals = reprice(con, args.rate_group, categories, args.since, args.until,
+                         use_numpy=not args.no_numpy)
+        elapsed = time.perf_counter() - started
+        rows = list(report_rows(con, totals))
+    finally:
+        con.close()
+
+    if args.out:
+        with open(args.out, "w", newline="") as fh:
+            write_report(rows, fh, args.format)
+    else:
+        write_report(rows, sys.stdout, args.format)
+    (charged, repriced) = (sum(row["Charged"] for row in rows), sum(row["Repriced"] for row in rows))
+    print(f"{sum(row['Sessions'] for row in rows)} sessions of {len(rows)} players: "
+          f"charged ${charged}, repriced ${repriced}, delta ${repriced - charged:+d} "
+          f"({'NumPy' if np is not None and not args.no_numpy else 'row by row'}, {elapsed:.2f}s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
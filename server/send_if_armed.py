@@ -16,6 +16,8 @@ Safety rules:
   * No sentinel            -> exit 0, do nothing.
   * Zero matching drafts   -> do NOT send, leave sentinel, exit 2.
   * More than one match    -> do NOT send (ambiguous), leave sentinel, exit 2.
+  * Over MAX_DRAFTS drafts -> do NOT send (some unseen), leave sentinel, exit 2.
+  * Draft lookup fails     -> do NOT send, leave sentinel, exit 1.
   * Send fails             -> leave sentinel, exit 1.
   * Exactly one match sent -> delete sentinel, exit 0.
 The sentinel is deleted ONLY after a confirmed successful send, so a failure
@@ -29,8 +31,10 @@ Credentials:
     CCC_GMAIL_TOKEN        (default ~/.config/ccc/token.json)       — minted on first run
 Scope: gmail.modify (lets us list drafts and send them).
 """
+import concurrent.futures
 import os
 import sys
+import threading
 from datetime import datetime
 
 SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
@@ -38,6 +42,11 @@ SENTINEL = os.path.expanduser(os.environ.get("CCC_SEND_SENTINEL", "~/carolina_ca
 CRED_PATH = os.path.expanduser(os.environ.get("CCC_GMAIL_CREDENTIALS", "~/.config/ccc/credentials.json"))
 TOKEN_PATH = os.path.expanduser(os.environ.get("CCC_GMAIL_TOKEN", "~/.config/ccc/token.json"))
 
+PAGE_SIZE = 100      # drafts per drafts().list page (the API allows up to 500)
+MAX_DRAFTS = 2000    # stop listing here, and do not send: there may be more
+MAX_WORKERS = 8      # concurrent drafts().get calls
+CALL_TIMEOUT = 20    # seconds for any one Gmail API call
+
 
 def log(msg):
     print(f"[{datetime.now().isoformat(timespec='seconds')}] send_if_armed: {msg}", flush=True)
@@ -51,11 +60,10 @@ def today_date_string():
         return datetime.now().strftime("%B %#d, %Y")   # Windows fallback
 
 
-def get_service():
+def get_credentials():
     from google.auth.transport.requests import Request
     from google.oauth2.credentials import Credentials
     from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
 
     creds = None
     if os.path.exists(TOKEN_PATH):
@@ -72,22 +80,93 @@ def get_service():
         os.makedirs(os.path.dirname(TOKEN_PATH), exist_ok=True)
         with open(TOKEN_PATH, "w") as fh:
             fh.write(creds.to_json())
-    return build("gmail", "v1", credentials=creds)
+    return creds
+
 
+def authorized_http(creds):
+    """
+    An HTTP client for creds whose every call gives up after CALL_TIMEOUT.
+    httplib2 is not thread-safe, so each lookup thread makes its own.
+    """
+    import google_auth_httplib2
+    import httplib2
+    return google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=CALL_TIMEOUT))
 
-def find_todays_draft(service, date_str):
-    """Return the single matching draft id, or None / raise on ambiguity."""
-    resp = service.users().drafts().list(
-        userId="me", q='subject:"POKER TONIGHT"', maxResults=50
-    ).execute()
-    matches = []
-    for d in resp.get("drafts", []):
-        full = service.users().drafts().get(userId="me", id=d["id"], format="metadata").execute()
-        headers = full.get("message", {}).get("payload", {}).get("headers", [])
-        subject = next((h["value"] for h in headers if h["name"].lower() == "subject"), "")
-        if "POKER TONIGHT" in subject and date_str in subject:
-            matches.append((d["id"], subject))
-    return matches
+
+def get_service(creds):
+    from googleapiclient.discovery import build
+    return build("gmail", "v1", http=authorized_http(creds))
+
+
+class DraftLookupError(RuntimeError):
+    """Some draft could not be looked at, so there is no telling which ones match."""
+
+
+def list_draft_ids(service, http=None):
+    """
+    Every POKER TONIGHT draft's id, a page at a time.  Returns (ids,
+    complete): complete is False if MAX_DRAFTS were listed and there are more.
+    """
+    ids = []
+    page_token = None
+    while True:
+        resp = service.users().drafts().list(
+            userId="me", q='subject:"POKER TONIGHT"', maxResults=PAGE_SIZE, pageToken=page_token
+        ).execute(http=http)
+        ids.extend(d["id"] for d in resp.get("drafts", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return (ids, True)
+        if len(ids) >= MAX_DRAFTS:
+            return (ids, False)
+
+
+def draft_subject(service, draft_id, http=None):
+    full = service.users().drafts().get(userId="me", id=draft_id, format="metadata").execute(http=http)
+    headers = full.get("message", {}).get("payload", {}).get("headers", [])
+    return next((h["value"] for h in headers if h["name"].lower() == "subject"), "")
+
+
+def find_todays_draft(service, date_str, make_http=None):
+    """
+    Return [(draft id, subject)] for every draft whose subject has POKER
+    TONIGHT and date_str, and whether every draft was seen.  The drafts'
+    subjects are fetched MAX_WORKERS at a time, each thread with its own
+    make_http() client (if given); raises DraftLookupError if any of them
+    fails or the lookup runs past CALL_TIMEOUT per round of MAX_WORKERS calls.
+    """
+    local = threading.local()
+
+    def thread_http():
+        if make_http is None:
+            return None
+        if not hasattr(local, "http"):
+            local.http = make_http()
+        return local.http
+
+    (ids, complete) = list_draft_ids(service, thread_http())
+    if not ids:
+        return ([], complete)
+    rounds = -(-len(ids) // MAX_WORKERS)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(ids)))
+    try:
+        futures = {pool.submit(lambda draft_id: draft_subject(service, draft_id, thread_http()), draft_id): draft_id
+                   for draft_id in ids}
+        subjects = {}
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=CALL_TIMEOUT * rounds):
+                try:
+                    subjects[futures[future]] = future.result()
+                except Exception as e:
+                    raise DraftLookupError(f"fetching draft {futures[future]} failed: {e!r}")
+        except concurrent.futures.TimeoutError:
+            raise DraftLookupError(f"{len(ids) - len(subjects)} of {len(ids)} drafts not fetched "
+                                   f"within {CALL_TIMEOUT * rounds}s")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    matches = [(draft_id, subjects[draft_id]) for draft_id in ids
+               if "POKER TONIGHT" in subjects[draft_id] and date_str in subjects[draft_id]]
+    return (matches, complete)
 
 
 def main():
@@ -98,9 +177,18 @@ def main():
     date_str = today_date_string()
     log(f"sentinel present; looking for today's draft (subject contains '{date_str}').")
 
-    service = get_service()
-    matches = find_todays_draft(service, date_str)
+    creds = get_credentials()
+    service = get_service(creds)
+    try:
+        (matches, complete) = find_todays_draft(service, date_str, lambda: authorized_http(creds))
+    except Exception as e:
+        log(f"DRAFT LOOKUP FAILED: {e}. Not sending. Leaving sentinel for retry.")
+        return 1
 
+    if not complete:
+        log(f"TOO MANY drafts: stopped listing at {MAX_DRAFTS}, so there may be other matches. "
+            f"Not sending. Leaving sentinel.")
+        return 2
     if len(matches) == 0:
         log(f"NO draft found matching POKER TONIGHT + '{date_str}'. Not sending. Leaving sentinel.")
         return 2
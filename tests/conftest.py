@@ -0,0 +1,14 @@
+# Copyright (c) 2025 Scott Marks
+"""
+The tests import the client and server modules the way the benchmarks
+do, by putting their directories on sys.path.  bench/ goes last, since
+several benchmarks share their module's name (bench/pull_db.py times
+server/pull_db.py): load those with helpers.bench_module.
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for directory in ("client", "server"):
+    sys.path.insert(0, os.path.join(HERE, "..", directory))
+sys.path.append(os.path.join(HERE, "..", "bench"))
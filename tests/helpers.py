@@ -0,0 +1,23 @@
+# Copyright (c) 2025 Scott Marks
+"""
+Shared by the tests.
+"""
+import importlib.util
+import os
+import sys
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench")
+
+
+def bench_module(name):
+    """
+    bench/<name>.py, imported as bench_<name> so that it does not shadow
+    (or get shadowed by) the client or server module of the same name.
+    """
+    module_name = f"bench_{name}"
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(BENCH_DIR, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
@@ -0,0 +1,82 @@
+# Copyright (c) 2025 Scott Marks
+"""
+The change feed (client/changefeed.py) against bench/change_feed.py's
+stand-in publisher, listening the way the session app does: published
+writes refresh the list at once, and unpublished ones (the Dart server's)
+still within a poll.
+"""
+import os
+import socket
+import time
+
+import pytest
+
+if not hasattr(socket, "AF_UNIX"):
+    pytest.skip("no AF_UNIX sockets, so no change feed", allow_module_level=True)
+
+import synth  # noqa: E402
+import change_feed  # noqa: E402
+from changefeed import ChangeSubscriber, publish  # noqa: E402
+
+WRITES = 6
+GAP_SECONDS = 0.5
+PUSH_LATENCY_MS = 250
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "CarolinaCardClub.db")
+    synth.build(path, players=40, weeks=4, sessions=160, payments=80)
+    return path
+
+
+@pytest.fixture
+def feed_dir(tmp_path):
+    return str(tmp_path / "feed")
+
+
+def latencies(db_path, feed_dir, push, silent):
+    (committed, refreshed) = change_feed.publish_and_listen(db_path, feed_dir, push, WRITES, seed=1,
+                                                            gap=GAP_SECONDS, silent=silent)
+    assert len(committed) == WRITES
+    found = change_feed.latencies_ms(committed, refreshed)
+    assert len(found) == WRITES, "some writes never showed up"
+    return found
+
+
+def test_publish_reaches_every_subscriber(feed_dir):
+    received = ([], [])
+    subscribers = [ChangeSubscriber(messages.append, feed_dir) for messages in received]
+    for subscriber in subscribers:
+        subscriber.start()
+    try:
+        assert publish("session_stopped", feed_dir, session_id=12, player_id=3) == 2
+        deadline = time.monotonic() + 2.0
+        while not all(received) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        for subscriber in subscribers:
+            subscriber.stop()
+    for messages in received:
+        assert [(m["event"], m["session_id"], m["player_id"]) for m in messages] == \
+            [("session_stopped", 12, 3)]
+        assert abs(messages[0]["t"] - time.time()) < 2.0
+
+
+def test_publish_drops_subscribers_that_have_gone(feed_dir):
+    subscriber = ChangeSubscriber(lambda message: None, feed_dir)
+    path = subscriber.path
+    subscriber.sock.close()  # Gone without unlinking its socket file
+    assert publish("session_started", feed_dir, player_id=1) == 0
+    assert not os.path.exists(path)
+
+
+def test_published_writes_refresh_at_once(db_path, feed_dir):
+    assert max(latencies(db_path, feed_dir, push=True, silent=False)) < PUSH_LATENCY_MS
+
+
+def test_unpublished_writes_are_still_polled_every_second(db_path, feed_dir):
+    # The feed is up, but the writer (like the Dart server) never publishes
+    bound_ms = change_feed.POLL_SECONDS * 1000 + PUSH_LATENCY_MS
+    assert max(latencies(db_path, feed_dir, push=True, silent=True)) < bound_ms
+
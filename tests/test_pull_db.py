@@ -0,0 +1,192 @@
+# Copyright (c) 2025 Scott Marks
+"""
+server/pull_db.py against server/local_db_handler.py, the http.server
+stand-in for db_handler.php, serving a small synthetic database (with
+bench/pull_db.py's handlers for cut connections and bad bodies): a
+cold pull, the ETag 304, the content-hash skip, a resumed transfer,
+gzip, and refusal of bad downloads, which leaves the installed copy
+exactly as it was.
+"""
+import os
+import sqlite3
+
+import pytest
+
+import pull_db
+import synth
+import local_db_handler
+from helpers import bench_module
+
+bench = bench_module("pull_db")
+KEY = local_db_handler.DEFAULT_API_KEY
+
+
+class CorruptHandler(local_db_handler.DbHandler):
+    """Answers with the served database, its second page overwritten."""
+
+    def handle_request(self, params):
+        body = bytearray(self.server.database.whole_file().body)
+        page_size = int.from_bytes(body[16:18], "big")
+        body[page_size:2 * page_size] = b"\xff" * page_size
+        self.send_body(200, bytes(body), "application/octet-stream")
+
+
+@pytest.fixture(autouse=True)
+def quick_retries(monkeypatch):
+    monkeypatch.setattr(pull_db, "RETRY_DELAY_SECONDS", 0.01)
+
+
+@pytest.fixture
+def served(tmp_path):
+    db_path = str(tmp_path / "served.db")
+    synth.build(db_path, players=200, weeks=20, sessions=4000, payments=1000)
+    (server, url) = bench.serve(db_path)
+    yield (server, url, db_path)
+    bench.stop(server)
+
+
+@pytest.fixture
+def dest(tmp_path):
+    return str(tmp_path / "pulled.db")
+
+
+def served_bytes(server):
+    return server.database.whole_file().body
+
+
+def read(path):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def test_cold_pull_installs_the_served_database(served, dest):
+    (server, url, _db_path) = served
+    fetched = pull_db.fetch(url, KEY, dest)
+    assert fetched.changed and fetched.resumed_from is None
+    assert fetched.transferred == fetched.size == len(served_bytes(server))
+    assert read(dest) == served_bytes(server)
+    assert not os.path.exists(dest + ".part") and not os.path.exists(dest + ".before-pull")
+
+
+def test_unchanged_database_is_answered_304_with_no_body(served, dest):
+    (_server, url, _db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    installed = os.stat(dest)
+    fetched = pull_db.fetch(url, KEY, dest)
+    assert not fetched.changed and fetched.transferred == 0
+    assert os.stat(dest).st_mtime_ns == installed.st_mtime_ns
+
+
+def test_without_an_etag_the_content_hash_saves_the_install(served, dest):
+    (_server, url, _db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    meta = pull_db.load_json(dest + ".pull.json")
+    pull_db.save_json(dest + ".pull.json", dict(meta, etag=None, last_modified=None))
+    installed = os.stat(dest)
+    fetched = pull_db.fetch(url, KEY, dest)
+    assert not fetched.changed and fetched.transferred == fetched.size
+    assert os.stat(dest).st_mtime_ns == installed.st_mtime_ns
+    assert not os.path.exists(dest + ".part")
+
+
+def test_a_local_edit_voids_the_cache(served, dest):
+    (server, url, _db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    bench.touch(dest)  # Same size, different bytes
+    assert pull_db.fetch(url, KEY, dest).changed
+    assert read(dest) == served_bytes(server)
+
+
+def test_a_changed_database_replaces_dest_keeping_the_old_one(served, dest):
+    (server, url, db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    old = read(dest)
+    bench.touch(db_path)
+    fetched = pull_db.fetch(url, KEY, dest)
+    assert fetched.changed
+    assert read(dest) == served_bytes(server) != old
+    assert read(dest + ".before-pull") == old
+
+
+@pytest.mark.parametrize("cuts", [1, 2])
+def test_a_cut_transfer_resumes_where_it_stopped(served, dest, cuts):
+    (server, url, _db_path) = served
+    size = len(served_bytes(server))
+    server.cuts = cuts
+    server.cut_bytes = size * 2 // 5
+    fetched = pull_db.fetch(url, KEY, dest)
+    assert fetched.changed and fetched.resumed_from == server.cut_bytes
+    # Each retry asks only for the rest
+    assert fetched.transferred < size + size * 2 // 5 * cuts
+    assert read(dest) == served_bytes(server)
+    assert not os.path.exists(dest + ".part") and not os.path.exists(dest + ".part.json")
+
+
+def test_a_transfer_cut_too_often_keeps_dest_and_the_part_for_next_time(served, dest):
+    (server, url, db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    old = read(dest)
+    bench.touch(db_path)
+    size = len(served_bytes(server))
+    server.cuts = 3
+    server.cut_bytes = size // 10
+    with pytest.raises(pull_db.DownloadError):
+        pull_db.fetch(url, KEY, dest, retries=2)
+    assert read(dest) == old
+    assert os.path.getsize(dest + ".part") == 3 * (size // 10)
+    fetched = pull_db.fetch(url, KEY, dest)
+    assert fetched.resumed_from == 3 * (size // 10)
+    assert read(dest) == served_bytes(server)
+
+
+def test_gzip(served, dest):
+    (server, url, _db_path) = served
+    fetched = pull_db.fetch(url, KEY, dest, compress=True)
+    assert fetched.changed and fetched.transferred < fetched.size
+    assert read(dest) == served_bytes(server)
+
+
+@pytest.mark.parametrize("handler", [bench.NotADatabaseHandler, CorruptHandler])
+def test_a_bad_download_is_refused_and_dest_left_alone(served, dest, handler):
+    (_server, url, db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    old = read(dest)
+    installed = os.stat(dest)
+    (bad_server, bad_url) = bench.serve(db_path, handler)
+    try:
+        with pytest.raises(pull_db.DownloadError):
+            pull_db.fetch(bad_url, KEY, dest, cache=False)
+    finally:
+        bench.stop(bad_server)
+    assert read(dest) == old
+    assert os.stat(dest).st_mtime_ns == installed.st_mtime_ns
+    assert not os.path.exists(dest + ".part")
+    assert not os.path.exists(dest + ".before-pull")
+    con = sqlite3.connect(f"file:{dest}?mode=ro", uri=True)
+    assert con.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    con.close()
+
+
+def test_a_bad_key_is_refused(served, dest):
+    (_server, url, _db_path) = served
+    with pytest.raises(pull_db.DownloadError):
+        pull_db.fetch(url, "wrong", dest)
+    assert not os.path.exists(dest) and not os.path.exists(dest + ".part")
+
+
+def test_the_install_is_an_atomic_rename(served, dest, monkeypatch):
+    (server, url, db_path) = served
+    pull_db.fetch(url, KEY, dest)
+    bench.touch(db_path)
+    replaced = []
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if dst == dest:
+            # By the time dest is replaced, the whole checked download is in place beside it
+            assert read(src) == served_bytes(server)
+            replaced.append(src)
+        return real_replace(src, dst)
+    monkeypatch.setattr(pull_db.os, "replace", replace)
+    pull_db.fetch(url, KEY, dest)
+    assert replaced == [dest + ".part"]
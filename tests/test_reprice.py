@@ -0,0 +1,86 @@
+# Copyright (c) 2025 Scott Marks
+"""
+server/reprice.py's vectorized NumPy path against its row-by-row one:
+the same totals, player by player, for every way of pricing, on a
+synthetic database with sessions straddling each rate change, prepaid
+ones and one stopped before it started, and on the shipped database.
+Skipped without NumPy.
+"""
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import reprice  # noqa: E402
+import synth  # noqa: E402
+from helpers import bench_module  # noqa: E402
+
+SHIPPED_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server", "CarolinaCardClub.db")
+
+bench = bench_module("reprice")
+
+
+@pytest.fixture(scope="module")
+def con(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("reprice") / "CarolinaCardClub.db")
+    counts = synth.build(db_path, players=120, weeks=104, sessions=6000, payments=2000, rate_interval_count=4)
+    con = sqlite3.connect(db_path)
+    bench.add_straddling(con, 200, counts["player"])
+    with con:
+        con.execute("UPDATE Session SET Is_Prepaid = 1, Prepay_Amount = 40 WHERE Session_Id % 17 = 0")
+        con.execute("UPDATE Session SET Stop_Epoch = Start_Epoch - 60 "
+                    "WHERE Session_Id = (SELECT MAX(Session_Id) FROM Session WHERE Stop_Epoch IS NOT NULL)")
+    assert con.execute(bench.STRADDLING_SQL).fetchone()[0] > 0
+    yield con
+    con.close()
+
+
+def both_ways(con, **kwargs):
+    rows = reprice.reprice(con, use_numpy=False, **kwargs)
+    columns = reprice.reprice(con, use_numpy=True, **kwargs)
+    assert rows, "nothing priced"
+    return (columns, rows)
+
+
+def some_categories(con):
+    return {category_id for (category_id,) in con.execute(
+        "SELECT Player_Category_Id FROM Player_Category ORDER BY Player_Category_Id LIMIT 2")}
+
+
+def middle_epochs(con):
+    (first, last) = con.execute("SELECT MIN(Start_Epoch), MAX(Start_Epoch) FROM Session").fetchone()
+    return (first + (last - first) // 3, first + 2 * (last - first) // 3)
+
+
+def test_each_category_under_its_own_rates(con):
+    (columns, rows) = both_ways(con)
+    assert columns == rows
+
+
+def test_what_if_everyone_is_under_one_rate_group(con):
+    (columns, rows) = both_ways(con, rate_group=3)
+    assert columns == rows
+
+
+def test_what_if_for_some_categories(con):
+    (columns, rows) = both_ways(con, rate_group=2, categories=some_categories(con))
+    assert columns == rows
+
+
+def test_a_window_of_time(con):
+    (since, until) = middle_epochs(con)
+    (columns, rows) = both_ways(con, since=since, until=until)
+    assert columns == rows
+    assert sum(sessions for (sessions, *_rest) in rows.values()) < \
+        con.execute("SELECT COUNT(*) FROM Session WHERE Stop_Epoch IS NOT NULL").fetchone()[0]
+
+
+def test_the_shipped_database():
+    con = sqlite3.connect(f"file:{SHIPPED_DB}?mode=ro", uri=True)
+    try:
+        (columns, rows) = both_ways(con)
+    finally:
+        con.close()
+    assert columns == rows
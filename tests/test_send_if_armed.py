@@ -0,0 +1,95 @@
+# Copyright (c) 2025 Scott Marks
+"""
+server/send_if_armed.py against bench/send_if_armed.py's fake Gmail
+service, which answers each call after a set latency: main()'s exit
+codes and sentinel handling armed and unarmed, and the draft lookup's
+pagination, bounded concurrency and latency.
+"""
+import math
+import os
+import time
+
+import pytest
+
+import send_if_armed
+from send_if_armed import find_todays_draft
+from helpers import bench_module
+
+fake = bench_module("send_if_armed")
+(DATE, FakeGmail, drafts) = (fake.DATE, fake.FakeGmail, fake.drafts)
+
+LATENCY = 0.05  # Seconds per fake API call
+
+
+@pytest.fixture
+def sentinel(tmp_path, monkeypatch):
+    """main() wired to the fake: no credentials, today is DATE, quick timeouts."""
+    path = str(tmp_path / "send_email_ok")
+    monkeypatch.setattr(send_if_armed, "SENTINEL", path)
+    monkeypatch.setattr(send_if_armed, "CALL_TIMEOUT", 0.5)
+    monkeypatch.setattr(send_if_armed, "MAX_DRAFTS", 300)
+    monkeypatch.setattr(send_if_armed, "get_credentials", lambda: None)
+    monkeypatch.setattr(send_if_armed, "authorized_http", lambda creds: None)
+    monkeypatch.setattr(send_if_armed, "today_date_string", lambda: DATE)
+    monkeypatch.setattr(send_if_armed, "log", lambda msg: None)
+    return path
+
+
+def run_main(monkeypatch, gmail, sentinel, armed=True):
+    if armed:
+        open(sentinel, "w").close()
+    monkeypatch.setattr(send_if_armed, "get_service", lambda creds: gmail)
+    return send_if_armed.main()
+
+
+def test_unarmed_does_nothing(monkeypatch, sentinel):
+    gmail = FakeGmail(drafts(120), 0.001)
+    assert run_main(monkeypatch, gmail, sentinel, armed=False) == 0
+    assert gmail.calls == 0 and gmail.sent == []
+
+
+def test_armed_sends_the_one_match_and_disarms(monkeypatch, sentinel):
+    gmail = FakeGmail(drafts(120), 0.001)
+    assert run_main(monkeypatch, gmail, sentinel) == 0
+    assert gmail.sent == ["today0"]
+    assert not os.path.exists(sentinel)
+
+
+@pytest.mark.parametrize(("label", "gmail", "code"), [
+    ("no match", FakeGmail(drafts(120, matching=0), 0.001), 2),
+    ("two matches", FakeGmail(drafts(120, matching=2), 0.001), 2),
+    ("over MAX_DRAFTS", FakeGmail(drafts(400), 0.001), 2),
+    ("a lookup fails", FakeGmail(drafts(120), 0.001, fail_ids=["d7"]), 1),
+    ("a lookup times out", FakeGmail(drafts(120), 0.001, timeout_ids=["d3"]), 1),
+    ("a lookup hangs", FakeGmail(drafts(16), 0.001, hang_ids=["d3"]), 1),
+    ("the send fails", FakeGmail(drafts(120), 0.001, send_fails=True), 1),
+])
+def test_armed_but_not_sent_keeps_the_sentinel(monkeypatch, sentinel, label, gmail, code):
+    assert run_main(monkeypatch, gmail, sentinel) == code, label
+    assert gmail.sent == []
+    assert os.path.exists(sentinel)
+
+
+def test_lookup_pages_past_the_first_fifty():
+    # Today's draft is listed last, on the third page
+    n = send_if_armed.PAGE_SIZE * 2 + 10
+    (matches, complete) = find_todays_draft(FakeGmail(drafts(n), 0.001), DATE)
+    assert complete
+    assert matches == [("today0", f"POKER TONIGHT - {DATE}")]
+
+
+@pytest.mark.parametrize("n", [5, 60, 200])
+def test_lookup_latency_is_bounded_by_rounds_of_workers(n):
+    gmail = FakeGmail(drafts(n), LATENCY)
+    started = time.perf_counter()
+    (matches, complete) = find_todays_draft(gmail, DATE)
+    elapsed = time.perf_counter() - started
+    assert complete and len(matches) == 1
+    pages = math.ceil(n / send_if_armed.PAGE_SIZE)
+    rounds = math.ceil(n / send_if_armed.MAX_WORKERS)
+    assert gmail.calls == pages + n
+    assert gmail.most_running <= send_if_armed.MAX_WORKERS
+    # One call's latency per page and per round of MAX_WORKERS gets, with room for scheduling
+    assert elapsed < (pages + rounds) * LATENCY * 1.5 + 0.25
+    # Well short of one get after another
+    assert elapsed < (pages + n) * LATENCY / 2 or n < send_if_armed.MAX_WORKERS
@@ -0,0 +1,72 @@
+# Copyright (c) 2025 Scott Marks
+"""
+client/sessionhistory.py paging through a synthetic database in which
+some players have no category, so Session_Amount_List leaves out their
+sessions: scrolling to the oldest and back must show every priced
+session once, in order, and only stop at the real ends of history.
+"""
+import sqlite3
+
+import pytest
+
+import synth
+from dbconnection import ConnectionManager
+from sessionhistory import SessionHistory, fetch_older, fetch_newer, cursor
+
+PAGE_SIZE = 50
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db_path = str(tmp_path / "CarolinaCardClub.db")
+    synth.build(db_path, players=60, weeks=30, sessions=3000, payments=500, running=0)
+    con = sqlite3.connect(db_path)
+    with con:
+        # Some players without a category, and a run of sessions longer than a page all theirs
+        con.execute("UPDATE Player SET Player_Category_Id = NULL WHERE Player_Id % 7 = 0")
+        con.execute("UPDATE Session SET Player_Id = 7 WHERE Session_Id IN "
+                    "(SELECT Session_Id FROM Session ORDER BY Start_Epoch, Session_Id "
+                    "LIMIT ? OFFSET 1000)", (PAGE_SIZE * 3,))
+    con.close()
+    manager = ConnectionManager(db_path)
+    yield manager
+    manager.close()
+
+
+def priced(manager):
+    """The keyset cursors of every session the history can show, newest first."""
+    return [(start, session_id) for (session_id, start) in manager.fetch(
+        "SELECT Session_Id, Session_Start_Epoch FROM Session_Amount_List "
+        "ORDER BY Session_Start_Epoch DESC, Session_Id DESC")]
+
+
+def test_scrolling_shows_every_priced_session_once(manager):
+    expected = priced(manager)
+    assert len(expected) < manager.fetch("SELECT COUNT(*) FROM Session")[0][0]
+    history = SessionHistory(page_size=PAGE_SIZE, max_rows=PAGE_SIZE * 3)
+    seen = []
+    while not history.at_oldest:
+        page = fetch_older(manager, history.older_cursor(), PAGE_SIZE)
+        seen.extend(cursor(row) for row in page.rows)
+        history.add_older(page)
+    assert seen == expected
+    assert [cursor(row) for row in history.rows] == expected[-len(history.rows):]
+
+    seen = []
+    while not history.at_newest:
+        page = fetch_newer(manager, history.newer_cursor(), PAGE_SIZE)
+        seen[:0] = [cursor(row) for row in page.rows]
+        history.add_newer(page)
+    assert seen == expected[:len(seen)]
+    assert [cursor(row) for row in history.rows] == expected[:len(history.rows)]
+
+
+def test_reload_keeps_going_past_unpriced_sessions(manager):
+    expected = priced(manager)
+    history = SessionHistory(page_size=PAGE_SIZE, max_rows=PAGE_SIZE * 3)
+    requested = PAGE_SIZE * 2
+    history.replace(fetch_older(manager, history.reload_cursor(), requested), requested, True)
+    assert not history.at_oldest
+    while not history.at_oldest:
+        history.add_older(fetch_older(manager, history.older_cursor(), PAGE_SIZE))
+    assert cursor(history.rows[-1]) == expected[-1]